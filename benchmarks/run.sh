@@ -5,7 +5,7 @@
 [ -f /tmp/500000.json ] || ./streamson-bench generate -u 250000 -g 250000 -o /tmp/500000.json
 [ -f /tmp/1000000.json ] || ./streamson-bench generate -u 500000 -g 500000 -o /tmp/1000000.json
 
-for strategy in stdlib hyperjson streamson ijson-yajl2 ijson-yajl2_c ijson-yajl2_cffi ijson-python
+for strategy in stdlib hyperjson streamson streamson-buffer streamson-buffer-list streamson-objects ijson-yajl2 ijson-yajl2_c ijson-yajl2_cffi ijson-python
 do
 	echo "##### ${strategy} #####"
 	for count in 100000 500000 1000000
@@ -15,3 +15,9 @@ do
 		./streamson-bench memory -i "/tmp/${count}.json" -s "${strategy}"
 	done
 done
+
+echo "##### startup #####"
+./streamson-bench startup
+
+echo "##### suite #####"
+./streamson-bench suite -o "/tmp/streamson-suite-$(python3 -c 'import streamson; print(streamson.__version__)').json"
@@ -0,0 +1,231 @@
+use crate::{decode, path::PathCache};
+use pyo3::{class::PySequenceProtocol, prelude::*, types::PyBytes};
+use std::vec::Drain;
+use streamson_lib::strategy::Output;
+
+/// Joins strategy output into complete records
+///
+/// Records which are not finished yet are kept
+/// until the rest of the record is processed.
+#[derive(Debug, Default)]
+pub struct Records {
+    /// Data of finished records followed by the data of the pending record
+    data: Vec<u8>,
+    /// End offsets of finished records
+    ends: Vec<usize>,
+    /// Paths of finished records
+    paths: Vec<Option<PyObject>>,
+    /// Path of the pending record
+    current: Option<Option<PyObject>>,
+    /// Last rendered path
+    path_cache: PathCache,
+    /// Nesting level of the pending record
+    level: usize,
+    /// Max size of a single record
+    max_size: Option<usize>,
+}
+
+impl Records {
+    /// Creates new records
+    ///
+    /// # Arguments
+    /// * `max_size` - max size of a single record
+    pub fn new(max_size: Option<usize>) -> Self {
+        Self {
+            max_size,
+            ..Default::default()
+        }
+    }
+
+    /// Drops all records including the pending one
+    ///
+    /// Allocated buffers are kept so they can be reused.
+    pub fn clear(&mut self) {
+        self.data.clear();
+        self.ends.clear();
+        self.paths.clear();
+        self.current = None;
+        self.level = 0;
+    }
+
+    /// Size of the data kept in records (finished and pending)
+    pub fn buffered(&self) -> usize {
+        self.data.len()
+    }
+
+    /// Size of the pending record
+    fn pending(&self) -> usize {
+        self.data.len() - self.ends.last().copied().unwrap_or(0)
+    }
+
+    /// Feeds output of the strategy
+    ///
+    /// # Arguments
+    /// * `py` - python GIL token
+    /// * `output` - output of the strategy
+    ///
+    /// # Errors
+    /// Fails when the pending record exceeds max size
+    pub fn feed(&mut self, py: Python, output: Vec<Output>) -> Result<(), String> {
+        for item in output {
+            match item {
+                Output::Start(path) => {
+                    if self.level == 0 {
+                        let path_cache = &mut self.path_cache;
+                        self.current = Some(path.map(|path| path_cache.to_object(py, &path)));
+                    }
+                    self.level += 1;
+                }
+                Output::Data(data) => {
+                    if self.current.is_none() {
+                        // data without a start
+                        self.current = Some(None);
+                        self.level = 1;
+                    }
+                    self.data.extend(data);
+                    if let Some(max_size) = self.max_size {
+                        if self.pending() > max_size {
+                            return Err(format!("Record exceeds max size ({} bytes)", max_size));
+                        }
+                    }
+                }
+                Output::End => {
+                    self.level = self.level.saturating_sub(1);
+                    if self.level == 0 {
+                        if let Some(path) = self.current.take() {
+                            self.paths.push(path);
+                            self.ends.push(self.data.len());
+                        }
+                    }
+                }
+            }
+        }
+        Ok(())
+    }
+
+    /// Checks that no record is pending when the input ends
+    ///
+    /// # Errors
+    /// Fails when the pending record was not finished (e.g. data without an end)
+    pub fn finish(&self) -> Result<(), String> {
+        if self.current.is_some() {
+            Err(format!(
+                "Input ended in the middle of a record ({} bytes pending)",
+                self.pending()
+            ))
+        } else {
+            Ok(())
+        }
+    }
+
+    /// Removes finished records
+    ///
+    /// Buffers are drained in place, so their allocations are reused for next records.
+    ///
+    /// # Arguments
+    /// * `f` - gets data of the finished records, end offsets of the records and paths of the records
+    fn take<T, F>(&mut self, f: F) -> T
+    where
+        F: FnOnce(&[u8], &[usize], Drain<Option<PyObject>>) -> T,
+    {
+        let end = self.ends.last().copied().unwrap_or(0);
+        let result = f(&self.data[..end], &self.ends, self.paths.drain(..));
+        self.ends.clear();
+        // moves the pending record to the start of the buffer
+        self.data.drain(..end);
+        result
+    }
+
+    /// Removes finished records and converts them to python records
+    pub fn take_records(&mut self, py: Python) -> Vec<(Option<PyObject>, PyObject)> {
+        self.take(|data, ends, paths| {
+            let mut start = 0;
+            paths
+                .zip(ends)
+                .map(|(path, &end)| {
+                    let record = PyBytes::new(py, &data[start..end]).into();
+                    start = end;
+                    (path, record)
+                })
+                .collect()
+        })
+    }
+
+    /// Removes finished records and decodes them to python objects
+    ///
+    /// # Errors
+    /// Fails when a record is not a valid json
+    pub fn take_objects(
+        &mut self,
+        py: Python,
+    ) -> Result<Vec<(Option<PyObject>, PyObject)>, String> {
+        self.take(|data, ends, paths| {
+            let mut start = 0;
+            paths
+                .zip(ends)
+                .map(|(path, &end)| {
+                    let object = decode::decode(py, &data[start..end])?;
+                    start = end;
+                    Ok((path, object))
+                })
+                .collect()
+        })
+    }
+
+    /// Removes finished records and wraps them into a batch
+    pub fn take_batch(&mut self, py: Python) -> Batch {
+        self.take(|data, ends, paths| {
+            let mut offsets = Vec::with_capacity(ends.len() + 1);
+            offsets.push(0);
+            offsets.extend_from_slice(ends);
+            Batch {
+                data: PyBytes::new(py, data).into(),
+                offsets,
+                paths: paths.collect(),
+            }
+        })
+    }
+}
+
+/// Complete records produced while a single input chunk was processed
+///
+/// Data of all records are stored in a single `bytes` object.
+/// Record `n` is `data[offsets[n]:offsets[n + 1]]` and its path is `paths[n]`.
+#[pyclass]
+pub struct Batch {
+    data: PyObject,
+    offsets: Vec<usize>,
+    paths: Vec<Option<PyObject>>,
+}
+
+#[pymethods]
+impl Batch {
+    /// Data of all records
+    #[getter]
+    pub fn data(&self, py: Python) -> PyObject {
+        self.data.clone_ref(py)
+    }
+
+    /// Offsets of records in data (one more item than the record count)
+    #[getter]
+    pub fn offsets(&self) -> Vec<usize> {
+        self.offsets.clone()
+    }
+
+    /// Paths of the records
+    #[getter]
+    pub fn paths(&self, py: Python) -> Vec<Option<PyObject>> {
+        self.paths
+            .iter()
+            .map(|path| path.as_ref().map(|path| path.clone_ref(py)))
+            .collect()
+    }
+}
+
+#[pyproto]
+impl PySequenceProtocol for Batch {
+    /// Number of records in the batch
+    fn __len__(&self) -> usize {
+        self.paths.len()
+    }
+}
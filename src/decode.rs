@@ -0,0 +1,240 @@
+use pyo3::{
+    prelude::*,
+    types::{PyDict, PyList, PyString},
+};
+use std::str;
+
+/// Max nesting level of decoded data
+const MAX_DEPTH: usize = 1024;
+
+/// Decodes json into python objects (`dict`, `list`, `str`, `int`, `float`, `bool`, `None`)
+///
+/// # Arguments
+/// * `py` - python GIL token
+/// * `data` - json data
+///
+/// # Errors
+/// Fails when the data are not a valid json
+pub fn decode(py: Python, data: &[u8]) -> Result<PyObject, String> {
+    let mut decoder = Decoder { py, data, idx: 0 };
+    let res = decoder.value(0)?;
+    decoder.whitespace();
+    if decoder.idx < data.len() {
+        return Err(decoder.error("Extra data"));
+    }
+    Ok(res)
+}
+
+struct Decoder<'a, 'py> {
+    py: Python<'py>,
+    data: &'a [u8],
+    idx: usize,
+}
+
+impl<'a, 'py> Decoder<'a, 'py> {
+    fn error(&self, msg: &str) -> String {
+        format!("{} at position {}", msg, self.idx)
+    }
+
+    fn whitespace(&mut self) {
+        while self.idx < self.data.len()
+            && matches!(self.data[self.idx], b' ' | b'\t' | b'\n' | b'\r')
+        {
+            self.idx += 1;
+        }
+    }
+
+    fn peek(&mut self) -> Option<u8> {
+        self.whitespace();
+        self.data.get(self.idx).copied()
+    }
+
+    fn expect(&mut self, byte: u8) -> Result<(), String> {
+        if self.peek() == Some(byte) {
+            self.idx += 1;
+            Ok(())
+        } else {
+            Err(self.error(&format!("Expected '{}'", byte as char)))
+        }
+    }
+
+    fn value(&mut self, depth: usize) -> Result<PyObject, String> {
+        if depth > MAX_DEPTH {
+            return Err(self.error("Max depth exceeded"));
+        }
+        match self.peek() {
+            Some(b'{') => self.object(depth),
+            Some(b'[') => self.array(depth),
+            Some(b'"') => Ok(self.string()?.into_py(self.py)),
+            Some(b't') => self.literal(b"true", true.into_py(self.py)),
+            Some(b'f') => self.literal(b"false", false.into_py(self.py)),
+            Some(b'n') => self.literal(b"null", self.py.None()),
+            Some(b'-') | Some(b'0'..=b'9') => self.number(),
+            _ => Err(self.error("Expected value")),
+        }
+    }
+
+    fn object(&mut self, depth: usize) -> Result<PyObject, String> {
+        self.idx += 1;
+        let dict = PyDict::new(self.py);
+        if self.peek() == Some(b'}') {
+            self.idx += 1;
+            return Ok(dict.into());
+        }
+        loop {
+            if self.peek() != Some(b'"') {
+                return Err(self.error("Expected key"));
+            }
+            let key = self.string()?;
+            self.expect(b':')?;
+            let value = self.value(depth + 1)?;
+            dict.set_item(key, value)
+                .map_err(|err| self.error(&err.to_string()))?;
+            match self.peek() {
+                Some(b',') => self.idx += 1,
+                Some(b'}') => {
+                    self.idx += 1;
+                    return Ok(dict.into());
+                }
+                _ => return Err(self.error("Expected ',' or '}'")),
+            }
+        }
+    }
+
+    fn array(&mut self, depth: usize) -> Result<PyObject, String> {
+        self.idx += 1;
+        let mut items = vec![];
+        if self.peek() == Some(b']') {
+            self.idx += 1;
+            return Ok(PyList::empty(self.py).into());
+        }
+        loop {
+            items.push(self.value(depth + 1)?);
+            match self.peek() {
+                Some(b',') => self.idx += 1,
+                Some(b']') => {
+                    self.idx += 1;
+                    return Ok(PyList::new(self.py, items).into());
+                }
+                _ => return Err(self.error("Expected ',' or ']'")),
+            }
+        }
+    }
+
+    fn literal(&mut self, literal: &[u8], value: PyObject) -> Result<PyObject, String> {
+        if self.data[self.idx..].starts_with(literal) {
+            self.idx += literal.len();
+            Ok(value)
+        } else {
+            Err(self.error("Expected value"))
+        }
+    }
+
+    fn number(&mut self) -> Result<PyObject, String> {
+        let start = self.idx;
+        let mut is_float = false;
+        while let Some(byte) = self.data.get(self.idx) {
+            match byte {
+                b'0'..=b'9' | b'-' | b'+' => {}
+                b'.' | b'e' | b'E' => is_float = true,
+                _ => break,
+            }
+            self.idx += 1;
+        }
+        // only ascii characters were consumed
+        let number = str::from_utf8(&self.data[start..self.idx]).unwrap();
+        if is_float {
+            let value: f64 = number.parse().map_err(|_| self.error("Invalid number"))?;
+            Ok(value.into_py(self.py))
+        } else if let Ok(value) = number.parse::<i64>() {
+            Ok(value.into_py(self.py))
+        } else {
+            // too big for i64 - let python parse it
+            let int = self
+                .py
+                .import("builtins")
+                .and_then(|builtins| builtins.getattr("int"))
+                .and_then(|int| int.call1((number,)))
+                .map_err(|_| self.error("Invalid number"))?;
+            Ok(int.into())
+        }
+    }
+
+    fn string(&mut self) -> Result<&'py PyString, String> {
+        let data = self.data;
+        self.idx += 1;
+        let start = self.idx;
+        let mut escaped: Option<Vec<u8>> = None;
+        loop {
+            match data.get(self.idx) {
+                None => return Err(self.error("Unterminated string")),
+                Some(b'"') => break,
+                Some(b'\\') => {
+                    let start_idx = self.idx;
+                    // unescaped string is created on the first escape
+                    let buffer = escaped.get_or_insert_with(|| data[start..start_idx].to_vec());
+                    self.idx += 1;
+                    let chr = match data.get(self.idx) {
+                        Some(b'"') => '"',
+                        Some(b'\\') => '\\',
+                        Some(b'/') => '/',
+                        Some(b'b') => '\u{8}',
+                        Some(b'f') => '\u{c}',
+                        Some(b'n') => '\n',
+                        Some(b'r') => '\r',
+                        Some(b't') => '\t',
+                        Some(b'u') => self.unicode()?,
+                        _ => return Err(self.error("Invalid escape")),
+                    };
+                    let mut encoded = [0; 4];
+                    buffer.extend(chr.encode_utf8(&mut encoded).as_bytes());
+                }
+                Some(byte) => {
+                    if let Some(buffer) = escaped.as_mut() {
+                        buffer.push(*byte);
+                    }
+                }
+            }
+            self.idx += 1;
+        }
+        let raw = &data[start..self.idx];
+        self.idx += 1;
+        let decoded = if let Some(buffer) = escaped.as_ref() {
+            str::from_utf8(buffer)
+        } else {
+            str::from_utf8(raw)
+        }
+        .map_err(|_| self.error("Invalid utf-8"))?;
+        Ok(PyString::new(self.py, decoded))
+    }
+
+    /// Reads `\uXXXX` escape (`self.idx` points to `u`)
+    fn hex(&mut self) -> Result<u32, String> {
+        let hex = self
+            .data
+            .get(self.idx + 1..self.idx + 5)
+            .and_then(|hex| str::from_utf8(hex).ok())
+            .and_then(|hex| u32::from_str_radix(hex, 16).ok())
+            .ok_or_else(|| self.error("Invalid unicode escape"))?;
+        self.idx += 4;
+        Ok(hex)
+    }
+
+    fn unicode(&mut self) -> Result<char, String> {
+        let high = self.hex()?;
+        let code = if (0xD800..0xDC00).contains(&high)
+            && self.data.get(self.idx + 1..self.idx + 3) == Some(&b"\\u"[..])
+        {
+            self.idx += 2;
+            let low = self.hex()?;
+            if !(0xDC00..0xE000).contains(&low) {
+                return Err(self.error("Invalid surrogate pair"));
+            }
+            0x10000 + ((high - 0xD800) << 10) + (low - 0xDC00)
+        } else {
+            high
+        };
+        // lone surrogates are replaced
+        Ok(std::char::from_u32(code).unwrap_or('\u{FFFD}'))
+    }
+}
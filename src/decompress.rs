@@ -0,0 +1,180 @@
+use super::{input::InputData, StreamsonError};
+use flate2::read::MultiGzDecoder;
+use pyo3::{class::PyIterProtocol, prelude::*, types::PyBytes};
+use std::{
+    io::{self, Cursor, Read},
+    sync::{
+        mpsc::{sync_channel, Receiver},
+        Mutex,
+    },
+    thread,
+};
+
+const GZIP_MAGIC: &[u8] = &[0x1f, 0x8b];
+const ZSTD_MAGIC: &[u8] = &[0x28, 0xb5, 0x2f, 0xfd];
+
+/// Compression of the input
+#[derive(Debug, Clone, Copy, PartialEq)]
+enum Compression {
+    /// Detected from the first bytes of the input
+    Auto,
+    /// Not compressed
+    Plain,
+    Gzip,
+    Zstd,
+}
+
+impl Compression {
+    fn from_name(name: &str) -> Result<Self, String> {
+        match name {
+            "auto" => Ok(Self::Auto),
+            "none" => Ok(Self::Plain),
+            "gzip" | "gz" => Ok(Self::Gzip),
+            "zstd" | "zst" => Ok(Self::Zstd),
+            _ => Err(format!("Unknown compression '{}'", name)),
+        }
+    }
+}
+
+/// Reads data from python file object
+///
+/// The GIL is held only while the file object is called.
+/// `read()` may return any object which supports the buffer protocol.
+struct PythonReader {
+    input_fd: PyObject,
+}
+
+impl Read for PythonReader {
+    fn read(&mut self, buf: &mut [u8]) -> io::Result<usize> {
+        Python::with_gil(|py| {
+            let data = self
+                .input_fd
+                .call_method1(py, "read", (buf.len(),))
+                .map_err(|err| io::Error::new(io::ErrorKind::Other, err.to_string()))?;
+            let data: InputData = data
+                .extract(py)
+                .map_err(|err| io::Error::new(io::ErrorKind::Other, err.to_string()))?;
+            let data = data.as_bytes();
+            let size = data.len().min(buf.len());
+            buf[..size].copy_from_slice(&data[..size]);
+            Ok(size)
+        })
+    }
+}
+
+/// Wraps the reader into a decoder of given compression
+fn decoder<R>(mut reader: R, compression: Compression) -> io::Result<Box<dyn Read>>
+where
+    R: Read + 'static,
+{
+    Ok(match compression {
+        Compression::Auto => {
+            let mut head = vec![];
+            (&mut reader)
+                .take(ZSTD_MAGIC.len() as u64)
+                .read_to_end(&mut head)?;
+            let detected = if head.starts_with(GZIP_MAGIC) {
+                Compression::Gzip
+            } else if head.starts_with(ZSTD_MAGIC) {
+                Compression::Zstd
+            } else {
+                Compression::Plain
+            };
+            // the head is read again by the decoder
+            let reader: Box<dyn Read> = Box::new(Cursor::new(head).chain(reader));
+            return decoder(reader, detected);
+        }
+        Compression::Plain => Box::new(reader),
+        Compression::Gzip => Box::new(MultiGzDecoder::new(reader)),
+        Compression::Zstd => Box::new(zstd::stream::read::Decoder::new(reader)?),
+    })
+}
+
+/// Fills the whole buffer unless the end of the input is reached
+fn read_chunk(reader: &mut dyn Read, buffer_size: usize) -> io::Result<Vec<u8>> {
+    let mut chunk = Vec::with_capacity(buffer_size);
+    reader.take(buffer_size as u64).read_to_end(&mut chunk)?;
+    Ok(chunk)
+}
+
+/// Decompresses data read from a python file object in a separate thread
+///
+/// Decompressed chunks are available via iteration.
+#[pyclass]
+pub struct Decompressor {
+    receiver: Mutex<Receiver<Result<Vec<u8>, String>>>,
+}
+
+#[pymethods]
+impl Decompressor {
+    /// Create instance of Decompressor
+    ///
+    /// # Arguments
+    /// * `input_fd` - python file object opened in binary mode
+    /// * `compression` - `gzip`, `zstd`, `none` or `auto` (detected from the first bytes of the input)
+    /// * `buffer_size` - size of decompressed chunks
+    /// * `read_ahead` - how many chunks can be decompressed before they are consumed
+    #[new]
+    #[args(
+        compression = "\"auto\"",
+        buffer_size = "1024 * 1024",
+        read_ahead = "4"
+    )]
+    pub fn new(
+        input_fd: PyObject,
+        compression: &str,
+        buffer_size: usize,
+        read_ahead: usize,
+    ) -> PyResult<Self> {
+        let compression = Compression::from_name(compression).map_err(StreamsonError::new_err)?;
+        let buffer_size = buffer_size.max(1);
+        let (sender, receiver) = sync_channel(read_ahead.max(1));
+        thread::spawn(move || {
+            let mut reader = match decoder(PythonReader { input_fd }, compression) {
+                Ok(reader) => reader,
+                Err(err) => {
+                    let _ = sender.send(Err(err.to_string()));
+                    return;
+                }
+            };
+            loop {
+                match read_chunk(&mut reader, buffer_size) {
+                    Ok(chunk) if chunk.is_empty() => return,
+                    Ok(chunk) => {
+                        if sender.send(Ok(chunk)).is_err() {
+                            // decompressor was dropped
+                            return;
+                        }
+                    }
+                    Err(err) => {
+                        let _ = sender.send(Err(err.to_string()));
+                        return;
+                    }
+                }
+            }
+        });
+        Ok(Self {
+            receiver: Mutex::new(receiver),
+        })
+    }
+}
+
+#[pyproto]
+impl PyIterProtocol for Decompressor {
+    fn __iter__(slf: PyRef<Self>) -> PyRef<Self> {
+        slf
+    }
+
+    fn __next__(slf: PyRef<Self>) -> PyResult<Option<PyObject>> {
+        let py = slf.py();
+        let receiver = &slf.receiver;
+        // the reader thread needs the GIL to read the input
+        let received = py.allow_threads(|| receiver.lock().unwrap().recv());
+        match received {
+            Ok(Ok(chunk)) => Ok(Some(PyBytes::new(py, &chunk).into())),
+            Ok(Err(err)) => Err(StreamsonError::new_err(err)),
+            // thread has finished
+            Err(_) => Ok(None),
+        }
+    }
+}
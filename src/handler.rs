@@ -5,6 +5,8 @@ pub mod indenter;
 pub mod indexer;
 pub mod output;
 pub mod python;
+pub mod python_batch;
+pub mod python_converter;
 pub mod regex;
 pub mod replace;
 pub mod shorten;
@@ -17,6 +19,8 @@ pub use indenter::IndenterHandler;
 pub use indexer::IndexerHandler;
 pub use output::{FileHandler, StdoutHandler};
 pub use python::PythonHandler;
+pub use python_batch::{EventBatch, PythonBatchHandler};
+pub use python_converter::PythonConverterHandler;
 pub use regex::RegexHandler;
 pub use replace::ReplaceHandler;
 pub use shorten::ShortenHandler;
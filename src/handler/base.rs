@@ -16,6 +16,26 @@ impl Default for BaseHandler {
     }
 }
 
+impl BaseHandler {
+    /// Handler which is passed to strategies
+    ///
+    /// Group containing a single handler is skipped, which removes only the lock of the group.
+    /// The handler keeps its own mutex, because streamson-lib strategies take handlers
+    /// as `Arc<Mutex<dyn Handler>>` (and python objects keep references to it).
+    pub fn strategy_handler(&self) -> Arc<Mutex<dyn Handler>> {
+        let single = {
+            let group = self.inner.lock().unwrap();
+            let subhandlers = group.subhandlers();
+            if subhandlers.len() == 1 {
+                Some(subhandlers[0].clone())
+            } else {
+                None
+            }
+        };
+        single.unwrap_or_else(|| -> Arc<Mutex<dyn Handler>> { self.inner.clone() })
+    }
+}
+
 #[pymethods]
 impl BaseHandler {
     /// Create instance of CombinatorHandler
@@ -1,28 +1,314 @@
 use super::BaseHandler;
-use pyo3::prelude::*;
-use std::sync::{Arc, Mutex};
-use streamson_lib::handler;
+use crate::StreamsonError;
+use pyo3::{prelude::*, types::PyBytes};
+use std::{
+    any::Any,
+    collections::VecDeque,
+    convert::TryInto,
+    env, fs,
+    io::{self, BufWriter, Read, Seek, SeekFrom, Write},
+    path::PathBuf,
+    process,
+    sync::{
+        atomic::{AtomicUsize, Ordering},
+        Arc, Mutex,
+    },
+};
+use streamson_lib::{
+    error,
+    handler::{self, Handler},
+    path::Path,
+    streamer,
+};
 
+type Record = (Option<String>, Vec<u8>);
+
+/// Marks a record without a path in the spill file
+const NO_PATH: u32 = u32::MAX;
+
+static SPILL_COUNTER: AtomicUsize = AtomicUsize::new(0);
+
+/// Temporary append-only file where the oldest records are moved
+struct SpillFile {
+    path: PathBuf,
+    writer: BufWriter<fs::File>,
+    reader: fs::File,
+    /// Number of records in the file which were not read yet
+    count: usize,
+}
+
+impl SpillFile {
+    fn new(dir: Option<PathBuf>) -> io::Result<Self> {
+        let path = dir.unwrap_or_else(env::temp_dir).join(format!(
+            "streamson-buffer-{}-{}.spill",
+            process::id(),
+            SPILL_COUNTER.fetch_add(1, Ordering::Relaxed)
+        ));
+        let writer = fs::OpenOptions::new()
+            .append(true)
+            .create_new(true)
+            .open(&path)?;
+        let reader = fs::File::open(&path)?;
+        Ok(Self {
+            path,
+            writer: BufWriter::new(writer),
+            reader,
+            count: 0,
+        })
+    }
+
+    fn push(&mut self, (path, data): Record) -> io::Result<()> {
+        match path {
+            Some(path) => {
+                let len: u32 = path
+                    .len()
+                    .try_into()
+                    .map_err(|_| io::Error::new(io::ErrorKind::InvalidInput, "Path too long"))?;
+                self.writer.write_all(&len.to_le_bytes())?;
+                self.writer.write_all(path.as_bytes())?;
+            }
+            None => self.writer.write_all(&NO_PATH.to_le_bytes())?,
+        }
+        self.writer.write_all(&(data.len() as u64).to_le_bytes())?;
+        self.writer.write_all(&data)?;
+        self.count += 1;
+        Ok(())
+    }
+
+    fn pop(&mut self) -> io::Result<Option<Record>> {
+        if self.count == 0 {
+            return Ok(None);
+        }
+        self.writer.flush()?;
+
+        let mut len = [0u8; 4];
+        self.reader.read_exact(&mut len)?;
+        let path = match u32::from_le_bytes(len) {
+            NO_PATH => None,
+            len => {
+                let mut path = vec![0u8; len as usize];
+                self.reader.read_exact(&mut path)?;
+                Some(
+                    String::from_utf8(path)
+                        .map_err(|err| io::Error::new(io::ErrorKind::InvalidData, err))?,
+                )
+            }
+        };
+        let mut len = [0u8; 8];
+        self.reader.read_exact(&mut len)?;
+        let mut data = vec![0u8; u64::from_le_bytes(len) as usize];
+        self.reader.read_exact(&mut data)?;
+
+        self.count -= 1;
+        if self.count == 0 {
+            // everything was read, reuse the disk space
+            self.writer.get_ref().set_len(0)?;
+            self.reader.seek(SeekFrom::Start(0))?;
+        }
+        Ok(Some((path, data)))
+    }
+}
+
+impl Drop for SpillFile {
+    fn drop(&mut self) {
+        let _ = fs::remove_file(&self.path);
+    }
+}
+
+/// Buffer with a limit of bytes which are kept in memory
+///
+/// Records are kept in the order in which they were matched.
+/// Spilled records are always older than the records in memory.
+pub struct BufferInnerHandler {
+    buffer: handler::Buffer,
+    records: VecDeque<Record>,
+    /// Number of data bytes in `records`
+    buffered_size: usize,
+    max_buffered: Option<usize>,
+    spill: bool,
+    spill_dir: Option<PathBuf>,
+    spill_file: Option<SpillFile>,
+}
+
+impl BufferInnerHandler {
+    /// Moves finished records from the underlying buffer
+    fn store(&mut self) -> io::Result<()> {
+        while let Some(record) = self.buffer.pop() {
+            self.buffered_size += record.1.len();
+            self.records.push_back(record);
+        }
+        if !self.spill {
+            return Ok(());
+        }
+        if let Some(max_buffered) = self.max_buffered {
+            while self.buffered_size > max_buffered {
+                let record = if let Some(record) = self.records.pop_front() {
+                    record
+                } else {
+                    break;
+                };
+                self.buffered_size -= record.1.len();
+                if self.spill_file.is_none() {
+                    self.spill_file = Some(SpillFile::new(self.spill_dir.clone())?);
+                }
+                self.spill_file.as_mut().unwrap().push(record)?;
+            }
+        }
+        Ok(())
+    }
+
+    /// Removes the oldest record
+    pub fn pop(&mut self) -> io::Result<Option<Record>> {
+        if let Some(spill_file) = self.spill_file.as_mut() {
+            if let Some(record) = spill_file.pop()? {
+                return Ok(Some(record));
+            }
+        }
+        Ok(self.records.pop_front().map(|record| {
+            self.buffered_size -= record.1.len();
+            record
+        }))
+    }
+
+    /// Number of bytes which can be kept in memory before the limit is reached
+    ///
+    /// `None` when there is no limit or the records are spilled.
+    pub fn space_left(&self) -> Option<usize> {
+        match self.max_buffered {
+            Some(max_buffered) if !self.spill => {
+                Some(max_buffered.saturating_sub(self.buffered_size))
+            }
+            _ => None,
+        }
+    }
+
+    /// Checks whether the records in memory reached the limit (spilling is not used)
+    pub fn is_full(&self) -> bool {
+        self.space_left() == Some(0)
+    }
+}
+
+/// Finds buffers within the handler which limit the records kept in memory without spilling
+pub fn limited_buffers(handler: &BaseHandler) -> Vec<Arc<Mutex<dyn Handler>>> {
+    handler
+        .inner
+        .lock()
+        .unwrap()
+        .subhandlers()
+        .iter()
+        .filter(|subhandler| space_left(subhandler).is_some())
+        .cloned()
+        .collect()
+}
+
+/// Number of bytes which can be kept in memory by the buffer
+fn space_left(buffer: &Arc<Mutex<dyn Handler>>) -> Option<usize> {
+    let buffer = buffer.lock().unwrap();
+    // the lock guard has to outlive the downcast reference
+    let space_left = buffer
+        .as_any()
+        .downcast_ref::<BufferInnerHandler>()
+        .and_then(BufferInnerHandler::space_left);
+    space_left
+}
+
+/// Number of bytes which can be kept in memory before the first of the buffers is full
+///
+/// # Arguments
+/// * `buffers` - buffers found by `limited_buffers`
+pub fn min_space_left(buffers: &[Arc<Mutex<dyn Handler>>]) -> Option<usize> {
+    buffers.iter().filter_map(space_left).min()
+}
+
+impl Handler for BufferInnerHandler {
+    fn start(
+        &mut self,
+        path: &Path,
+        matcher_idx: usize,
+        token: streamer::Token,
+    ) -> Result<Option<Vec<u8>>, error::Handler> {
+        self.buffer.start(path, matcher_idx, token)
+    }
+
+    fn feed(&mut self, data: &[u8], matcher_idx: usize) -> Result<Option<Vec<u8>>, error::Handler> {
+        self.buffer.feed(data, matcher_idx)
+    }
+
+    fn end(
+        &mut self,
+        path: &Path,
+        matcher_idx: usize,
+        token: streamer::Token,
+    ) -> Result<Option<Vec<u8>>, error::Handler> {
+        let result = self.buffer.end(path, matcher_idx, token)?;
+        self.store()
+            .map_err(|err| error::Handler::new(format!("Failed to spill records: {}", err)))?;
+        Ok(result)
+    }
+
+    fn as_any(&self) -> &dyn Any {
+        self
+    }
+}
+
+/// Keeps matched records until they are removed by `pop_front`
+///
+/// Without spilling `max_buffered` is enforced by `Trigger.process_until_full`,
+/// which stops feeding the input once the buffer is full and returns how much
+/// of the input was processed. The limit can be exceeded only by the last finished
+/// record (use `max_size` to limit it). Other ways of processing check the limit
+/// only between chunks (see `is_full`).
 #[pyclass(extends=BaseHandler)]
 #[derive(Clone)]
 pub struct BufferHandler {
-    pub buffer_inner: Arc<Mutex<handler::Buffer>>,
+    pub buffer_inner: Arc<Mutex<BufferInnerHandler>>,
+    as_list: bool,
 }
 
 #[pymethods]
 impl BufferHandler {
     /// Create instance of Buffer handler
+    ///
+    /// # Arguments
+    /// * `use_path` - should path be stored along with the data
+    /// * `max_size` - max size of a single buffered record
+    /// * `as_list` - return data as a list of ints instead of bytes (old behaviour)
+    /// * `max_buffered` - limit of bytes of records kept in memory (see above)
+    /// * `spill` - move the oldest records to a temporary file when `max_buffered` is exceeded
+    ///             (otherwise `Trigger.process_until_full` stops feeding the input)
+    /// * `spill_dir` - directory of the temporary file (system temporary directory by default)
     #[new]
-    #[args(use_path = "true", max_size = "None")]
-    pub fn new(use_path: bool, max_size: Option<usize>) -> (Self, BaseHandler) {
-        let buffer_inner = Arc::new(Mutex::new(
-            handler::Buffer::new()
+    #[args(
+        use_path = "true",
+        max_size = "None",
+        as_list = "false",
+        max_buffered = "None",
+        spill = "false",
+        spill_dir = "None"
+    )]
+    pub fn new(
+        use_path: bool,
+        max_size: Option<usize>,
+        as_list: bool,
+        max_buffered: Option<usize>,
+        spill: bool,
+        spill_dir: Option<String>,
+    ) -> (Self, BaseHandler) {
+        let buffer_inner = Arc::new(Mutex::new(BufferInnerHandler {
+            buffer: handler::Buffer::new()
                 .set_use_path(use_path)
                 .set_max_buffer_size(max_size),
-        ));
+            records: VecDeque::new(),
+            buffered_size: 0,
+            max_buffered,
+            spill,
+            spill_dir: spill_dir.map(PathBuf::from),
+            spill_file: None,
+        }));
         (
             Self {
                 buffer_inner: buffer_inner.clone(),
+                as_list,
             },
             BaseHandler {
                 inner: Arc::new(Mutex::new(handler::Group::new().add_handler(buffer_inner))),
@@ -31,7 +317,34 @@ impl BufferHandler {
     }
 
     /// Remove first element from the buffer
-    pub fn pop_front(&mut self) -> Option<(Option<String>, Vec<u8>)> {
-        self.buffer_inner.lock().unwrap().pop()
+    pub fn pop_front(&mut self, py: Python) -> PyResult<Option<(Option<String>, PyObject)>> {
+        let as_list = self.as_list;
+        let record = self
+            .buffer_inner
+            .lock()
+            .unwrap()
+            .pop()
+            .map_err(|err| StreamsonError::new_err(err.to_string()))?;
+        Ok(record.map(|(path, data)| {
+            let data: PyObject = if as_list {
+                data.into_py(py)
+            } else {
+                PyBytes::new(py, &data).into()
+            };
+            (path, data)
+        }))
+    }
+
+    /// Checks whether records kept in memory reached `max_buffered` (always false when spilling)
+    ///
+    /// Feeding of the input should be paused until some records are removed.
+    pub fn is_full(&self) -> bool {
+        self.buffer_inner.lock().unwrap().is_full()
+    }
+
+    /// Number of bytes of records kept in memory
+    #[getter]
+    pub fn buffered_size(&self) -> usize {
+        self.buffer_inner.lock().unwrap().buffered_size
     }
 }
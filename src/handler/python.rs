@@ -1,4 +1,5 @@
 use super::{BaseHandler, PythonToken};
+use crate::path::PathCache;
 use pyo3::{prelude::*, types::PyBytes};
 use std::{
     any::Any,
@@ -15,6 +16,8 @@ pub struct PythonInnerHandler {
     end_callable: PyObject,
     require_path: bool,
     is_converter: bool,
+    as_list: bool,
+    path_cache: PathCache,
 }
 
 impl PythonInnerHandler {
@@ -24,6 +27,7 @@ impl PythonInnerHandler {
         end_callable: PyObject,
         require_path: bool,
         is_converter: bool,
+        as_list: bool,
     ) -> Self {
         Self {
             start_callable,
@@ -31,6 +35,8 @@ impl PythonInnerHandler {
             end_callable,
             require_path,
             is_converter,
+            as_list,
+            path_cache: PathCache::default(),
         }
     }
 }
@@ -50,7 +56,7 @@ impl handler::Handler for PythonInnerHandler {
                 py,
                 (
                     if self.require_path {
-                        Some(path.to_string())
+                        Some(self.path_cache.to_object(py, path))
                     } else {
                         None
                     },
@@ -73,9 +79,14 @@ impl handler::Handler for PythonInnerHandler {
     fn feed(&mut self, data: &[u8], matcher_idx: usize) -> Result<Option<Vec<u8>>, error::Handler> {
         let gil = Python::acquire_gil();
         let py = gil.python();
+        let data: PyObject = if self.as_list {
+            data.to_vec().into_py(py)
+        } else {
+            PyBytes::new(py, data).into()
+        };
         let res = self
             .feed_callable
-            .call1(py, (data.to_vec(), matcher_idx))
+            .call1(py, (data, matcher_idx))
             .map_err(|e| {
                 error::Handler::new(format!("Failed to call feed function: {}", e.to_string()))
             })?;
@@ -102,7 +113,7 @@ impl handler::Handler for PythonInnerHandler {
                 py,
                 (
                     if self.require_path {
-                        Some(path.to_string())
+                        Some(self.path_cache.to_object(py, path))
                     } else {
                         None
                     },
@@ -146,13 +157,17 @@ impl PythonHandler {
     /// * `feed_callable` - python callable (2 arguments)
     /// * `end_callable` - python callable (3 arguments)
     /// * `require_path` - should path be passed to handler
+    /// * `is_converter` - does the handler convert data
+    /// * `as_list` - pass data to `feed_callable` as a list of ints instead of bytes (old behaviour)
     #[new]
+    #[args(as_list = "false")]
     pub fn new(
         start_callable: PyObject,
         feed_callable: PyObject,
         end_callable: PyObject,
         require_path: bool,
         is_converter: bool,
+        as_list: bool,
     ) -> (Self, BaseHandler) {
         let python_inner = Arc::new(Mutex::new(PythonInnerHandler::new(
             start_callable,
@@ -160,6 +175,7 @@ impl PythonHandler {
             end_callable,
             require_path,
             is_converter,
+            as_list,
         )));
         (
             Self {
@@ -0,0 +1,279 @@
+use super::BaseHandler;
+use crate::path::PathCache;
+use pyo3::{
+    class::PySequenceProtocol,
+    prelude::*,
+    types::{PyBytes, PyString},
+};
+use std::{
+    any::Any,
+    mem,
+    sync::{Arc, Mutex},
+};
+use streamson_lib::{error, handler, path::Path, streamer};
+
+/// Events collected while a single input chunk is processed
+#[derive(Debug, Default)]
+struct Events {
+    kinds: Vec<&'static str>,
+    /// Indexes of the event paths in `path_ends`
+    paths: Vec<Option<usize>>,
+    /// Distinct consecutive paths joined together
+    path_data: String,
+    /// End offsets of the paths in `path_data`
+    path_ends: Vec<usize>,
+    matcher_indices: Vec<usize>,
+    data: Vec<u8>,
+    ends: Vec<usize>,
+}
+
+impl Events {
+    /// Stores the path of an event
+    ///
+    /// # Arguments
+    /// * `path` - rendered path
+    /// * `changed` - whether the path differs from the path of the previous event
+    ///
+    /// # Returns
+    /// Index of the stored path
+    fn path(&mut self, path: &str, changed: bool) -> usize {
+        if changed || self.path_ends.is_empty() {
+            self.path_data.push_str(path);
+            self.path_ends.push(self.path_data.len());
+        }
+        self.path_ends.len() - 1
+    }
+
+    fn push(&mut self, kind: &'static str, path: Option<usize>, matcher_idx: usize, data: &[u8]) {
+        self.kinds.push(kind);
+        self.paths.push(path);
+        self.matcher_indices.push(matcher_idx);
+        self.data.extend(data);
+        self.ends.push(self.data.len());
+    }
+}
+
+/// Events waiting to be passed to the python callable
+pub struct EventQueue {
+    callable: PyObject,
+    events: Mutex<Events>,
+}
+
+impl EventQueue {
+    /// Passes collected events to the python callable
+    pub fn flush(&self, py: Python) -> PyResult<()> {
+        let events = mem::take(&mut *self.events.lock().unwrap());
+        if events.kinds.is_empty() {
+            return Ok(());
+        }
+        let mut offsets = Vec::with_capacity(events.ends.len() + 1);
+        offsets.push(0);
+        offsets.extend(events.ends);
+        // a single python string is created for each distinct path
+        let mut path_start = 0;
+        let unique: Vec<PyObject> = events
+            .path_ends
+            .iter()
+            .map(|&path_end| {
+                let path: PyObject =
+                    PyString::new(py, &events.path_data[path_start..path_end]).into();
+                path_start = path_end;
+                path
+            })
+            .collect();
+        let batch = EventBatch {
+            kinds: events.kinds,
+            paths: events
+                .paths
+                .iter()
+                .map(|idx| idx.map(|idx| unique[idx].clone_ref(py)))
+                .collect(),
+            matcher_indices: events.matcher_indices,
+            data: PyBytes::new(py, &events.data).into(),
+            offsets,
+        };
+        self.callable.call1(py, (batch,))?;
+        Ok(())
+    }
+}
+
+/// Finds queues of batch handlers within the handler
+pub fn event_queues(handler: &BaseHandler) -> Vec<Arc<EventQueue>> {
+    handler
+        .inner
+        .lock()
+        .unwrap()
+        .subhandlers()
+        .iter()
+        .filter_map(|subhandler| {
+            let subhandler = subhandler.lock().unwrap();
+            // the lock guard has to outlive the downcast reference
+            let queue = subhandler
+                .as_any()
+                .downcast_ref::<PythonBatchInnerHandler>()
+                .map(|batch_handler| batch_handler.queue.clone());
+            queue
+        })
+        .collect()
+}
+
+/// Streamson handler which collects events instead of calling python
+pub struct PythonBatchInnerHandler {
+    queue: Arc<EventQueue>,
+    require_path: bool,
+    path_cache: PathCache,
+}
+
+impl PythonBatchInnerHandler {
+    fn push(&mut self, kind: &'static str, path: Option<&Path>, matcher_idx: usize, data: &[u8]) {
+        let mut events = self.queue.events.lock().unwrap();
+        let path = match path {
+            Some(path) if self.require_path => {
+                let (rendered, changed) = self.path_cache.render(path);
+                Some(events.path(rendered, changed))
+            }
+            _ => None,
+        };
+        events.push(kind, path, matcher_idx, data);
+    }
+}
+
+impl handler::Handler for PythonBatchInnerHandler {
+    fn start(
+        &mut self,
+        path: &Path,
+        matcher_idx: usize,
+        _token: streamer::Token,
+    ) -> Result<Option<Vec<u8>>, error::Handler> {
+        self.push("start", Some(path), matcher_idx, &[]);
+        Ok(None)
+    }
+
+    fn feed(&mut self, data: &[u8], matcher_idx: usize) -> Result<Option<Vec<u8>>, error::Handler> {
+        self.push("feed", None, matcher_idx, data);
+        Ok(None)
+    }
+
+    fn end(
+        &mut self,
+        path: &Path,
+        matcher_idx: usize,
+        _token: streamer::Token,
+    ) -> Result<Option<Vec<u8>>, error::Handler> {
+        self.push("end", Some(path), matcher_idx, &[]);
+        Ok(None)
+    }
+
+    fn as_any(&self) -> &dyn Any {
+        self
+    }
+
+    fn is_converter(&self) -> bool {
+        false
+    }
+}
+
+/// Handler which passes all events of an input chunk to a single python call
+///
+/// The callable gets an `EventBatch` once the strategy finishes
+/// processing of the chunk. It can only observe the data (it is not a converter).
+#[pyclass(extends=BaseHandler)]
+#[derive(Clone)]
+pub struct PythonBatchHandler {
+    queue: Arc<EventQueue>,
+}
+
+#[pymethods]
+impl PythonBatchHandler {
+    /// Create instance of Python batch handler
+    ///
+    /// # Arguments
+    /// * `callable` - python callable (1 argument - `EventBatch`)
+    /// * `require_path` - should path be passed to handler
+    #[new]
+    #[args(require_path = "true")]
+    pub fn new(callable: PyObject, require_path: bool) -> (Self, BaseHandler) {
+        let queue = Arc::new(EventQueue {
+            callable,
+            events: Mutex::new(Events::default()),
+        });
+        let batch_inner = Arc::new(Mutex::new(PythonBatchInnerHandler {
+            queue: queue.clone(),
+            require_path,
+            path_cache: PathCache::default(),
+        }));
+        (
+            Self { queue },
+            BaseHandler {
+                inner: Arc::new(Mutex::new(handler::Group::new().add_handler(batch_inner))),
+            },
+        )
+    }
+
+    /// Passes events which were not passed yet to the callable
+    ///
+    /// Strategies flush the events automatically after each processed chunk.
+    pub fn flush(&self, py: Python) -> PyResult<()> {
+        self.queue.flush(py)
+    }
+}
+
+/// Events of a batch handler
+///
+/// Event `n` has kind `kinds[n]` (`start`, `feed` or `end`), path `paths[n]`
+/// (only for `start` and `end`), matcher index `matcher_indices[n]`
+/// and data `data[offsets[n]:offsets[n + 1]]` (only for `feed`).
+#[pyclass]
+pub struct EventBatch {
+    kinds: Vec<&'static str>,
+    paths: Vec<Option<PyObject>>,
+    matcher_indices: Vec<usize>,
+    data: PyObject,
+    offsets: Vec<usize>,
+}
+
+#[pymethods]
+impl EventBatch {
+    /// Kinds of the events
+    #[getter]
+    pub fn kinds(&self) -> Vec<&'static str> {
+        self.kinds.clone()
+    }
+
+    /// Paths of the events
+    ///
+    /// Events with the same path share the python string.
+    #[getter]
+    pub fn paths(&self, py: Python) -> Vec<Option<PyObject>> {
+        self.paths
+            .iter()
+            .map(|path| path.as_ref().map(|path| path.clone_ref(py)))
+            .collect()
+    }
+
+    /// Indexes of matchers which triggered the events
+    #[getter]
+    pub fn matcher_indices(&self) -> Vec<usize> {
+        self.matcher_indices.clone()
+    }
+
+    /// Data of all events
+    #[getter]
+    pub fn data(&self, py: Python) -> PyObject {
+        self.data.clone_ref(py)
+    }
+
+    /// Offsets of events in data (one more item than the event count)
+    #[getter]
+    pub fn offsets(&self) -> Vec<usize> {
+        self.offsets.clone()
+    }
+}
+
+#[pyproto]
+impl PySequenceProtocol for EventBatch {
+    /// Number of events in the batch
+    fn __len__(&self) -> usize {
+        self.kinds.len()
+    }
+}
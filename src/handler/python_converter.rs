@@ -0,0 +1,129 @@
+use super::{python::PythonInnerHandler, BaseHandler, PythonHandler};
+use pyo3::{prelude::*, types::PyBytes, PyClassInitializer};
+use std::{
+    any::Any,
+    mem,
+    sync::{Arc, Mutex},
+};
+use streamson_lib::{error, handler, path::Path, streamer};
+
+/// Streamson handler which buffers matched data and converts them using python callable
+pub struct PythonConverterInnerHandler {
+    converter_function: PyObject,
+    buffer: Vec<u8>,
+}
+
+impl handler::Handler for PythonConverterInnerHandler {
+    fn start(
+        &mut self,
+        _path: &Path,
+        _matcher_idx: usize,
+        _token: streamer::Token,
+    ) -> Result<Option<Vec<u8>>, error::Handler> {
+        self.buffer.clear();
+        Ok(None)
+    }
+
+    fn feed(
+        &mut self,
+        data: &[u8],
+        _matcher_idx: usize,
+    ) -> Result<Option<Vec<u8>>, error::Handler> {
+        self.buffer.extend(data);
+        Ok(None)
+    }
+
+    fn end(
+        &mut self,
+        _path: &Path,
+        _matcher_idx: usize,
+        _token: streamer::Token,
+    ) -> Result<Option<Vec<u8>>, error::Handler> {
+        let data = mem::take(&mut self.buffer);
+        let gil = Python::acquire_gil();
+        let py = gil.python();
+        let res = self
+            .converter_function
+            .call1(py, (PyBytes::new(py, &data),))
+            .map_err(|e| {
+                error::Handler::new(format!("Failed to call converter function: {}", e))
+            })?;
+        let bytes = res
+            .cast_as::<PyBytes>(py)
+            .map_err(|_| error::Handler::new("Function does not return bytes."))?;
+        Ok(Some(bytes.as_bytes().to_vec()))
+    }
+
+    fn as_any(&self) -> &dyn Any {
+        self
+    }
+
+    fn is_converter(&self) -> bool {
+        true
+    }
+}
+
+/// Buffers data of each match and performs conversion when the match terminates
+///
+/// It remains a `PythonHandler`, but the data are buffered in Rust
+/// and python is called only once for each match.
+#[pyclass(extends=PythonHandler)]
+#[derive(Clone)]
+pub struct PythonConverterHandler {
+    converter_inner: Arc<Mutex<PythonConverterInnerHandler>>,
+}
+
+#[pymethods]
+impl PythonConverterHandler {
+    /// Create instance of Python converter handler
+    ///
+    /// # Arguments
+    /// * `converter_function` - python callable (bytes -> bytes)
+    /// * `require_path` - kept for compatibility (the path is not passed to the converter)
+    #[new]
+    #[args(require_path = "true")]
+    pub fn new(
+        py: Python,
+        converter_function: PyObject,
+        require_path: bool,
+    ) -> PyClassInitializer<Self> {
+        let converter_inner = Arc::new(Mutex::new(PythonConverterInnerHandler {
+            converter_function,
+            buffer: vec![],
+        }));
+        // callables of the python handler are never called,
+        // only the converter is passed to the strategies
+        let python_inner = Arc::new(Mutex::new(PythonInnerHandler::new(
+            py.None(),
+            py.None(),
+            py.None(),
+            require_path,
+            true,
+            false,
+        )));
+        PyClassInitializer::from(BaseHandler {
+            inner: Arc::new(Mutex::new(
+                handler::Group::new().add_handler(converter_inner.clone()),
+            )),
+        })
+        .add_subclass(PythonHandler { python_inner })
+        .add_subclass(Self { converter_inner })
+    }
+
+    /// Function used to convert matched data
+    #[getter]
+    pub fn converter_function(&self, py: Python) -> PyObject {
+        self.converter_inner
+            .lock()
+            .unwrap()
+            .converter_function
+            .clone_ref(py)
+    }
+
+    /// Data of the current match (a list with a single bytes item)
+    #[getter]
+    pub fn buffer(&self, py: Python) -> Vec<PyObject> {
+        let buffer = &self.converter_inner.lock().unwrap().buffer;
+        vec![PyBytes::new(py, buffer).into()]
+    }
+}
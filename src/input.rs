@@ -0,0 +1,34 @@
+use crate::StreamsonError;
+use pyo3::{buffer::PyBuffer, prelude::*};
+use std::slice;
+
+/// Input data passed from python
+///
+/// Accepts any object which supports the buffer protocol
+/// (`bytes`, `bytearray`, `memoryview`, `mmap`, ...)
+/// so no copy is required before the data are processed.
+pub struct InputData {
+    buffer: PyBuffer<u8>,
+}
+
+impl<'source> FromPyObject<'source> for InputData {
+    fn extract(ob: &'source PyAny) -> PyResult<Self> {
+        let buffer = PyBuffer::get(ob)?;
+        if !buffer.is_c_contiguous() {
+            return Err(StreamsonError::new_err("Input data are not contiguous"));
+        }
+        Ok(Self { buffer })
+    }
+}
+
+impl InputData {
+    /// Returns data of the buffer
+    pub fn as_bytes(&self) -> &[u8] {
+        let len = self.buffer.len_bytes();
+        if len == 0 {
+            return &[];
+        }
+        // buffer is contiguous and it is kept alive as long as self
+        unsafe { slice::from_raw_parts(self.buffer.buf_ptr() as *const u8, len) }
+    }
+}
@@ -1,16 +1,38 @@
+pub mod batch;
+pub mod decode;
+pub mod decompress;
 pub mod handler;
+pub mod input;
+pub mod path;
+pub mod pattern;
+pub mod sink;
+pub mod skip;
+pub mod split;
+pub mod stats;
 pub mod strategy;
 
+pub use batch::Batch;
+pub use decompress::Decompressor;
 pub use handler::{
-    AnalyserHandler, BaseHandler, BufferHandler, FileHandler, IndenterHandler, IndexerHandler,
-    PythonHandler, PythonToken, RegexHandler, ReplaceHandler, ShortenHandler, StdoutHandler,
-    UnstringifyHandler,
+    AnalyserHandler, BaseHandler, BufferHandler, EventBatch, FileHandler, IndenterHandler,
+    IndexerHandler, PythonBatchHandler, PythonConverterHandler, PythonHandler, PythonToken,
+    RegexHandler, ReplaceHandler, ShortenHandler, StdoutHandler, UnstringifyHandler,
 };
-pub use strategy::{All, Convert, Extract, Filter, PythonStrategy, Trigger};
+pub use sink::Sink;
+pub use strategy::{All, Convert, Extract, Filter, PythonStrategy, SharedMatcher, Trigger};
 
-use pyo3::{class::PyNumberProtocol, create_exception, exceptions, prelude::*, types::PyBytes};
-use std::str::FromStr;
-use streamson_lib::{matcher, strategy::Output};
+use input::InputData;
+use path::PathCache;
+use pyo3::{
+    class::PyNumberProtocol, create_exception, exceptions, prelude::*, types::PyBytes,
+    wrap_pyfunction,
+};
+use split::Shard;
+use std::{
+    str::FromStr,
+    sync::{Arc, Mutex},
+};
+use streamson_lib::{matcher, strategy::Output, Handler};
 
 create_exception!(streamson, StreamsonError, exceptions::PyValueError);
 
@@ -19,6 +41,7 @@ create_exception!(streamson, StreamsonError, exceptions::PyValueError);
 #[derive(Debug)]
 pub struct RustMatcher {
     inner: matcher::Combinator,
+    trie: Option<pattern::Trie>,
 }
 
 #[pymethods]
@@ -35,6 +58,7 @@ impl RustMatcher {
                 matcher::Simple::from_str(&path)
                     .map_err(|e| StreamsonError::new_err(e.to_string()))?,
             ),
+            trie: None,
         })
     }
 
@@ -49,6 +73,7 @@ impl RustMatcher {
                 matcher::Depth::from_str(&depth_str)
                     .map_err(|e| StreamsonError::new_err(e.to_string()))?,
             ),
+            trie: None,
         })
     }
 
@@ -60,8 +85,57 @@ impl RustMatcher {
                 matcher::Regex::from_str(&regex)
                     .map_err(|e| StreamsonError::new_err(e.to_string()))?,
             ),
+            trie: None,
+        })
+    }
+
+    /// Create a matcher from several simple paths compiled into a prefix tree
+    ///
+    /// # Arguments
+    /// * `paths` - paths to match (only keys, indexes and `{}`, `[]` are supported)
+    #[staticmethod]
+    pub fn simple_set(paths: Vec<String>) -> PyResult<Self> {
+        let patterns: Result<Vec<_>, _> = paths.iter().map(|path| pattern::parse(path)).collect();
+        let trie = pattern::Trie::new(patterns.map_err(StreamsonError::new_err)?);
+        Ok(Self {
+            inner: matcher::Combinator::new(trie.clone()),
+            trie: Some(trie),
         })
     }
+
+    /// Returns indexes of paths of `simple_set` matcher which match given path
+    ///
+    /// # Arguments
+    /// * `path` - concrete path (e.g. `{"users"}[0]`)
+    pub fn match_indices(&self, path: &str) -> PyResult<Vec<usize>> {
+        let trie = self
+            .trie
+            .as_ref()
+            .ok_or_else(|| StreamsonError::new_err("Matcher is not a simple set"))?;
+        let path = pattern::parse(path).map_err(StreamsonError::new_err)?;
+        trie.match_indices(&path).map_err(StreamsonError::new_err)
+    }
+}
+
+impl RustMatcher {
+    /// Matcher and handler which are passed to strategies
+    ///
+    /// Handler of a `simple_set` matcher gets the index of the matched path as `matcher_idx`.
+    pub fn strategy_matcher(
+        &self,
+        handler: Option<Arc<Mutex<dyn Handler>>>,
+    ) -> (SharedMatcher, Option<Arc<Mutex<dyn Handler>>>) {
+        match (self.trie.as_ref(), handler) {
+            (Some(trie), Some(handler)) => {
+                let (matcher, handler) = pattern::attribute(trie, handler);
+                (
+                    SharedMatcher::new(matcher::Combinator::new(matcher)),
+                    Some(handler),
+                )
+            }
+            (_, handler) => (SharedMatcher::new(self.inner.clone()), handler),
+        }
+    }
 }
 
 #[pyproto]
@@ -70,6 +144,7 @@ impl PyNumberProtocol for RustMatcher {
     fn __invert__(&self) -> Self {
         Self {
             inner: !self.inner.clone(),
+            trie: None,
         }
     }
 
@@ -77,6 +152,7 @@ impl PyNumberProtocol for RustMatcher {
     fn __or__(lhs: PyRef<'p, Self>, rhs: PyRef<'p, Self>) -> Self {
         Self {
             inner: lhs.inner.clone() | rhs.inner.clone(),
+            trie: None,
         }
     }
 
@@ -84,32 +160,51 @@ impl PyNumberProtocol for RustMatcher {
     fn __and__(lhs: PyRef<'p, Self>, rhs: PyRef<'p, Self>) -> Self {
         Self {
             inner: lhs.inner.clone() & rhs.inner.clone(),
+            trie: None,
         }
     }
 }
 
-pub type PythonOutput = Option<(Option<String>, Option<PyObject>)>;
+pub type PythonOutput = Option<(Option<PyObject>, Option<PyObject>)>;
 
-fn convert_output(output: Output) -> PythonOutput {
+fn convert_output(py: Python, output: Output, path_cache: &mut PathCache) -> PythonOutput {
     match output {
-        Output::Start(path) => Some((path.map(|path| path.to_string()), None)),
-        Output::Data(data) => {
-            let gil = Python::acquire_gil();
-            let py = gil.python();
-            Some((None, Some(PyBytes::new(py, &data).into())))
-        }
+        Output::Start(path) => Some((path.map(|path| path_cache.to_object(py, &path)), None)),
+        Output::Data(data) => Some((None, Some(PyBytes::new(py, &data).into()))),
         Output::End => None,
     }
 }
 
+/// Splits the top-level array into shards containing whole elements
+///
+/// The GIL is released while the input is scanned.
+///
+/// # Arguments
+/// * `data` - input data (object which supports buffer protocol)
+/// * `shard_size` - approximate size of a shard
+///
+/// # Returns
+/// List of (start, end, index of the first element)
+#[pyfunction]
+fn split_array(py: Python, data: InputData, shard_size: usize) -> PyResult<Vec<Shard>> {
+    let data = data.as_bytes();
+    py.allow_threads(|| split::split_array(data, shard_size.max(1)))
+        .map_err(StreamsonError::new_err)
+}
+
 /// This module is a python module implemented in Rust.
 #[pymodule]
 fn streamson(_py: Python, m: &PyModule) -> PyResult<()> {
+    m.add("__version__", env!("CARGO_PKG_VERSION"))?;
+
     m.add_class::<All>()?;
+    m.add_class::<Batch>()?;
     m.add_class::<Convert>()?;
+    m.add_class::<Decompressor>()?;
     m.add_class::<Extract>()?;
     m.add_class::<Filter>()?;
     m.add_class::<RustMatcher>()?;
+    m.add_class::<Sink>()?;
     m.add_class::<Trigger>()?;
     m.add_class::<AnalyserHandler>()?;
     m.add_class::<FileHandler>()?;
@@ -119,6 +214,9 @@ fn streamson(_py: Python, m: &PyModule) -> PyResult<()> {
     m.add_class::<IndexerHandler>()?;
     m.add_class::<IndenterHandler>()?;
     m.add_class::<PythonHandler>()?;
+    m.add_class::<PythonBatchHandler>()?;
+    m.add_class::<PythonConverterHandler>()?;
+    m.add_class::<EventBatch>()?;
     m.add_class::<RegexHandler>()?;
     m.add_class::<ReplaceHandler>()?;
     m.add_class::<StdoutHandler>()?;
@@ -126,5 +224,7 @@ fn streamson(_py: Python, m: &PyModule) -> PyResult<()> {
     m.add_class::<UnstringifyHandler>()?;
     m.add_class::<PythonToken>()?;
 
+    m.add_function(wrap_pyfunction!(split_array, m)?)?;
+
     Ok(())
 }
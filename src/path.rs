@@ -0,0 +1,81 @@
+use pyo3::{prelude::*, types::PyString};
+use std::fmt::Write;
+use streamson_lib::path::{Element, Path};
+
+/// Cache of the last rendered path
+///
+/// Consecutive paths usually share a prefix (e.g. `{"users"}[1]{"name"}`
+/// follows `{"users"}[0]{"name"}`), so only the differing suffix is rendered again.
+/// Python string of the path is reused while the path stays the same
+/// (e.g. for the start and the end of a matched element).
+#[derive(Debug, Default, Clone)]
+pub struct PathCache {
+    /// Elements of the last path
+    elements: Vec<Element>,
+    /// End offsets of the rendered elements
+    ends: Vec<usize>,
+    /// Last path rendered to string
+    rendered: String,
+    /// Python string of the last path
+    object: Option<PyObject>,
+}
+
+impl PathCache {
+    /// Renders the path
+    ///
+    /// # Returns
+    /// false if the path is the same as the last one
+    fn update(&mut self, path: &Path) -> bool {
+        let elements = path.get_path();
+        let common = self
+            .elements
+            .iter()
+            .zip(elements)
+            .take_while(|(cached, current)| cached == current)
+            .count();
+        if common == elements.len() && common == self.elements.len() {
+            return false;
+        }
+
+        self.elements.truncate(common);
+        self.ends.truncate(common);
+        self.rendered
+            .truncate(self.ends.last().copied().unwrap_or(0));
+        for element in &elements[common..] {
+            // writing to String never fails
+            let _ = match element {
+                Element::Key(key) => write!(self.rendered, "{{\"{}\"}}", key),
+                Element::Index(idx) => write!(self.rendered, "[{}]", idx),
+            };
+            self.elements.push(element.clone());
+            self.ends.push(self.rendered.len());
+        }
+        self.object = None;
+        true
+    }
+
+    /// Returns the path rendered to string
+    ///
+    /// # Arguments
+    /// * `path` - path to render
+    ///
+    /// # Returns
+    /// rendered path and false if the path is the same as the last one
+    pub fn render(&mut self, path: &Path) -> (&str, bool) {
+        let changed = self.update(path);
+        (&self.rendered, changed)
+    }
+
+    /// Returns the path as python string
+    ///
+    /// # Arguments
+    /// * `py` - python GIL token
+    /// * `path` - path to render
+    pub fn to_object(&mut self, py: Python, path: &Path) -> PyObject {
+        self.update(path);
+        let rendered = &self.rendered;
+        self.object
+            .get_or_insert_with(|| PyString::new(py, rendered).into())
+            .clone_ref(py)
+    }
+}
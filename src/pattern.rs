@@ -0,0 +1,336 @@
+use std::{
+    any::Any,
+    cell::RefCell,
+    collections::HashMap,
+    sync::{
+        atomic::{AtomicUsize, Ordering},
+        Arc, Mutex,
+    },
+};
+use streamson_lib::{
+    error,
+    handler::Handler,
+    matcher::Matcher,
+    path::{Element, Path},
+    streamer::{self, ParsedKind},
+};
+
+/// Single element of a simple path pattern
+#[derive(Debug, Clone, PartialEq)]
+pub enum PatternElement {
+    /// `{"key"}`
+    Key(String),
+    /// `{}`
+    AnyKey,
+    /// `[idx]`
+    Index(usize),
+    /// `[]`
+    AnyIndex,
+}
+
+/// Parses path of a simple matcher (e.g. `{"users"}[]{"name"}`)
+///
+/// Only keys, indexes and their wildcards (`{}`, `[]`) are supported.
+///
+/// # Arguments
+/// * `path` - path definition
+///
+/// # Errors
+/// Fails when the path can't be parsed
+pub fn parse(path: &str) -> Result<Vec<PatternElement>, String> {
+    let mut res = vec![];
+    let mut rest = path;
+    while !rest.is_empty() {
+        if let Some(tail) = rest.strip_prefix("{}") {
+            res.push(PatternElement::AnyKey);
+            rest = tail;
+        } else if let Some(tail) = rest.strip_prefix("[]") {
+            res.push(PatternElement::AnyIndex);
+            rest = tail;
+        } else if let Some(tail) = rest.strip_prefix("{\"") {
+            let mut escaped = false;
+            let end = tail
+                .char_indices()
+                .find(|(_, chr)| {
+                    if escaped {
+                        escaped = false;
+                        false
+                    } else if *chr == '\\' {
+                        escaped = true;
+                        false
+                    } else {
+                        *chr == '"'
+                    }
+                })
+                .map(|(idx, _)| idx)
+                .ok_or_else(|| format!("Unterminated key in '{}'", path))?;
+            if !tail[end + 1..].starts_with('}') {
+                return Err(format!("Wrong key in '{}'", path));
+            }
+            res.push(PatternElement::Key(tail[..end].to_string()));
+            rest = &tail[end + 2..];
+        } else if let Some(tail) = rest.strip_prefix('[') {
+            let end = tail
+                .find(']')
+                .ok_or_else(|| format!("Unterminated index in '{}'", path))?;
+            let idx = tail[..end]
+                .parse()
+                .map_err(|_| format!("Wrong index in '{}'", path))?;
+            res.push(PatternElement::Index(idx));
+            rest = &tail[end + 1..];
+        } else {
+            return Err(format!("Unsupported path '{}'", path));
+        }
+    }
+    Ok(res)
+}
+
+thread_local! {
+    /// Node indexes reached by the current and the next path element
+    static SCRATCH: RefCell<(Vec<usize>, Vec<usize>)> = RefCell::new((vec![], vec![]));
+}
+
+/// Element of a concrete path which is matched against the trie
+#[derive(Clone, Copy)]
+enum Step<'a> {
+    Key(&'a str),
+    Index(usize),
+}
+
+#[derive(Debug, Default)]
+struct Node {
+    keys: HashMap<String, usize>,
+    indexes: HashMap<usize, usize>,
+    any_key: Option<usize>,
+    any_index: Option<usize>,
+    /// Indexes of patterns which end in this node
+    matched: Vec<usize>,
+}
+
+/// Prefix tree of simple paths
+///
+/// Matching cost depends on the depth of the path
+/// rather than on the number of patterns.
+#[derive(Debug, Clone)]
+pub struct Trie {
+    nodes: Arc<Vec<Node>>,
+}
+
+impl Trie {
+    /// Creates a new trie
+    ///
+    /// # Arguments
+    /// * `patterns` - parsed simple paths (index of a pattern is reported when it matches)
+    pub fn new(patterns: Vec<Vec<PatternElement>>) -> Self {
+        let mut nodes = vec![Node::default()];
+        for (pattern_idx, pattern) in patterns.into_iter().enumerate() {
+            let mut current = 0;
+            for element in pattern {
+                let next = nodes.len();
+                let node = &mut nodes[current];
+                let child = match element {
+                    PatternElement::Key(key) => *node.keys.entry(key).or_insert(next),
+                    PatternElement::Index(idx) => *node.indexes.entry(idx).or_insert(next),
+                    PatternElement::AnyKey => *node.any_key.get_or_insert(next),
+                    PatternElement::AnyIndex => *node.any_index.get_or_insert(next),
+                };
+                if child == next {
+                    nodes.push(Node::default());
+                }
+                current = child;
+            }
+            nodes[current].matched.push(pattern_idx);
+        }
+        Self {
+            nodes: Arc::new(nodes),
+        }
+    }
+
+    /// Walks the trie along the path and passes the reached nodes to `f`
+    ///
+    /// Scratch buffers are reused between calls, so matching
+    /// doesn't allocate for every path element.
+    fn walk<'a, R>(
+        &self,
+        steps: impl Iterator<Item = Step<'a>>,
+        f: impl FnOnce(&[usize]) -> R,
+    ) -> R {
+        SCRATCH.with(|scratch| {
+            let mut scratch = scratch.borrow_mut();
+            let (current, next) = &mut *scratch;
+            current.clear();
+            current.push(0);
+            for step in steps {
+                next.clear();
+                for node in current.iter().map(|idx| &self.nodes[*idx]) {
+                    match step {
+                        Step::Key(key) => {
+                            next.extend(node.keys.get(key));
+                            next.extend(node.any_key);
+                        }
+                        Step::Index(idx) => {
+                            next.extend(node.indexes.get(&idx));
+                            next.extend(node.any_index);
+                        }
+                    }
+                }
+                std::mem::swap(current, next);
+                if current.is_empty() {
+                    break;
+                }
+            }
+            f(current)
+        })
+    }
+
+    /// Returns sorted indexes of patterns which match the path
+    fn match_steps<'a>(&self, steps: impl Iterator<Item = Step<'a>>) -> Vec<usize> {
+        let mut res: Vec<usize> = self.walk(steps, |reached| {
+            reached
+                .iter()
+                .flat_map(|idx| self.nodes[*idx].matched.iter().copied())
+                .collect()
+        });
+        res.sort_unstable();
+        res.dedup();
+        res
+    }
+
+    /// Returns indexes of patterns which match the concrete path
+    ///
+    /// # Arguments
+    /// * `path` - parsed path (wildcards are not allowed)
+    ///
+    /// # Errors
+    /// Fails when the path contains a wildcard
+    pub fn match_indices(&self, path: &[PatternElement]) -> Result<Vec<usize>, String> {
+        let steps: Result<Vec<_>, _> = path
+            .iter()
+            .map(|element| match element {
+                PatternElement::Key(key) => Ok(Step::Key(key)),
+                PatternElement::Index(idx) => Ok(Step::Index(*idx)),
+                _ => Err("Wildcards are not allowed in a concrete path".to_string()),
+            })
+            .collect();
+        Ok(self.match_steps(steps?.into_iter()))
+    }
+
+    /// Returns the lowest index of a pattern which matches the path
+    fn first_match(&self, path: &Path) -> Option<usize> {
+        self.walk(path_steps(path), |reached| {
+            reached
+                .iter()
+                // patterns are stored in ascending order
+                .filter_map(|idx| self.nodes[*idx].matched.first().copied())
+                .min()
+        })
+    }
+}
+
+/// Converts elements of a parsed path to steps of the trie
+fn path_steps(path: &Path) -> impl Iterator<Item = Step<'_>> + '_ {
+    path.get_path().iter().map(|element| match element {
+        Element::Key(key) => Step::Key(key),
+        Element::Index(idx) => Step::Index(*idx),
+    })
+}
+
+impl Matcher for Trie {
+    fn match_path(&self, path: &Path, _kind: ParsedKind) -> bool {
+        self.walk(path_steps(path), |reached| {
+            reached
+                .iter()
+                .any(|idx| !self.nodes[*idx].matched.is_empty())
+        })
+    }
+}
+
+/// Trie which remembers which pattern matched the last time
+#[derive(Debug, Clone)]
+pub struct PatternMatcher {
+    trie: Trie,
+    matched: Arc<AtomicUsize>,
+}
+
+impl Matcher for PatternMatcher {
+    fn match_path(&self, path: &Path, _kind: ParsedKind) -> bool {
+        if let Some(pattern_idx) = self.trie.first_match(path) {
+            self.matched.store(pattern_idx, Ordering::Relaxed);
+            true
+        } else {
+            false
+        }
+    }
+}
+
+/// Wraps a handler of `PatternMatcher`
+///
+/// The wrapped handler gets the index of the matched pattern as `matcher_idx`.
+/// The strategy calls the handler right after the path is matched,
+/// so the pattern is taken from the matcher without matching the path again.
+pub struct PatternHandler {
+    inner: Arc<Mutex<dyn Handler>>,
+    matched: Arc<AtomicUsize>,
+    /// Patterns of the matched paths which were not ended yet
+    stack: Vec<usize>,
+}
+
+impl Handler for PatternHandler {
+    fn start(
+        &mut self,
+        path: &Path,
+        _matcher_idx: usize,
+        token: streamer::Token,
+    ) -> Result<Option<Vec<u8>>, error::Handler> {
+        let pattern_idx = self.matched.load(Ordering::Relaxed);
+        self.stack.push(pattern_idx);
+        self.inner.lock().unwrap().start(path, pattern_idx, token)
+    }
+
+    fn feed(&mut self, data: &[u8], matcher_idx: usize) -> Result<Option<Vec<u8>>, error::Handler> {
+        let pattern_idx = self.stack.last().copied().unwrap_or(matcher_idx);
+        self.inner.lock().unwrap().feed(data, pattern_idx)
+    }
+
+    fn end(
+        &mut self,
+        path: &Path,
+        matcher_idx: usize,
+        token: streamer::Token,
+    ) -> Result<Option<Vec<u8>>, error::Handler> {
+        let pattern_idx = self.stack.pop().unwrap_or(matcher_idx);
+        self.inner.lock().unwrap().end(path, pattern_idx, token)
+    }
+
+    fn as_any(&self) -> &dyn Any {
+        self
+    }
+
+    fn is_converter(&self) -> bool {
+        self.inner.lock().unwrap().is_converter()
+    }
+}
+
+/// Creates a matcher from the trie whose handler gets the index of the matched pattern
+///
+/// # Arguments
+/// * `trie` - compiled patterns
+/// * `handler` - handler of the matcher
+pub fn attribute(
+    trie: &Trie,
+    handler: Arc<Mutex<dyn Handler>>,
+) -> (PatternMatcher, Arc<Mutex<dyn Handler>>) {
+    let matched = Arc::new(AtomicUsize::new(0));
+    let handler = PatternHandler {
+        inner: handler,
+        matched: matched.clone(),
+        stack: vec![],
+    };
+    (
+        PatternMatcher {
+            trie: trie.clone(),
+            matched,
+        },
+        Arc::new(Mutex::new(handler)),
+    )
+}
@@ -0,0 +1,126 @@
+use super::{input::InputData, StreamsonError};
+use pyo3::{exceptions::PyBrokenPipeError, prelude::*};
+use std::{
+    fs,
+    io::{self, BufWriter, Write},
+};
+use streamson_lib::strategy::Output;
+
+type Writer = Option<BufWriter<Box<dyn Write + Send>>>;
+
+/// Closed output (e.g. `streamson ... | head`) raises `BrokenPipeError` as python does
+fn io_error(err: io::Error) -> PyErr {
+    if err.kind() == io::ErrorKind::BrokenPipe {
+        PyBrokenPipeError::new_err(err.to_string())
+    } else {
+        StreamsonError::new_err(err.to_string())
+    }
+}
+
+fn write_to(writer: &mut Writer, data: &[u8]) -> PyResult<()> {
+    writer
+        .as_mut()
+        .ok_or_else(|| StreamsonError::new_err("Sink is closed"))?
+        .write_all(data)
+        .map_err(io_error)
+}
+
+/// Writes output of strategies to stdout or to a file
+///
+/// Output is written through a large buffer without passing the data to python.
+#[pyclass]
+pub struct Sink {
+    writer: Writer,
+    separator: Vec<u8>,
+    after: Vec<u8>,
+    first: bool,
+}
+
+impl Sink {
+    /// Writes output of a strategy
+    ///
+    /// Separator is written before each matched part except the first one.
+    pub fn feed(&mut self, output: Vec<Output>) -> PyResult<()> {
+        for item in output {
+            match item {
+                Output::Start(_) => {
+                    if self.first {
+                        self.first = false;
+                    } else {
+                        write_to(&mut self.writer, &self.separator)?;
+                    }
+                }
+                Output::Data(data) => write_to(&mut self.writer, &data)?,
+                Output::End => {}
+            }
+        }
+        Ok(())
+    }
+}
+
+#[pymethods]
+impl Sink {
+    /// Create instance of Sink
+    ///
+    /// # Arguments
+    /// * `path` - path to the output file (stdout is used if not set)
+    /// * `separator` - written between matched parts
+    /// * `before` - written before the output
+    /// * `after` - written after the output when the sink is closed
+    /// * `buffer_size` - size of the output buffer
+    #[new]
+    #[args(
+        path = "None",
+        separator = "\"\"",
+        before = "\"\"",
+        after = "\"\"",
+        buffer_size = "1024 * 1024"
+    )]
+    pub fn new(
+        path: Option<String>,
+        separator: &str,
+        before: &str,
+        after: &str,
+        buffer_size: usize,
+    ) -> PyResult<Self> {
+        let output: Box<dyn Write + Send> = if let Some(path) = path {
+            Box::new(
+                fs::File::create(path).map_err(|err| StreamsonError::new_err(err.to_string()))?,
+            )
+        } else {
+            Box::new(io::stdout())
+        };
+        let mut sink = Self {
+            writer: Some(BufWriter::with_capacity(buffer_size.max(1), output)),
+            separator: separator.as_bytes().to_vec(),
+            after: after.as_bytes().to_vec(),
+            first: true,
+        };
+        write_to(&mut sink.writer, before.as_bytes())?;
+        Ok(sink)
+    }
+
+    /// Writes raw data (e.g. input of trigger strategy)
+    pub fn write(&mut self, data: InputData) -> PyResult<()> {
+        write_to(&mut self.writer, data.as_bytes())
+    }
+
+    /// Flushes the buffer
+    pub fn flush(&mut self) -> PyResult<()> {
+        if let Some(writer) = self.writer.as_mut() {
+            writer.flush().map_err(io_error)?;
+        }
+        Ok(())
+    }
+
+    /// Writes the `after` part, flushes the buffer and closes the sink
+    pub fn close(&mut self) -> PyResult<()> {
+        if self.writer.is_none() {
+            return Ok(());
+        }
+        write_to(&mut self.writer, &self.after)?;
+        self.flush()?;
+        self.writer = None;
+        Ok(())
+    }
+}
@@ -0,0 +1,411 @@
+use crate::pattern::PatternElement;
+use std::convert::TryInto;
+
+/// Value which replaces skipped subtrees
+const PLACEHOLDER: &[u8] = b"0";
+
+/// Repeats the byte in every byte of a word
+const fn broadcast(byte: u8) -> u64 {
+    0x0101_0101_0101_0101 * byte as u64
+}
+
+/// Highest bits of bytes of the word which are equal to `byte`
+///
+/// Lowest set bit always marks a matching byte
+/// (higher bits may contain false positives).
+#[inline]
+fn find_byte(word: u64, byte: u8) -> u64 {
+    let xored = word ^ broadcast(byte);
+    xored.wrapping_sub(broadcast(1)) & !xored & broadcast(0x80)
+}
+
+/// Finds the first position of a structural byte (a string byte) of the input
+///
+/// Input is processed word by word.
+///
+/// # Arguments
+/// * `data` - input data
+/// * `idx` - where to start
+/// * `in_string` - look for `"` and `\` instead of `"`, `{`, `}`, `[` and `]`
+fn next_interesting(data: &[u8], mut idx: usize, in_string: bool) -> Option<usize> {
+    while idx + 8 <= data.len() {
+        let word = u64::from_le_bytes(data[idx..idx + 8].try_into().unwrap());
+        let mask = if in_string {
+            find_byte(word, b'"') | find_byte(word, b'\\')
+        } else {
+            find_byte(word, b'"')
+                | find_byte(word, b'{')
+                | find_byte(word, b'}')
+                | find_byte(word, b'[')
+                | find_byte(word, b']')
+        };
+        if mask != 0 {
+            return Some(idx + (mask.trailing_zeros() / 8) as usize);
+        }
+        idx += 8;
+    }
+    data[idx..]
+        .iter()
+        .position(|e| {
+            if in_string {
+                matches!(e, b'"' | b'\\')
+            } else {
+                matches!(e, b'"' | b'{' | b'}' | b'[' | b']')
+            }
+        })
+        .map(|pos| idx + pos)
+}
+
+#[derive(Debug)]
+enum Frame {
+    Object { key: Vec<u8>, escaped: bool },
+    Array { index: usize },
+}
+
+impl Frame {
+    /// Checks whether pattern can match subpaths of current element of the frame
+    ///
+    /// # Arguments
+    /// * `pattern` - pattern which matches the parent frames
+    /// * `depth` - depth of the frame
+    fn keeps(&self, pattern: &[PatternElement], depth: usize) -> bool {
+        // shorter pattern already matched a parent
+        pattern
+            .get(depth)
+            .map_or(true, |element| self.matches(element))
+    }
+
+    /// Checks whether pattern element matches current element of the frame
+    fn matches(&self, element: &PatternElement) -> bool {
+        match (self, element) {
+            (Frame::Object { .. }, PatternElement::AnyKey) => true,
+            // escaped keys are not compared
+            (Frame::Object { escaped: true, .. }, PatternElement::Key(_)) => true,
+            (Frame::Object { key, .. }, PatternElement::Key(expected)) => {
+                key == expected.as_bytes()
+            }
+            (Frame::Array { .. }, PatternElement::AnyIndex) => true,
+            (Frame::Array { index }, PatternElement::Index(expected)) => index == expected,
+            _ => false,
+        }
+    }
+}
+
+#[derive(Debug, PartialEq)]
+enum State {
+    /// Expecting value
+    Value,
+    /// Expecting key or end of object
+    ObjectKey,
+    /// Reading key
+    Key,
+    /// Expecting `:`
+    Colon,
+    /// Reading string
+    Str,
+    /// Reading number, bool or null
+    Scalar,
+    /// Expecting `,` or end of object / array
+    AfterValue,
+    /// Skipping object or array
+    SkipContainer,
+    /// Skipping string
+    SkipStr,
+    /// Skipping number, bool or null
+    SkipScalar,
+}
+
+/// Removes subtrees which can't be matched by any simple path
+///
+/// Skipped values are replaced with a placeholder so the output
+/// remains a valid json with the same paths as the input.
+#[derive(Debug)]
+pub struct Skipper {
+    patterns: Vec<Vec<PatternElement>>,
+    stack: Vec<Frame>,
+    /// Indexes of patterns which match parents of each frame
+    ///
+    /// Vectors above the stack length are kept to reuse the allocations.
+    live: Vec<Vec<usize>>,
+    state: State,
+    key: Vec<u8>,
+    escaped: bool,
+    skip_depth: usize,
+    skip_in_string: bool,
+}
+
+impl Skipper {
+    /// Creates new skipper
+    ///
+    /// # Arguments
+    /// * `patterns` - parsed simple paths
+    pub fn new(patterns: Vec<Vec<PatternElement>>) -> Self {
+        Self {
+            patterns,
+            stack: vec![],
+            live: vec![],
+            state: State::Value,
+            key: vec![],
+            escaped: false,
+            skip_depth: 0,
+            skip_in_string: false,
+        }
+    }
+
+    /// Resets the state so a new input can be processed
+    pub fn reset(&mut self) {
+        self.stack.clear();
+        self.state = State::Value;
+        self.key.clear();
+        self.escaped = false;
+        self.skip_depth = 0;
+        self.skip_in_string = false;
+    }
+
+    /// Checks whether some pattern can match current path or its subpaths
+    ///
+    /// Only patterns which matched the parent frames are checked.
+    fn may_match(&self) -> bool {
+        let depth = self.stack.len() - 1;
+        let frame = &self.stack[depth];
+        self.live[depth]
+            .iter()
+            .any(|&idx| frame.keeps(&self.patterns[idx], depth))
+    }
+
+    /// Opens object or array
+    fn open(&mut self, frame: Frame) {
+        let depth = self.stack.len();
+        if self.live.len() == depth {
+            self.live.push(vec![]);
+        }
+        let (parents, children) = self.live.split_at_mut(depth);
+        let live = &mut children[0];
+        live.clear();
+        if let (Some(parent_live), Some(parent)) = (parents.last(), self.stack.last()) {
+            let patterns = &self.patterns;
+            live.extend(
+                parent_live
+                    .iter()
+                    .copied()
+                    .filter(|&idx| parent.keeps(&patterns[idx], depth - 1)),
+            );
+        } else {
+            live.extend(0..self.patterns.len());
+        }
+        self.stack.push(frame);
+    }
+
+    /// Closes object or array
+    fn close(&mut self) {
+        self.stack.pop();
+        self.state = State::AfterValue;
+    }
+
+    /// Processes input data
+    ///
+    /// # Arguments
+    /// * `input` - input data
+    ///
+    /// # Returns
+    /// Input data without the skipped parts
+    /// or `None` if nothing was skipped (the input can be used as it is)
+    pub fn process(&mut self, input: &[u8]) -> Option<Vec<u8>> {
+        // start of data which will be copied to output
+        let mut copy_start = match self.state {
+            State::SkipContainer | State::SkipStr | State::SkipScalar => None,
+            _ => Some(0),
+        };
+        // output is allocated only when something is skipped
+        let mut unchanged = copy_start.is_some();
+        let mut output = if unchanged {
+            vec![]
+        } else {
+            Vec::with_capacity(input.len())
+        };
+        let mut idx = 0;
+
+        while idx < input.len() {
+            let byte = input[idx];
+            match self.state {
+                State::Value => {
+                    if byte.is_ascii_whitespace() {
+                    } else if byte == b']' {
+                        self.close();
+                    } else if !self.stack.is_empty() && !self.may_match() {
+                        if unchanged {
+                            unchanged = false;
+                            output.reserve(input.len());
+                        }
+                        if let Some(start) = copy_start.take() {
+                            output.extend(&input[start..idx]);
+                        }
+                        output.extend(PLACEHOLDER);
+                        self.state = match byte {
+                            b'{' | b'[' => {
+                                self.skip_depth = 1;
+                                self.skip_in_string = false;
+                                State::SkipContainer
+                            }
+                            b'"' => State::SkipStr,
+                            _ => State::SkipScalar,
+                        };
+                        self.escaped = false;
+                        if self.state == State::SkipScalar {
+                            continue;
+                        }
+                    } else {
+                        self.state = match byte {
+                            b'{' => {
+                                self.open(Frame::Object {
+                                    key: vec![],
+                                    escaped: false,
+                                });
+                                State::ObjectKey
+                            }
+                            b'[' => {
+                                self.open(Frame::Array { index: 0 });
+                                State::Value
+                            }
+                            b'"' => {
+                                self.escaped = false;
+                                State::Str
+                            }
+                            _ => State::Scalar,
+                        };
+                    }
+                }
+                State::ObjectKey => {
+                    if byte == b'"' {
+                        self.key.clear();
+                        self.escaped = false;
+                        self.state = State::Key;
+                    } else if byte == b'}' {
+                        self.close();
+                    }
+                }
+                State::Key => {
+                    if self.escaped {
+                        self.escaped = false;
+                        self.key.push(byte);
+                    } else if let Some(pos) = next_interesting(input, idx, true) {
+                        self.key.extend_from_slice(&input[idx..pos]);
+                        idx = pos;
+                        if input[idx] == b'"' {
+                            let key_escaped = self.key.contains(&b'\\');
+                            if let Some(Frame::Object { key, escaped }) = self.stack.last_mut() {
+                                // previous key buffer is reused for the next key
+                                std::mem::swap(key, &mut self.key);
+                                *escaped = key_escaped;
+                            }
+                            self.state = State::Colon;
+                        } else {
+                            self.escaped = true;
+                            self.key.push(b'\\');
+                        }
+                    } else {
+                        self.key.extend_from_slice(&input[idx..]);
+                        idx = input.len();
+                        continue;
+                    }
+                }
+                State::Colon => {
+                    if byte == b':' {
+                        self.state = State::Value;
+                    }
+                }
+                State::Str => {
+                    if self.escaped {
+                        self.escaped = false;
+                    } else if let Some(pos) = next_interesting(input, idx, true) {
+                        idx = pos;
+                        if input[idx] == b'"' {
+                            self.state = State::AfterValue;
+                        } else {
+                            self.escaped = true;
+                        }
+                    } else {
+                        idx = input.len();
+                        continue;
+                    }
+                }
+                State::Scalar => {
+                    if byte.is_ascii_whitespace() || matches!(byte, b',' | b'}' | b']') {
+                        self.state = State::AfterValue;
+                        continue;
+                    }
+                }
+                State::AfterValue => match byte {
+                    b',' => match self.stack.last_mut() {
+                        Some(Frame::Array { index }) => {
+                            *index += 1;
+                            self.state = State::Value;
+                        }
+                        _ => self.state = State::ObjectKey,
+                    },
+                    b'}' | b']' => self.close(),
+                    // next top-level value (concatenated json / NDJSON)
+                    _ if self.stack.is_empty() && !byte.is_ascii_whitespace() => {
+                        self.state = State::Value;
+                        continue;
+                    }
+                    _ => {}
+                },
+                State::SkipContainer => {
+                    if self.escaped {
+                        self.escaped = false;
+                    } else if let Some(pos) = next_interesting(input, idx, self.skip_in_string) {
+                        idx = pos;
+                        match input[idx] {
+                            b'\\' => self.escaped = true,
+                            b'"' => self.skip_in_string = !self.skip_in_string,
+                            b'{' | b'[' => self.skip_depth += 1,
+                            _ => {
+                                self.skip_depth -= 1;
+                                if self.skip_depth == 0 {
+                                    self.state = State::AfterValue;
+                                    copy_start = Some(idx + 1);
+                                }
+                            }
+                        }
+                    } else {
+                        idx = input.len();
+                        continue;
+                    }
+                }
+                State::SkipStr => {
+                    if self.escaped {
+                        self.escaped = false;
+                    } else if let Some(pos) = next_interesting(input, idx, true) {
+                        idx = pos;
+                        if input[idx] == b'"' {
+                            self.state = State::AfterValue;
+                            copy_start = Some(idx + 1);
+                        } else {
+                            self.escaped = true;
+                        }
+                    } else {
+                        idx = input.len();
+                        continue;
+                    }
+                }
+                State::SkipScalar => {
+                    if byte.is_ascii_whitespace() || matches!(byte, b',' | b'}' | b']') {
+                        self.state = State::AfterValue;
+                        copy_start = Some(idx);
+                        continue;
+                    }
+                }
+            }
+            idx += 1;
+        }
+
+        if unchanged {
+            return None;
+        }
+        if let Some(start) = copy_start {
+            output.extend(&input[start..]);
+        }
+        Some(output)
+    }
+}
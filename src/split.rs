@@ -0,0 +1,224 @@
+/// Tracks the structure of json input byte by byte
+///
+/// Only nesting level and string boundaries are tracked
+/// so it is much faster than parsing the input.
+#[derive(Debug, Default, Clone)]
+pub struct Scanner {
+    /// Current nesting level
+    pub depth: usize,
+    /// Inside of a string
+    in_string: bool,
+    /// Previous byte was an escape character in a string
+    escaped: bool,
+}
+
+impl Scanner {
+    /// Skips the string content
+    ///
+    /// # Returns
+    /// Position of the first byte which was not processed
+    fn skip_string(&mut self, data: &[u8], mut idx: usize) -> usize {
+        while idx < data.len() {
+            if self.escaped {
+                self.escaped = false;
+                idx += 1;
+                continue;
+            }
+            match data[idx..].iter().position(|e| *e == b'"' || *e == b'\\') {
+                Some(pos) => {
+                    idx += pos;
+                    if data[idx] == b'\\' {
+                        self.escaped = true;
+                    } else {
+                        self.in_string = false;
+                        return idx + 1;
+                    }
+                    idx += 1;
+                }
+                None => return data.len(),
+            }
+        }
+        idx
+    }
+
+    /// Finds next structural byte (`{`, `}`, `[`, `]`, `,`) outside of strings
+    ///
+    /// Nesting level is updated when the byte is found.
+    ///
+    /// # Arguments
+    /// * `data` - input data
+    /// * `idx` - where to start the search
+    ///
+    /// # Returns
+    /// Position of the structural byte
+    pub fn next_structural(&mut self, data: &[u8], mut idx: usize) -> Option<usize> {
+        while idx < data.len() {
+            if self.in_string {
+                idx = self.skip_string(data, idx);
+                continue;
+            }
+            match data[idx] {
+                b'"' => self.in_string = true,
+                b'{' | b'[' => {
+                    self.depth += 1;
+                    return Some(idx);
+                }
+                b'}' | b']' => {
+                    self.depth = self.depth.saturating_sub(1);
+                    return Some(idx);
+                }
+                b',' => return Some(idx),
+                _ => {}
+            }
+            idx += 1;
+        }
+        None
+    }
+}
+
+/// Shard of top-level array
+///
+/// (start, end, index of the first element)
+pub type Shard = (usize, usize, usize);
+
+/// Splits the top-level array into shards containing whole elements
+///
+/// # Arguments
+/// * `data` - input data
+/// * `shard_size` - approximate size of a shard
+///
+/// # Errors
+/// Fails when top-level value is not an array or the array is not terminated
+pub fn split_array(data: &[u8], shard_size: usize) -> Result<Vec<Shard>, String> {
+    let start = match data.iter().position(|e| !e.is_ascii_whitespace()) {
+        Some(idx) if data[idx] == b'[' => idx + 1,
+        _ => return Err("Top-level value is not an array".into()),
+    };
+    let mut scanner = Scanner {
+        depth: 1,
+        ..Default::default()
+    };
+
+    let mut shards = vec![];
+    let mut shard_start = start;
+    let mut first_index = 0;
+    let mut index = 0;
+    let mut idx = start;
+
+    while let Some(pos) = scanner.next_structural(data, idx) {
+        match scanner.depth {
+            0 => {
+                shards.push((shard_start, pos, first_index));
+                return Ok(shards);
+            }
+            1 if data[pos] == b',' => {
+                index += 1;
+                if pos - shard_start >= shard_size {
+                    shards.push((shard_start, pos, first_index));
+                    shard_start = pos + 1;
+                    first_index = index;
+                }
+            }
+            _ => {}
+        }
+        idx = pos + 1;
+    }
+
+    Err("Top-level array is not terminated".into())
+}
+
+/// Finds boundaries of top-level values in concatenated json / NDJSON input
+#[derive(Debug, Default, Clone)]
+pub struct Documents {
+    scanner: Scanner,
+    /// Inside of a top-level scalar (number, `true`, `false`, `null`)
+    in_scalar: bool,
+    /// Some data of the current document were processed
+    started: bool,
+    /// Index of the current document
+    pub index: usize,
+}
+
+impl Documents {
+    /// Checks whether the current document was started
+    pub fn started(&self) -> bool {
+        self.started
+    }
+
+    /// Finds ends of documents within the input
+    ///
+    /// # Arguments
+    /// * `data` - input data
+    ///
+    /// # Returns
+    /// Positions right after the last byte of each finished document
+    pub fn split(&mut self, data: &[u8]) -> Vec<usize> {
+        let mut ends = vec![];
+        let mut idx = 0;
+        while idx < data.len() {
+            if self.scanner.in_string && self.scanner.depth == 0 {
+                // top-level string
+                idx = self.scanner.skip_string(data, idx);
+                if !self.scanner.in_string {
+                    ends.push(idx);
+                    self.started = false;
+                }
+            } else if self.scanner.depth > 0 {
+                match self.scanner.next_structural(data, idx) {
+                    Some(pos) => {
+                        idx = pos + 1;
+                        if self.scanner.depth == 0 {
+                            ends.push(idx);
+                            self.started = false;
+                        }
+                    }
+                    None => idx = data.len(),
+                }
+            } else if self.in_scalar {
+                match data[idx..]
+                    .iter()
+                    .position(|e| e.is_ascii_whitespace() || matches!(e, b'{' | b'[' | b'"'))
+                {
+                    Some(pos) => {
+                        idx += pos;
+                        ends.push(idx);
+                        self.in_scalar = false;
+                        self.started = false;
+                    }
+                    None => idx = data.len(),
+                }
+            } else {
+                match data[idx] {
+                    byte if byte.is_ascii_whitespace() => {}
+                    b'{' | b'[' => {
+                        self.scanner.depth = 1;
+                        self.started = true;
+                    }
+                    b'"' => {
+                        self.scanner.in_string = true;
+                        self.started = true;
+                    }
+                    _ => {
+                        self.in_scalar = true;
+                        self.started = true;
+                    }
+                }
+                idx += 1;
+            }
+        }
+        ends
+    }
+
+    /// Marks the end of the input
+    ///
+    /// # Returns
+    /// Whether an unfinished document was terminated
+    pub fn terminate(&mut self) -> bool {
+        let started = self.started;
+        *self = Self {
+            index: self.index,
+            ..Default::default()
+        };
+        started
+    }
+}
@@ -0,0 +1,147 @@
+use pyo3::{prelude::*, types::PyDict};
+use std::{
+    any::Any,
+    sync::{
+        atomic::{AtomicU64, Ordering},
+        Arc, Mutex,
+    },
+    time::{Duration, Instant},
+};
+use streamson_lib::{error, handler::Handler, path::Path, streamer};
+
+/// Counters of a single matcher (or a handler of All strategy)
+///
+/// Atomics are used because the handlers may run without the GIL.
+#[derive(Debug, Default)]
+pub struct HandlerCounters {
+    matches: AtomicU64,
+    calls: AtomicU64,
+    /// Time spent in the handler in nanoseconds
+    time: AtomicU64,
+}
+
+/// Wraps a handler and measures its calls
+pub struct StatsHandler {
+    inner: Option<Arc<Mutex<dyn Handler>>>,
+    counters: Arc<HandlerCounters>,
+}
+
+impl StatsHandler {
+    /// Calls the wrapped handler (if any) and measures the call
+    fn call<F>(&self, f: F) -> Result<Option<Vec<u8>>, error::Handler>
+    where
+        F: FnOnce(&mut dyn Handler) -> Result<Option<Vec<u8>>, error::Handler>,
+    {
+        let inner = if let Some(inner) = self.inner.as_ref() {
+            inner
+        } else {
+            return Ok(None);
+        };
+        let start = Instant::now();
+        let result = f(&mut *inner.lock().unwrap());
+        self.counters.calls.fetch_add(1, Ordering::Relaxed);
+        self.counters
+            .time
+            .fetch_add(start.elapsed().as_nanos() as u64, Ordering::Relaxed);
+        result
+    }
+}
+
+impl Handler for StatsHandler {
+    fn start(
+        &mut self,
+        path: &Path,
+        matcher_idx: usize,
+        token: streamer::Token,
+    ) -> Result<Option<Vec<u8>>, error::Handler> {
+        self.counters.matches.fetch_add(1, Ordering::Relaxed);
+        self.call(|handler| handler.start(path, matcher_idx, token))
+    }
+
+    fn feed(&mut self, data: &[u8], matcher_idx: usize) -> Result<Option<Vec<u8>>, error::Handler> {
+        self.call(|handler| handler.feed(data, matcher_idx))
+    }
+
+    fn end(
+        &mut self,
+        path: &Path,
+        matcher_idx: usize,
+        token: streamer::Token,
+    ) -> Result<Option<Vec<u8>>, error::Handler> {
+        self.call(|handler| handler.end(path, matcher_idx, token))
+    }
+
+    fn as_any(&self) -> &dyn Any {
+        self
+    }
+
+    fn is_converter(&self) -> bool {
+        self.inner
+            .as_ref()
+            .map(|handler| handler.lock().unwrap().is_converter())
+            .unwrap_or(false)
+    }
+}
+
+/// Statistics of a strategy
+///
+/// Collected only when enabled on the strategy.
+#[derive(Debug, Default)]
+pub struct Stats {
+    /// Bytes of the input (including the parts removed by fast skipping)
+    pub bytes: u64,
+    /// Number of outputs of the strategy
+    pub events: u64,
+    /// Time spent converting the output to python objects
+    pub convert_time: Duration,
+    /// Max size of data buffered in records
+    pub peak_buffered: usize,
+    handlers: Vec<Arc<HandlerCounters>>,
+}
+
+impl Stats {
+    /// Wraps a handler so its calls are counted
+    ///
+    /// Handler is created even when there is no handler to wrap to count the matches.
+    pub fn wrap(&mut self, handler: Option<Arc<Mutex<dyn Handler>>>) -> Arc<Mutex<dyn Handler>> {
+        let counters = Arc::new(HandlerCounters::default());
+        self.handlers.push(counters.clone());
+        Arc::new(Mutex::new(StatsHandler {
+            inner: handler,
+            counters,
+        }))
+    }
+
+    /// Updates peak of buffered data
+    pub fn update_buffered(&mut self, buffered: usize) {
+        self.peak_buffered = self.peak_buffered.max(buffered);
+    }
+
+    /// Converts statistics to a python dict
+    ///
+    /// # Arguments
+    /// * `handlers_key` - key of the list with statistics of the matchers / handlers
+    pub fn to_dict(&self, py: Python, handlers_key: &str) -> PyResult<PyObject> {
+        let dict = PyDict::new(py);
+        dict.set_item("bytes", self.bytes)?;
+        dict.set_item("events", self.events)?;
+        dict.set_item("convert_time", self.convert_time.as_secs_f64())?;
+        dict.set_item("peak_buffered", self.peak_buffered)?;
+        let handlers = self
+            .handlers
+            .iter()
+            .map(|counters| {
+                let item = PyDict::new(py);
+                item.set_item("matches", counters.matches.load(Ordering::Relaxed))?;
+                item.set_item("handler_calls", counters.calls.load(Ordering::Relaxed))?;
+                item.set_item(
+                    "handler_time",
+                    Duration::from_nanos(counters.time.load(Ordering::Relaxed)).as_secs_f64(),
+                )?;
+                Ok(item.into())
+            })
+            .collect::<PyResult<Vec<PyObject>>>()?;
+        dict.set_item(handlers_key, handlers)?;
+        Ok(dict.into())
+    }
+}
@@ -10,30 +10,241 @@ pub use extract::Extract;
 pub use filter::Filter;
 pub use trigger::Trigger;
 
-use super::{convert_output, PythonOutput, StreamsonError};
+use super::{
+    convert_output, handler::python_batch::EventQueue, path::PathCache, sink::Sink,
+    split::Documents, stats::Stats, PythonOutput, StreamsonError,
+};
 use pyo3::prelude::*;
-use streamson_lib::strategy;
+use std::{sync::Arc, time::Instant};
+use streamson_lib::{
+    matcher::{self, Matcher},
+    path::Path,
+    strategy::{self, Output},
+    streamer::ParsedKind,
+};
+
+/// Matcher shared between a strategy and the list it is recreated from
+///
+/// Strategies are recreated after each document in document mode,
+/// so the matchers are only referenced instead of being cloned.
+#[derive(Debug, Clone)]
+pub struct SharedMatcher(Arc<matcher::Combinator>);
+
+impl SharedMatcher {
+    pub fn new(matcher: matcher::Combinator) -> Self {
+        Self(Arc::new(matcher))
+    }
+}
+
+impl Matcher for SharedMatcher {
+    fn match_path(&self, path: &Path, kind: ParsedKind) -> bool {
+        self.0.match_path(path, kind)
+    }
+}
 
 pub trait PythonStrategy<S>
 where
-    S: strategy::Strategy,
+    S: strategy::Strategy + Send,
 {
     /// Get the strategy
     fn get_strategy(&mut self) -> &mut S;
 
-    /// Processes input data
-    fn _process(&mut self, input_data: &[u8]) -> PyResult<Vec<PythonOutput>> {
-        match self.get_strategy().process(input_data) {
-            Err(err) => Err(StreamsonError::new_err(err.to_string())),
-            Ok(output) => Ok(output.into_iter().map(convert_output).collect()),
+    /// Indicator whether the GIL should be released while the input is parsed
+    fn get_release_gil(&self) -> bool;
+
+    /// Get cache of the last path returned by the strategy
+    fn get_path_cache(&mut self) -> &mut PathCache;
+
+    /// Get queues of batch handlers used within the strategy
+    fn get_event_queues(&self) -> &[Arc<EventQueue>];
+
+    /// Get boundaries of documents (used in document mode)
+    fn get_documents(&mut self) -> &mut Documents;
+
+    /// Get statistics (if enabled)
+    fn get_stats(&mut self) -> Option<&mut Stats>;
+
+    /// Recreates the strategy with the same matchers and handlers
+    ///
+    /// Used to process next document in document mode.
+    fn reset_strategy(&mut self);
+
+    /// Drops the state of the processed input so the strategy can be reused
+    fn _reset(&mut self) {
+        self.reset_strategy();
+        *self.get_documents() = Documents::default();
+    }
+
+    /// Passes events collected by batch handlers to python
+    fn _flush_event_queues(&self, py: Python) -> PyResult<()> {
+        for queue in self.get_event_queues() {
+            queue.flush(py)?;
+        }
+        Ok(())
+    }
+
+    /// Processes input data using the strategy
+    fn _strategy_process(&mut self, py: Python, input_data: &[u8]) -> PyResult<Vec<Output>> {
+        let release_gil = self.get_release_gil();
+        let strategy = self.get_strategy();
+        let result = if release_gil {
+            py.allow_threads(|| strategy.process(input_data))
+        } else {
+            strategy.process(input_data)
+        };
+        self._flush_event_queues(py)?;
+        let output = result.map_err(|err| StreamsonError::new_err(err.to_string()))?;
+        if let Some(stats) = self.get_stats() {
+            stats.bytes += input_data.len() as u64;
+            stats.events += output.len() as u64;
+        }
+        Ok(output)
+    }
+
+    /// Terminates the strategy
+    fn _strategy_terminate(&mut self, py: Python) -> PyResult<Vec<Output>> {
+        let release_gil = self.get_release_gil();
+        let strategy = self.get_strategy();
+        let result = if release_gil {
+            py.allow_threads(|| strategy.terminate())
+        } else {
+            strategy.terminate()
+        };
+        self._flush_event_queues(py)?;
+        let output = result.map_err(|err| StreamsonError::new_err(err.to_string()))?;
+        if let Some(stats) = self.get_stats() {
+            stats.events += output.len() as u64;
+        }
+        Ok(output)
+    }
+
+    /// Converts output of the strategy to python
+    fn _convert_output(&mut self, py: Python, output: Vec<Output>) -> Vec<PythonOutput> {
+        let start = if self.get_stats().is_some() {
+            Some(Instant::now())
+        } else {
+            None
+        };
+        let path_cache = self.get_path_cache();
+        let output = output
+            .into_iter()
+            .map(|e| convert_output(py, e, path_cache))
+            .collect();
+        if let (Some(start), Some(stats)) = (start, self.get_stats()) {
+            stats.convert_time += start.elapsed();
         }
+        output
+    }
+
+    /// Processes input data
+    fn _process(&mut self, py: Python, input_data: &[u8]) -> PyResult<Vec<PythonOutput>> {
+        let output = self._strategy_process(py, input_data)?;
+        Ok(self._convert_output(py, output))
     }
 
     /// Functions which is triggered when the input has stopped
-    fn _terminate(&mut self) -> PyResult<Vec<PythonOutput>> {
-        match self.get_strategy().terminate() {
-            Err(err) => Err(StreamsonError::new_err(err.to_string())),
-            Ok(output) => Ok(output.into_iter().map(convert_output).collect()),
+    fn _terminate(&mut self, py: Python) -> PyResult<Vec<PythonOutput>> {
+        let output = self._strategy_terminate(py)?;
+        Ok(self._convert_output(py, output))
+    }
+
+    /// Processes input data and writes the output to the sink
+    fn _process_into(&mut self, py: Python, input_data: &[u8], sink: &mut Sink) -> PyResult<()> {
+        let output = self._strategy_process(py, input_data)?;
+        sink.feed(output)
+    }
+
+    /// Terminates the strategy and writes the remaining output to the sink
+    fn _terminate_into(&mut self, py: Python, sink: &mut Sink) -> PyResult<()> {
+        let output = self._strategy_terminate(py)?;
+        sink.feed(output)
+    }
+
+    /// Splits input data to documents and processes each document separately
+    ///
+    /// Strategy is recreated after each document.
+    ///
+    /// # Arguments
+    /// * `input_data` - input data containing several documents
+    /// * `process` - processes a part of a single document
+    /// * `terminate` - terminates a single document
+    ///
+    /// # Returns
+    /// Results along with indexes of the documents
+    fn _split_documents<T>(
+        &mut self,
+        py: Python,
+        input_data: &[u8],
+        process: fn(&mut Self, Python, &[u8]) -> PyResult<Vec<T>>,
+        terminate: fn(&mut Self, Python) -> PyResult<Vec<T>>,
+    ) -> PyResult<Vec<(usize, T)>>
+    where
+        Self: Sized,
+    {
+        let ends = self.get_documents().split(input_data);
+        let mut res = vec![];
+        let mut start = 0;
+        for end in ends {
+            let index = self.get_documents().index;
+            let mut output = process(self, py, &input_data[start..end])?;
+            output.extend(terminate(self, py)?);
+            res.extend(output.into_iter().map(|e| (index, e)));
+            self.reset_strategy();
+            self.get_documents().index += 1;
+            start = end;
+        }
+        if start < input_data.len() {
+            let index = self.get_documents().index;
+            let output = process(self, py, &input_data[start..])?;
+            res.extend(output.into_iter().map(|e| (index, e)));
+        }
+        Ok(res)
+    }
+
+    /// Terminates the last document of the input
+    ///
+    /// # Arguments
+    /// * `terminate` - terminates a single document
+    fn _finish_documents<T>(
+        &mut self,
+        py: Python,
+        terminate: fn(&mut Self, Python) -> PyResult<Vec<T>>,
+    ) -> PyResult<Vec<(usize, T)>>
+    where
+        Self: Sized,
+    {
+        let index = self.get_documents().index;
+        if !self.get_documents().terminate() {
+            // only whitespaces after the last document
+            self.reset_strategy();
+            return Ok(vec![]);
         }
+        let output = terminate(self, py)?;
+        self.reset_strategy();
+        self.get_documents().index += 1;
+        Ok(output.into_iter().map(|e| (index, e)).collect())
+    }
+
+    /// Processes input data containing several documents (concatenated json / NDJSON)
+    ///
+    /// # Returns
+    /// Outputs along with indexes of the documents
+    fn _process_documents(
+        &mut self,
+        py: Python,
+        input_data: &[u8],
+    ) -> PyResult<Vec<(usize, PythonOutput)>>
+    where
+        Self: Sized,
+    {
+        self._split_documents(py, input_data, Self::_process, Self::_terminate)
+    }
+
+    /// Terminates the input containing several documents
+    fn _terminate_documents(&mut self, py: Python) -> PyResult<Vec<(usize, PythonOutput)>>
+    where
+        Self: Sized,
+    {
+        self._finish_documents(py, Self::_terminate)
     }
 }
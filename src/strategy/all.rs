@@ -1,12 +1,31 @@
 use pyo3::prelude::*;
-use streamson_lib::strategy;
+use std::sync::{Arc, Mutex};
+use streamson_lib::{strategy, Handler};
 
-use crate::{handler::BaseHandler, PythonOutput, PythonStrategy};
+use crate::{
+    handler::{
+        python_batch::{event_queues, EventQueue},
+        BaseHandler,
+    },
+    input::InputData,
+    path::PathCache,
+    sink::Sink,
+    split::Documents,
+    stats::Stats,
+    PythonOutput, PythonStrategy,
+};
 
 /// Low level Python wrapper for All strategy
 #[pyclass]
 pub struct All {
     all: strategy::All,
+    convert: bool,
+    handlers: Vec<Arc<Mutex<dyn Handler>>>,
+    release_gil: bool,
+    path_cache: PathCache,
+    event_queues: Vec<Arc<EventQueue>>,
+    documents: Documents,
+    stats: Option<Stats>,
 }
 
 #[pymethods]
@@ -15,13 +34,23 @@ impl All {
     ///
     /// # Arguments
     /// * `convert` - should handler be used for output conversion
+    /// * `release_gil` - parse input without holding the GIL
     #[new]
-    #[args(convert = "None")]
-    pub fn new(convert: Option<bool>) -> PyResult<Self> {
+    #[args(convert = "None", release_gil = "false")]
+    pub fn new(convert: Option<bool>, release_gil: bool) -> PyResult<Self> {
         let convert = convert.unwrap_or(false);
         let mut all = strategy::All::new();
         all.set_convert(convert);
-        Ok(Self { all })
+        Ok(Self {
+            all,
+            convert,
+            handlers: vec![],
+            release_gil,
+            path_cache: PathCache::default(),
+            event_queues: vec![],
+            documents: Documents::default(),
+            stats: None,
+        })
     }
 
     /// Adds handler for all strategy
@@ -29,17 +58,91 @@ impl All {
     /// # Arguments
     /// * `handler` - handler to be added (`Indent`, `Analyser`, ...)
     pub fn add_handler(&mut self, handler: BaseHandler) {
-        self.all.add_handler(handler.inner);
+        self.event_queues.extend(event_queues(&handler));
+        let handler = handler.strategy_handler();
+        let handler = match self.stats.as_mut() {
+            Some(stats) => stats.wrap(Some(handler)),
+            None => handler,
+        };
+        self.handlers.push(handler.clone());
+        self.all.add_handler(handler);
+    }
+
+    /// Collects statistics of the processing (see `stats`)
+    ///
+    /// Needs to be called before any data are processed.
+    /// Nothing is measured until it is called.
+    pub fn enable_stats(&mut self) {
+        if self.stats.is_some() {
+            return;
+        }
+        let mut stats = Stats::default();
+        for handler in self.handlers.iter_mut() {
+            *handler = stats.wrap(Some(handler.clone()));
+        }
+        self.stats = Some(stats);
+        self.reset_strategy();
+    }
+
+    /// Statistics of the processing (`None` when not enabled)
+    ///
+    /// Contains processed bytes, number of outputs, time spent in output conversion
+    /// and a list with number of matches,
+    /// handler calls and time spent in the handler for each handler.
+    pub fn stats(&self, py: Python) -> PyResult<Option<PyObject>> {
+        self.stats
+            .as_ref()
+            .map(|stats| stats.to_dict(py, "handlers"))
+            .transpose()
+    }
+
+    /// Drops the state of the processed input
+    ///
+    /// Matchers and handlers are kept so the strategy can be used for another input.
+    /// Note that handlers keep their own state (e.g. buffered data).
+    fn reset(&mut self) {
+        self._reset();
     }
 
     /// Processes input data
-    fn process(&mut self, input_data: &[u8]) -> PyResult<Vec<PythonOutput>> {
-        self._process(input_data)
+    fn process(&mut self, py: Python, input_data: InputData) -> PyResult<Vec<PythonOutput>> {
+        self._process(py, input_data.as_bytes())
     }
 
     /// Functions which is triggered when the input has stopped
-    fn terminate(&mut self) -> PyResult<Vec<PythonOutput>> {
-        self._terminate()
+    fn terminate(&mut self, py: Python) -> PyResult<Vec<PythonOutput>> {
+        self._terminate(py)
+    }
+
+    /// Processes input data and writes the output to the sink
+    fn process_into(
+        &mut self,
+        py: Python,
+        input_data: InputData,
+        mut sink: PyRefMut<Sink>,
+    ) -> PyResult<()> {
+        self._process_into(py, input_data.as_bytes(), &mut sink)
+    }
+
+    /// Terminates the input and writes the remaining output to the sink
+    fn terminate_into(&mut self, py: Python, mut sink: PyRefMut<Sink>) -> PyResult<()> {
+        self._terminate_into(py, &mut sink)
+    }
+
+    /// Processes input data which contain several documents (concatenated json / NDJSON)
+    ///
+    /// Returns outputs along with indexes of the documents
+    fn process_documents(
+        &mut self,
+        py: Python,
+        input_data: InputData,
+    ) -> PyResult<Vec<(usize, PythonOutput)>> {
+        self._process_documents(py, input_data.as_bytes())
+    }
+
+    /// Terminates the input which contains several documents
+    fn terminate_documents(&mut self, py: Python) -> PyResult<Vec<(usize, PythonOutput)>> {
+        self._terminate_documents(py)
     }
 }
 
@@ -47,4 +150,33 @@ impl PythonStrategy<strategy::All> for All {
     fn get_strategy(&mut self) -> &mut strategy::All {
         &mut self.all
     }
+
+    fn get_release_gil(&self) -> bool {
+        self.release_gil
+    }
+
+    fn get_path_cache(&mut self) -> &mut PathCache {
+        &mut self.path_cache
+    }
+
+    fn get_event_queues(&self) -> &[Arc<EventQueue>] {
+        &self.event_queues
+    }
+
+    fn get_documents(&mut self) -> &mut Documents {
+        &mut self.documents
+    }
+
+    fn get_stats(&mut self) -> Option<&mut Stats> {
+        self.stats.as_mut()
+    }
+
+    fn reset_strategy(&mut self) {
+        let mut all = strategy::All::new();
+        all.set_convert(self.convert);
+        for handler in &self.handlers {
+            all.add_handler(handler.clone());
+        }
+        self.all = all;
+    }
 }
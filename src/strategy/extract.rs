@@ -1,12 +1,36 @@
 use pyo3::prelude::*;
-use streamson_lib::strategy;
+use std::sync::{Arc, Mutex};
+use streamson_lib::{strategy, strategy::Output, Handler};
 
-use crate::{handler::BaseHandler, PythonOutput, PythonStrategy, RustMatcher};
+use crate::{
+    batch::{Batch, Records},
+    handler::{
+        python_batch::{event_queues, EventQueue},
+        BaseHandler,
+    },
+    input::InputData,
+    path::PathCache,
+    pattern,
+    sink::Sink,
+    skip::Skipper,
+    split::Documents,
+    stats::Stats,
+    PythonOutput, PythonStrategy, RustMatcher, SharedMatcher, StreamsonError,
+};
 
 /// Low level Python wrapper for Extract strategy
 #[pyclass]
 pub struct Extract {
     extract: strategy::Extract,
+    export_path: bool,
+    matchers: Vec<(SharedMatcher, Option<Arc<Mutex<dyn Handler>>>)>,
+    release_gil: bool,
+    records: Records,
+    path_cache: PathCache,
+    event_queues: Vec<Arc<EventQueue>>,
+    skipper: Option<Skipper>,
+    documents: Documents,
+    stats: Option<Stats>,
 }
 
 #[pymethods]
@@ -15,12 +39,29 @@ impl Extract {
     ///
     /// # Arguments
     /// * `export_path` - indicator whether path is required in further processing
+    /// * `release_gil` - parse input without holding the GIL
+    /// * `max_record_size` - max size of a single record returned by `process_records`
     #[new]
-    #[args(export_path = "None")]
-    pub fn new(export_path: Option<bool>) -> PyResult<Self> {
+    #[args(export_path = "None", release_gil = "false", max_record_size = "None")]
+    pub fn new(
+        export_path: Option<bool>,
+        release_gil: bool,
+        max_record_size: Option<usize>,
+    ) -> PyResult<Self> {
         let export_path = export_path.unwrap_or(false);
         let extract = strategy::Extract::new().set_export_path(export_path);
-        Ok(Self { extract })
+        Ok(Self {
+            extract,
+            export_path,
+            matchers: vec![],
+            release_gil,
+            records: Records::new(max_record_size),
+            path_cache: PathCache::default(),
+            event_queues: vec![],
+            skipper: None,
+            documents: Documents::default(),
+            stats: None,
+        })
     }
 
     /// Adds matcher for Extract
@@ -28,24 +69,331 @@ impl Extract {
     /// # Arguments
     /// * `matcher` - matcher to be added (`Simple`, `Depth`, ...)
     pub fn add_matcher(&mut self, matcher: &RustMatcher, handler: Option<BaseHandler>) {
-        self.extract.add_matcher(
-            Box::new(matcher.inner.clone()),
-            if let Some(hndlr) = handler {
-                Some(hndlr.inner)
-            } else {
-                None
-            },
-        );
+        if let Some(hndlr) = handler.as_ref() {
+            self.event_queues.extend(event_queues(hndlr));
+        }
+        let handler = handler.map(|hndlr| hndlr.strategy_handler());
+        let (matcher, handler) = matcher.strategy_matcher(handler);
+        let handler = match self.stats.as_mut() {
+            Some(stats) => Some(stats.wrap(handler)),
+            None => handler,
+        };
+        self.matchers.push((matcher.clone(), handler.clone()));
+        self.extract.add_matcher(Box::new(matcher), handler);
+    }
+
+    /// Skips subtrees of the input which can't be matched by any of the paths
+    ///
+    /// Needs to be called before any data are processed.
+    ///
+    /// # Arguments
+    /// * `paths` - paths of all simple matchers which were added
+    ///
+    /// # Returns
+    /// false if some path is not supported (skipping stays disabled)
+    pub fn enable_fast_skip(&mut self, paths: Vec<String>) -> bool {
+        let patterns: Result<Vec<_>, _> = paths.iter().map(|path| pattern::parse(path)).collect();
+        if let Ok(patterns) = patterns {
+            self.skipper = Some(Skipper::new(patterns));
+            true
+        } else {
+            false
+        }
+    }
+
+    /// Collects statistics of the processing (see `stats`)
+    ///
+    /// Needs to be called before any data are processed.
+    /// Nothing is measured until it is called.
+    pub fn enable_stats(&mut self) {
+        if self.stats.is_some() {
+            return;
+        }
+        let mut stats = Stats::default();
+        for (_, handler) in self.matchers.iter_mut() {
+            *handler = Some(stats.wrap(handler.take()));
+        }
+        self.stats = Some(stats);
+        self.reset_strategy();
+    }
+
+    /// Statistics of the processing (`None` when not enabled)
+    ///
+    /// Contains processed bytes, number of outputs, time spent in output conversion,
+    /// peak of bytes buffered in records and a list with number of matches,
+    /// handler calls and time spent in the handler for each matcher.
+    pub fn stats(&self, py: Python) -> PyResult<Option<PyObject>> {
+        self.stats
+            .as_ref()
+            .map(|stats| stats.to_dict(py, "matchers"))
+            .transpose()
+    }
+
+    /// Drops the state of the processed input
+    ///
+    /// Matchers and handlers are kept so the strategy can be used for another input.
+    /// Note that handlers keep their own state (e.g. buffered data).
+    fn reset(&mut self) {
+        self._reset();
+        self.records.clear();
+        if let Some(skipper) = self.skipper.as_mut() {
+            skipper.reset();
+        }
     }
 
     /// Processes input data
-    fn process(&mut self, input_data: &[u8]) -> PyResult<Vec<PythonOutput>> {
-        self._process(input_data)
+    fn process(&mut self, py: Python, input_data: InputData) -> PyResult<Vec<PythonOutput>> {
+        if let Some(data) = self.skip(py, &input_data) {
+            self._process(py, &data)
+        } else {
+            self._process(py, input_data.as_bytes())
+        }
     }
 
     /// Functions which is triggered when the input has stopped
-    fn terminate(&mut self) -> PyResult<Vec<PythonOutput>> {
-        self._terminate()
+    fn terminate(&mut self, py: Python) -> PyResult<Vec<PythonOutput>> {
+        self._terminate(py)
+    }
+
+    /// Processes input data and writes the output to the sink
+    fn process_into(
+        &mut self,
+        py: Python,
+        input_data: InputData,
+        mut sink: PyRefMut<Sink>,
+    ) -> PyResult<()> {
+        if let Some(data) = self.skip(py, &input_data) {
+            self._process_into(py, &data, &mut sink)
+        } else {
+            self._process_into(py, input_data.as_bytes(), &mut sink)
+        }
+    }
+
+    /// Terminates the input and writes the remaining output to the sink
+    fn terminate_into(&mut self, py: Python, mut sink: PyRefMut<Sink>) -> PyResult<()> {
+        self._terminate_into(py, &mut sink)
+    }
+
+    /// Processes input data and returns finished records
+    fn process_batch(&mut self, py: Python, input_data: InputData) -> PyResult<Batch> {
+        if let Some(data) = self.skip(py, &input_data) {
+            self._process_batch(py, &data)
+        } else {
+            self._process_batch(py, input_data.as_bytes())
+        }
+    }
+
+    /// Terminates the input and returns remaining records
+    fn terminate_batch(&mut self, py: Python) -> PyResult<Batch> {
+        self._terminate_batch(py)
+    }
+
+    /// Processes input data and returns finished records as (path, bytes)
+    fn process_records(
+        &mut self,
+        py: Python,
+        input_data: InputData,
+    ) -> PyResult<Vec<(Option<PyObject>, PyObject)>> {
+        if let Some(data) = self.skip(py, &input_data) {
+            self._process_records(py, &data)
+        } else {
+            self._process_records(py, input_data.as_bytes())
+        }
+    }
+
+    /// Terminates the input and returns remaining records as (path, bytes)
+    fn terminate_records(&mut self, py: Python) -> PyResult<Vec<(Option<PyObject>, PyObject)>> {
+        self._terminate_records(py)
+    }
+
+    /// Processes input data which contain several documents (concatenated json / NDJSON)
+    ///
+    /// Returns outputs along with indexes of the documents
+    fn process_documents(
+        &mut self,
+        py: Python,
+        input_data: InputData,
+    ) -> PyResult<Vec<(usize, PythonOutput)>> {
+        if let Some(data) = self.skip(py, &input_data) {
+            self._process_documents(py, &data)
+        } else {
+            self._process_documents(py, input_data.as_bytes())
+        }
+    }
+
+    /// Terminates the input which contains several documents
+    fn terminate_documents(&mut self, py: Python) -> PyResult<Vec<(usize, PythonOutput)>> {
+        self._terminate_documents(py)
+    }
+
+    /// Processes input data which contain several documents and returns finished records
+    ///
+    /// Returns records as (index of the document, path, bytes)
+    fn process_document_records(
+        &mut self,
+        py: Python,
+        input_data: InputData,
+    ) -> PyResult<Vec<(usize, Option<PyObject>, PyObject)>> {
+        let records = if let Some(data) = self.skip(py, &input_data) {
+            self._process_document_records(py, &data)?
+        } else {
+            self._process_document_records(py, input_data.as_bytes())?
+        };
+        Ok(records
+            .into_iter()
+            .map(|(index, (path, data))| (index, path, data))
+            .collect())
+    }
+
+    /// Terminates the input which contains several documents and returns remaining records
+    fn terminate_document_records(
+        &mut self,
+        py: Python,
+    ) -> PyResult<Vec<(usize, Option<PyObject>, PyObject)>> {
+        Ok(self
+            ._terminate_document_records(py)?
+            .into_iter()
+            .map(|(index, (path, data))| (index, path, data))
+            .collect())
+    }
+
+    /// Number of documents finished in the documents mode
+    #[getter]
+    fn document_count(&self) -> usize {
+        self.documents.index
+    }
+
+    /// Processes input data and returns finished records as (path, decoded object)
+    fn process_objects(
+        &mut self,
+        py: Python,
+        input_data: InputData,
+    ) -> PyResult<Vec<(Option<PyObject>, PyObject)>> {
+        if let Some(data) = self.skip(py, &input_data) {
+            self._process_objects(py, &data)
+        } else {
+            self._process_objects(py, input_data.as_bytes())
+        }
+    }
+
+    /// Terminates the input and returns remaining records as (path, decoded object)
+    fn terminate_objects(&mut self, py: Python) -> PyResult<Vec<(Option<PyObject>, PyObject)>> {
+        self._terminate_objects(py)
+    }
+}
+
+impl Extract {
+    /// Passes output of the strategy to records
+    fn _feed_records(&mut self, py: Python, output: Vec<Output>) -> PyResult<&mut Records> {
+        self.records
+            .feed(py, output)
+            .map_err(StreamsonError::new_err)?;
+        if let Some(stats) = self.stats.as_mut() {
+            stats.update_buffered(self.records.buffered());
+        }
+        Ok(&mut self.records)
+    }
+
+    /// Passes the last output of the strategy to records
+    ///
+    /// # Errors
+    /// Fails when a record is left unfinished
+    fn _finish_records(&mut self, py: Python, output: Vec<Output>) -> PyResult<&mut Records> {
+        let records = self._feed_records(py, output)?;
+        records.finish().map_err(StreamsonError::new_err)?;
+        Ok(records)
+    }
+
+    /// Processes input data and returns finished records in a single batch
+    fn _process_batch(&mut self, py: Python, input_data: &[u8]) -> PyResult<Batch> {
+        let output = self._strategy_process(py, input_data)?;
+        Ok(self._feed_records(py, output)?.take_batch(py))
+    }
+
+    /// Terminates the input and returns remaining records in a single batch
+    fn _terminate_batch(&mut self, py: Python) -> PyResult<Batch> {
+        let output = self._strategy_terminate(py)?;
+        Ok(self._finish_records(py, output)?.take_batch(py))
+    }
+
+    /// Processes input data and returns finished records
+    fn _process_records(
+        &mut self,
+        py: Python,
+        input_data: &[u8],
+    ) -> PyResult<Vec<(Option<PyObject>, PyObject)>> {
+        let output = self._strategy_process(py, input_data)?;
+        Ok(self._feed_records(py, output)?.take_records(py))
+    }
+
+    /// Terminates the input and returns remaining records
+    fn _terminate_records(&mut self, py: Python) -> PyResult<Vec<(Option<PyObject>, PyObject)>> {
+        let output = self._strategy_terminate(py)?;
+        Ok(self._finish_records(py, output)?.take_records(py))
+    }
+
+    /// Processes input data and returns finished records decoded to python objects
+    fn _process_objects(
+        &mut self,
+        py: Python,
+        input_data: &[u8],
+    ) -> PyResult<Vec<(Option<PyObject>, PyObject)>> {
+        let output = self._strategy_process(py, input_data)?;
+        self._feed_records(py, output)?
+            .take_objects(py)
+            .map_err(StreamsonError::new_err)
+    }
+
+    /// Terminates the input and returns remaining records decoded to python objects
+    fn _terminate_objects(&mut self, py: Python) -> PyResult<Vec<(Option<PyObject>, PyObject)>> {
+        let output = self._strategy_terminate(py)?;
+        self._finish_records(py, output)?
+            .take_objects(py)
+            .map_err(StreamsonError::new_err)
+    }
+
+    /// Processes input data containing several documents and returns finished records
+    ///
+    /// # Returns
+    /// Records along with indexes of the documents
+    fn _process_document_records(
+        &mut self,
+        py: Python,
+        input_data: &[u8],
+    ) -> PyResult<Vec<(usize, (Option<PyObject>, PyObject))>> {
+        self._split_documents(
+            py,
+            input_data,
+            Self::_process_records,
+            Self::_terminate_records,
+        )
+    }
+
+    /// Terminates the input containing several documents and returns remaining records
+    fn _terminate_document_records(
+        &mut self,
+        py: Python,
+    ) -> PyResult<Vec<(usize, (Option<PyObject>, PyObject))>> {
+        self._finish_documents(py, Self::_terminate_records)
+    }
+
+    /// Removes parts of the input which can't be matched (if enabled)
+    ///
+    /// Returns `None` when the input should be processed as it is
+    /// (skipping is disabled or nothing was skipped).
+    fn skip(&mut self, py: Python, input_data: &InputData) -> Option<Vec<u8>> {
+        let skipper = self.skipper.as_mut()?;
+        let input = input_data.as_bytes();
+        let data = if self.release_gil {
+            py.allow_threads(|| skipper.process(input))
+        } else {
+            skipper.process(input)
+        }?;
+        // the strategy counts only the data which it parses
+        if let Some(stats) = self.stats.as_mut() {
+            stats.bytes += input.len().saturating_sub(data.len()) as u64;
+        }
+        Some(data)
     }
 }
 
@@ -53,4 +401,32 @@ impl PythonStrategy<strategy::Extract> for Extract {
     fn get_strategy(&mut self) -> &mut strategy::Extract {
         &mut self.extract
     }
+
+    fn get_release_gil(&self) -> bool {
+        self.release_gil
+    }
+
+    fn get_path_cache(&mut self) -> &mut PathCache {
+        &mut self.path_cache
+    }
+
+    fn get_event_queues(&self) -> &[Arc<EventQueue>] {
+        &self.event_queues
+    }
+
+    fn get_documents(&mut self) -> &mut Documents {
+        &mut self.documents
+    }
+
+    fn get_stats(&mut self) -> Option<&mut Stats> {
+        self.stats.as_mut()
+    }
+
+    fn reset_strategy(&mut self) {
+        let mut extract = strategy::Extract::new().set_export_path(self.export_path);
+        for (matcher, handler) in &self.matchers {
+            extract.add_matcher(Box::new(matcher.clone()), handler.clone());
+        }
+        self.extract = extract;
+    }
 }
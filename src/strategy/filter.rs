@@ -1,21 +1,51 @@
 use pyo3::prelude::*;
-use streamson_lib::strategy;
+use std::sync::{Arc, Mutex};
+use streamson_lib::{strategy, Handler};
 
-use crate::{handler::BaseHandler, PythonOutput, PythonStrategy, RustMatcher};
+use crate::{
+    handler::{
+        python_batch::{event_queues, EventQueue},
+        BaseHandler,
+    },
+    input::InputData,
+    path::PathCache,
+    sink::Sink,
+    split::Documents,
+    stats::Stats,
+    PythonOutput, PythonStrategy, RustMatcher, SharedMatcher,
+};
 
 /// Low level Python wrapper for Filter strategy
 #[pyclass]
 pub struct Filter {
     filter: strategy::Filter,
+    matchers: Vec<(SharedMatcher, Option<Arc<Mutex<dyn Handler>>>)>,
+    release_gil: bool,
+    path_cache: PathCache,
+    event_queues: Vec<Arc<EventQueue>>,
+    documents: Documents,
+    stats: Option<Stats>,
 }
 
 #[pymethods]
 impl Filter {
     /// Create a new instance of Filter
+    ///
+    /// # Arguments
+    /// * `release_gil` - parse input without holding the GIL
     #[new]
-    pub fn new() -> PyResult<Self> {
+    #[args(release_gil = "false")]
+    pub fn new(release_gil: bool) -> PyResult<Self> {
         let filter = strategy::Filter::new();
-        Ok(Self { filter })
+        Ok(Self {
+            filter,
+            matchers: vec![],
+            release_gil,
+            path_cache: PathCache::default(),
+            event_queues: vec![],
+            documents: Documents::default(),
+            stats: None,
+        })
     }
 
     /// Adds matcher for Filter
@@ -23,24 +53,94 @@ impl Filter {
     /// # Arguments
     /// * `matcher` - matcher to be added (`Simple`, `Depth`, ...)
     pub fn add_matcher(&mut self, matcher: &RustMatcher, handler: Option<BaseHandler>) {
-        self.filter.add_matcher(
-            Box::new(matcher.inner.clone()),
-            if let Some(hndlr) = handler {
-                Some(hndlr.inner)
-            } else {
-                None
-            },
-        );
+        if let Some(hndlr) = handler.as_ref() {
+            self.event_queues.extend(event_queues(hndlr));
+        }
+        let handler = handler.map(|hndlr| hndlr.strategy_handler());
+        let (matcher, handler) = matcher.strategy_matcher(handler);
+        let handler = match self.stats.as_mut() {
+            Some(stats) => Some(stats.wrap(handler)),
+            None => handler,
+        };
+        self.matchers.push((matcher.clone(), handler.clone()));
+        self.filter.add_matcher(Box::new(matcher), handler);
+    }
+
+    /// Collects statistics of the processing (see `stats`)
+    ///
+    /// Needs to be called before any data are processed.
+    /// Nothing is measured until it is called.
+    pub fn enable_stats(&mut self) {
+        if self.stats.is_some() {
+            return;
+        }
+        let mut stats = Stats::default();
+        for (_, handler) in self.matchers.iter_mut() {
+            *handler = Some(stats.wrap(handler.take()));
+        }
+        self.stats = Some(stats);
+        self.reset_strategy();
+    }
+
+    /// Statistics of the processing (`None` when not enabled)
+    ///
+    /// Contains processed bytes, number of outputs, time spent in output conversion
+    /// and a list with number of matches,
+    /// handler calls and time spent in the handler for each matcher.
+    pub fn stats(&self, py: Python) -> PyResult<Option<PyObject>> {
+        self.stats
+            .as_ref()
+            .map(|stats| stats.to_dict(py, "matchers"))
+            .transpose()
+    }
+
+    /// Drops the state of the processed input
+    ///
+    /// Matchers and handlers are kept so the strategy can be used for another input.
+    /// Note that handlers keep their own state (e.g. buffered data).
+    fn reset(&mut self) {
+        self._reset();
     }
 
     /// Processes input data
-    fn process(&mut self, input_data: &[u8]) -> PyResult<Vec<PythonOutput>> {
-        self._process(input_data)
+    fn process(&mut self, py: Python, input_data: InputData) -> PyResult<Vec<PythonOutput>> {
+        self._process(py, input_data.as_bytes())
     }
 
     /// Functions which is triggered when the input has stopped
-    fn terminate(&mut self) -> PyResult<Vec<PythonOutput>> {
-        self._terminate()
+    fn terminate(&mut self, py: Python) -> PyResult<Vec<PythonOutput>> {
+        self._terminate(py)
+    }
+
+    /// Processes input data and writes the output to the sink
+    fn process_into(
+        &mut self,
+        py: Python,
+        input_data: InputData,
+        mut sink: PyRefMut<Sink>,
+    ) -> PyResult<()> {
+        self._process_into(py, input_data.as_bytes(), &mut sink)
+    }
+
+    /// Terminates the input and writes the remaining output to the sink
+    fn terminate_into(&mut self, py: Python, mut sink: PyRefMut<Sink>) -> PyResult<()> {
+        self._terminate_into(py, &mut sink)
+    }
+
+    /// Processes input data which contain several documents (concatenated json / NDJSON)
+    ///
+    /// Returns outputs along with indexes of the documents
+    fn process_documents(
+        &mut self,
+        py: Python,
+        input_data: InputData,
+    ) -> PyResult<Vec<(usize, PythonOutput)>> {
+        self._process_documents(py, input_data.as_bytes())
+    }
+
+    /// Terminates the input which contains several documents
+    fn terminate_documents(&mut self, py: Python) -> PyResult<Vec<(usize, PythonOutput)>> {
+        self._terminate_documents(py)
     }
 }
 
@@ -48,4 +148,32 @@ impl PythonStrategy<strategy::Filter> for Filter {
     fn get_strategy(&mut self) -> &mut strategy::Filter {
         &mut self.filter
     }
+
+    fn get_release_gil(&self) -> bool {
+        self.release_gil
+    }
+
+    fn get_path_cache(&mut self) -> &mut PathCache {
+        &mut self.path_cache
+    }
+
+    fn get_event_queues(&self) -> &[Arc<EventQueue>] {
+        &self.event_queues
+    }
+
+    fn get_documents(&mut self) -> &mut Documents {
+        &mut self.documents
+    }
+
+    fn get_stats(&mut self) -> Option<&mut Stats> {
+        self.stats.as_mut()
+    }
+
+    fn reset_strategy(&mut self) {
+        let mut filter = strategy::Filter::new();
+        for (matcher, handler) in &self.matchers {
+            filter.add_matcher(Box::new(matcher.clone()), handler.clone());
+        }
+        self.filter = filter;
+    }
 }
@@ -1,12 +1,32 @@
 use pyo3::prelude::*;
-use streamson_lib::strategy;
+use std::sync::{Arc, Mutex};
+use streamson_lib::{strategy, Handler};
 
-use crate::{handler::BaseHandler, PythonOutput, PythonStrategy, RustMatcher};
+use crate::{
+    handler::{
+        buffer::{limited_buffers, min_space_left},
+        python_batch::{event_queues, EventQueue},
+        BaseHandler,
+    },
+    input::InputData,
+    path::PathCache,
+    split::Documents,
+    stats::Stats,
+    PythonOutput, PythonStrategy, RustMatcher, SharedMatcher,
+};
 
 /// Low level Python wrapper for Trigger strategy
 #[pyclass]
 pub struct Trigger {
     trigger: strategy::Trigger,
+    matchers: Vec<(SharedMatcher, Arc<Mutex<dyn Handler>>)>,
+    release_gil: bool,
+    path_cache: PathCache,
+    event_queues: Vec<Arc<EventQueue>>,
+    /// Buffers which limit the records kept in memory
+    buffers: Vec<Arc<Mutex<dyn Handler>>>,
+    documents: Documents,
+    stats: Option<Stats>,
 }
 
 #[pymethods]
@@ -14,11 +34,21 @@ impl Trigger {
     /// Create a new instance of Trigger
     ///
     /// # Arguments
-    /// * `export_path` - indicator whether path is required in further processing
+    /// * `release_gil` - parse input without holding the GIL
     #[new]
-    pub fn new() -> PyResult<Self> {
+    #[args(release_gil = "false")]
+    pub fn new(release_gil: bool) -> PyResult<Self> {
         let trigger = strategy::Trigger::new();
-        Ok(Self { trigger })
+        Ok(Self {
+            trigger,
+            matchers: vec![],
+            release_gil,
+            path_cache: PathCache::default(),
+            event_queues: vec![],
+            buffers: vec![],
+            documents: Documents::default(),
+            stats: None,
+        })
     }
 
     /// Adds matcher for Trigger
@@ -26,18 +56,107 @@ impl Trigger {
     /// # Arguments
     /// * `matcher` - matcher to be added (`Simple`, `Depth`, ...)
     pub fn add_matcher(&mut self, matcher: &RustMatcher, handler: &BaseHandler) {
-        self.trigger
-            .add_matcher(Box::new(matcher.inner.clone()), handler.inner.clone());
+        self.event_queues.extend(event_queues(handler));
+        self.buffers.extend(limited_buffers(handler));
+        let (matcher, handler) = matcher.strategy_matcher(Some(handler.strategy_handler()));
+        let handler = match self.stats.as_mut() {
+            Some(stats) => stats.wrap(handler),
+            // handler is always returned when it is passed
+            None => handler.unwrap(),
+        };
+        self.matchers.push((matcher.clone(), handler.clone()));
+        self.trigger.add_matcher(Box::new(matcher), handler);
+    }
+
+    /// Collects statistics of the processing (see `stats`)
+    ///
+    /// Needs to be called before any data are processed.
+    /// Nothing is measured until it is called.
+    pub fn enable_stats(&mut self) {
+        if self.stats.is_some() {
+            return;
+        }
+        let mut stats = Stats::default();
+        for (_, handler) in self.matchers.iter_mut() {
+            *handler = stats.wrap(Some(handler.clone()));
+        }
+        self.stats = Some(stats);
+        self.reset_strategy();
+    }
+
+    /// Statistics of the processing (`None` when not enabled)
+    ///
+    /// Contains processed bytes, number of outputs, time spent in output conversion
+    /// and a list with number of matches,
+    /// handler calls and time spent in the handler for each matcher.
+    pub fn stats(&self, py: Python) -> PyResult<Option<PyObject>> {
+        self.stats
+            .as_ref()
+            .map(|stats| stats.to_dict(py, "matchers"))
+            .transpose()
+    }
+
+    /// Drops the state of the processed input
+    ///
+    /// Matchers and handlers are kept so the strategy can be used for another input.
+    /// Note that handlers keep their own state (e.g. buffered data).
+    fn reset(&mut self) {
+        self._reset();
     }
 
     /// Processes input data
-    fn process(&mut self, input_data: &[u8]) -> PyResult<Vec<PythonOutput>> {
-        self._process(input_data)
+    fn process(&mut self, py: Python, input_data: InputData) -> PyResult<Vec<PythonOutput>> {
+        self._process(py, input_data.as_bytes())
+    }
+
+    /// Processes input data until a `BufferHandler` with `max_buffered` is full
+    ///
+    /// The input is passed to the strategy in parts which are not larger
+    /// than the space left in the buffers, so the limit can be exceeded
+    /// only by the record which was finished last.
+    ///
+    /// # Returns
+    /// Output and the number of processed bytes
+    /// (the rest of the input should be passed again once the records are removed)
+    fn process_until_full(
+        &mut self,
+        py: Python,
+        input_data: InputData,
+    ) -> PyResult<(Vec<PythonOutput>, usize)> {
+        let input_data = input_data.as_bytes();
+        let mut output = vec![];
+        let mut processed = 0;
+        while processed < input_data.len() {
+            let end = match min_space_left(&self.buffers) {
+                Some(0) => break,
+                Some(space_left) => input_data.len().min(processed + space_left),
+                None => input_data.len(),
+            };
+            output.extend(self._process(py, &input_data[processed..end])?);
+            processed = end;
+        }
+        Ok((output, processed))
     }
 
     /// Functions which is triggered when the input has stopped
-    fn terminate(&mut self) -> PyResult<Vec<PythonOutput>> {
-        self._terminate()
+    fn terminate(&mut self, py: Python) -> PyResult<Vec<PythonOutput>> {
+        self._terminate(py)
+    }
+
+    /// Processes input data which contain several documents (concatenated json / NDJSON)
+    ///
+    /// Returns outputs along with indexes of the documents
+    fn process_documents(
+        &mut self,
+        py: Python,
+        input_data: InputData,
+    ) -> PyResult<Vec<(usize, PythonOutput)>> {
+        self._process_documents(py, input_data.as_bytes())
+    }
+
+    /// Terminates the input which contains several documents
+    fn terminate_documents(&mut self, py: Python) -> PyResult<Vec<(usize, PythonOutput)>> {
+        self._terminate_documents(py)
     }
 }
 
@@ -45,4 +164,32 @@ impl PythonStrategy<strategy::Trigger> for Trigger {
     fn get_strategy(&mut self) -> &mut strategy::Trigger {
         &mut self.trigger
     }
+
+    fn get_release_gil(&self) -> bool {
+        self.release_gil
+    }
+
+    fn get_path_cache(&mut self) -> &mut PathCache {
+        &mut self.path_cache
+    }
+
+    fn get_event_queues(&self) -> &[Arc<EventQueue>] {
+        &self.event_queues
+    }
+
+    fn get_documents(&mut self) -> &mut Documents {
+        &mut self.documents
+    }
+
+    fn get_stats(&mut self) -> Option<&mut Stats> {
+        self.stats.as_mut()
+    }
+
+    fn reset_strategy(&mut self) {
+        let mut trigger = strategy::Trigger::new();
+        for (matcher, handler) in &self.matchers {
+            trigger.add_matcher(Box::new(matcher.clone()), handler.clone());
+        }
+        self.trigger = trigger;
+    }
 }
@@ -1,8 +1,20 @@
 from .all import all_async, all_fd, all_iter  # noqa
 from .convert import convert_async, convert_fd, convert_iter  # noqa
-from .extract import extract_async, extract_fd, extract_iter  # noqa
+from .extract import (  # noqa
+    extract_async,
+    extract_fd,
+    extract_iter,
+    extract_objects_fd,
+    extract_objects_iter,
+    extract_records_fd,
+    extract_records_iter,
+)
+from .fanout import fanout_fd, fanout_iter  # noqa
 from .filter import filter_async, filter_fd, filter_iter  # noqa
 from .handler import *  # noqa
-from .matcher import DepthMatcher, Matcher, RegexMatcher, SimpleMatcher  # noqa
-from .output import Output  # noqa
+from .matcher import DepthMatcher, Matcher, MatcherSet, RegexMatcher, SimpleMatcher  # noqa
+from .output import Batch, Output, Sink  # noqa
+from .parallel import extract_ndjson_parallel, extract_parallel  # noqa
+from .pipeline import Pipeline, PipelinePool  # noqa
+from .streamson import __version__  # noqa
 from .trigger import trigger_async, trigger_fd, trigger_iter  # noqa
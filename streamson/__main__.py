@@ -3,9 +3,8 @@ import sys
 import typing
 from enum import Enum, auto
 
-import pkg_resources
-
 import streamson
+from streamson.input import InputData, read_chunks
 
 
 class Matcher(Enum):
@@ -248,7 +247,7 @@ def build_matchers_and_handlers(
     return groups, matchers, handlers
 
 
-def all_strategy(parsed: argparse.Namespace, input_gen: typing.Generator[bytes, None, None]):
+def all_strategy(parsed: argparse.Namespace, input_gen: typing.Generator[InputData, None, None]):
     groups, _, handlers = build_matchers_and_handlers(parsed, Strategy.ALL)
     is_converter = any(e["handler"].is_converter() for e in groups.values())
 
@@ -257,20 +256,19 @@ def all_strategy(parsed: argparse.Namespace, input_gen: typing.Generator[bytes,
     for record in groups.values():
         all_strategy.add_handler(record["handler"])
 
+    sink = streamson.Sink()
     for item in input_gen:
-        for output in all_strategy.process(item):
-            if is_converter and output and output[1]:
-                sys.stdout.write(output[1].decode())
-
-        if not is_converter:
-            sys.stdout.write(item.decode())
+        if is_converter:
+            all_strategy.process_into(item, sink)
+        else:
+            all_strategy.process(item)
+            sink.write(item)
 
     if is_converter:
-        for output in all_strategy.terminate():
-            if output and output[1]:
-                sys.stdout.write(output[1].decode())
+        all_strategy.terminate_into(sink)
     else:
         all_strategy.terminate()
+    sink.close()
 
     for handler in handlers:
         # analyser handler specific
@@ -280,95 +278,77 @@ def all_strategy(parsed: argparse.Namespace, input_gen: typing.Generator[bytes,
                 print(f"  {item[0] or '<root>'}: {item[1]}", file=sys.stderr)
 
 
-def filter_strategy(parsed: argparse.Namespace, input_gen: typing.Generator[bytes, None, None]):
+def filter_strategy(parsed: argparse.Namespace, input_gen: typing.Generator[InputData, None, None]):
     groups, _, _ = build_matchers_and_handlers(parsed, Strategy.FILTER)
     fltr = streamson.filter.Filter()
 
     for record in groups.values():
         fltr.add_matcher(record["matcher"].inner, record["handler"])
 
+    sink = streamson.Sink()
     for item in input_gen:
-        for output in fltr.process(item):
-            if output and output[1]:
-                sys.stdout.write(output[1].decode())
+        fltr.process_into(item, sink)
 
-    for output in fltr.terminate():
-        if output and output[1]:
-            sys.stdout.write(output[1].decode())
+    fltr.terminate_into(sink)
+    sink.close()
 
 
-def extract_strategy(parsed: argparse.Namespace, input_gen: typing.Generator[bytes, None, None]):
+def extract_strategy(parsed: argparse.Namespace, input_gen: typing.Generator[InputData, None, None]):
     groups, _, _ = build_matchers_and_handlers(parsed, Strategy.EXTRACT)
     extract = streamson.extract.Extract()
 
     for record in groups.values():
         extract.add_matcher(record["matcher"].inner, record["handler"])
 
-    sys.stdout.write(parsed.before)
-    first = True
+    sink = streamson.Sink(separator=parsed.separator, before=parsed.before, after=parsed.after)
     for item in input_gen:
-        for output in extract.process(item):
-            if output:
-                path, data = output
-                if data:
-                    sys.stdout.write(data.decode())
-                else:
-                    if not first:
-                        sys.stdout.write(parsed.separator)
-                    else:
-                        first = False
-
-    for output in extract.terminate():
-        if output:
-            path, data = output
-            if data:
-                sys.stdout.write(data.decode())
-            if path:
-                if not first:
-                    sys.stdout.write(parsed.separator)
-                else:
-                    first = False
-
-    sys.stdout.write(parsed.after)
-
-
-def convert_strategy(parsed: argparse.Namespace, input_gen: typing.Generator[bytes, None, None]):
+        extract.process_into(item, sink)
+
+    extract.terminate_into(sink)
+    sink.close()
+
+
+def convert_strategy(parsed: argparse.Namespace, input_gen: typing.Generator[InputData, None, None]):
     groups, _, _ = build_matchers_and_handlers(parsed, Strategy.CONVERT)
     convert = streamson.convert.Convert()
 
     for record in groups.values():
         convert.add_matcher(record["matcher"].inner, record["handler"])
 
+    sink = streamson.Sink()
     for item in input_gen:
-        for output in convert.process(item):
-            if output and output[1]:
-                sys.stdout.write(output[1].decode())
+        convert.process_into(item, sink)
 
-    for output in convert.terminate():
-        if output and output[1]:
-            sys.stdout.write(output[1].decode())
+    convert.terminate_into(sink)
+    sink.close()
 
 
-def trigger_strategy(parsed: argparse.Namespace, input_gen: typing.Generator[bytes, None, None]):
+def trigger_strategy(parsed: argparse.Namespace, input_gen: typing.Generator[InputData, None, None]):
     groups, _, _ = build_matchers_and_handlers(parsed, Strategy.TRIGGER)
     trigger = streamson.trigger.Trigger()
 
     for record in groups.values():
         trigger.add_matcher(record["matcher"].inner, record["handler"])
 
+    sink = streamson.Sink()
     for item in input_gen:
         trigger.process(item)
-        sys.stdout.write(item.decode())
+        sink.write(item)
 
     trigger.terminate()
+    sink.close()
 
 
 def main():
-    version = pkg_resources.get_distribution("streamson-python").version
-
     parser = argparse.ArgumentParser(prog="streamson", add_help=False)
-    parser.add_argument("--version", action="version", version=version)
+    parser.add_argument("--version", action="version", version=streamson.__version__)
     parser.add_argument("-b", "--buffer-size", type=int, default=2 ** 20)
+    parser.add_argument(
+        "--compression",
+        choices=["auto", "gzip", "zstd", "none"],
+        help="Decompresses the input (auto detects the compression from the input)",
+        default=None,
+    )
 
     strategies = parser.add_subparsers(help="strategies", dest="strategy")
     strategies.required = True
@@ -380,22 +360,25 @@ def main():
 
     options = parser.parse_args()
 
-    def input_generator() -> typing.Generator[bytes, None, None]:
-        output = sys.stdin.buffer.read(options.buffer_size)
-        while len(output) > 0:
-            yield output
-            output = sys.stdin.buffer.read(options.buffer_size)
-
-    if options.strategy == "filter":
-        filter_strategy(options, input_generator())
-    elif options.strategy == "extract":
-        extract_strategy(options, input_generator())
-    elif options.strategy == "convert":
-        convert_strategy(options, input_generator())
-    elif options.strategy == "trigger":
-        trigger_strategy(options, input_generator())
-    elif options.strategy == "all":
-        all_strategy(options, input_generator())
+    def input_generator() -> typing.Generator[InputData, None, None]:
+        yield from read_chunks(
+            sys.stdin.buffer, options.buffer_size, reuse_buffer=True, compression=options.compression
+        )
+
+    try:
+        if options.strategy == "filter":
+            filter_strategy(options, input_generator())
+        elif options.strategy == "extract":
+            extract_strategy(options, input_generator())
+        elif options.strategy == "convert":
+            convert_strategy(options, input_generator())
+        elif options.strategy == "trigger":
+            trigger_strategy(options, input_generator())
+        elif options.strategy == "all":
+            all_strategy(options, input_generator())
+    except BrokenPipeError:
+        # output was closed by the reader (e.g. `streamson ... | head`)
+        sys.exit(1)
 
 
 if __name__ == "__main__":
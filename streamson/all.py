@@ -1,33 +1,46 @@
 import typing
 
-from streamson.output import PythonOutput
+from streamson.output import DocumentOutput, PythonOutput
 from streamson.streamson import All
 
 from .handler import BaseHandler
+from .input import AsyncInput, process_async, read_chunks
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from concurrent.futures import Executor
 
 
 def all_iter(
     input_gen: typing.Generator[bytes, None, None],
     handlers: typing.List[BaseHandler],
     convert: bool = True,
-) -> typing.Generator[PythonOutput, None, None]:
+    release_gil: bool = False,
+    documents: bool = False,
+) -> typing.Generator[typing.Union[PythonOutput, DocumentOutput], None, None]:
     """Applies handler to all json parts from generator
     :param: input_gen: input generator
     :param: handlers: functions used to convert/process raw data
     :param: convert: should handler be used to convert the output
+    :param: release_gil: parse without holding the GIL (allows running in threads)
+    :param: documents: input contains several json documents (concatenated json / NDJSON)
 
-    :yields: filtered data
+    :yields: filtered data (with document index in documents mode)
     """
-    all_strategy = All(convert)
+    all_strategy = All(convert, release_gil)
 
     for handler in handlers:
         all_strategy.add_handler(handler)
+    process, terminate = (
+        (all_strategy.process_documents, all_strategy.terminate_documents)
+        if documents
+        else (all_strategy.process, all_strategy.terminate)
+    )
 
     for input_item in input_gen:
-        for item in all_strategy.process(input_item):
+        for item in process(input_item):
             yield item
 
-    for item in all_strategy.terminate():
+    for item in terminate():
         yield item
 
 
@@ -36,49 +49,65 @@ def all_fd(
     handlers: typing.List[BaseHandler],
     convert: bool = True,
     buffer_size: int = 1024 * 1024,
-) -> typing.Generator[PythonOutput, None, None]:
+    release_gil: bool = False,
+    use_mmap: bool = False,
+    reuse_buffer: bool = False,
+    compression: typing.Optional[str] = None,
+    documents: bool = False,
+) -> typing.Generator[typing.Union[PythonOutput, DocumentOutput], None, None]:
     """Applies handler to all json parts from input file
     :param: input_fd: input fd
     :param: handlers: functions used to convert/process raw data
     :param: convert: should handler be used to convert the output
     :param: buffer_size: how many bytes can be read from a file at once
+    :param: release_gil: parse without holding the GIL (allows running in threads)
+    :param: use_mmap: map the file into memory instead of reading it (regular files only)
+    :param: reuse_buffer: read into a single preallocated buffer (chunks are overwritten)
+    :param: compression: decompress the input in a separate thread ("gzip", "zstd" or "auto")
+    :param: documents: input contains several json documents (concatenated json / NDJSON)
 
-    :yields: filtered data
+    :yields: filtered data (with document index in documents mode)
     """
-    all_strategy = All(convert)
+    all_strategy = All(convert, release_gil)
     for handler in handlers:
         all_strategy.add_handler(handler)
-
-    input_data = input_fd.read(buffer_size)
-
-    while input_data:
-        for item in all_strategy.process(input_data):
+    process, terminate = (
+        (all_strategy.process_documents, all_strategy.terminate_documents)
+        if documents
+        else (all_strategy.process, all_strategy.terminate)
+    )
+
+    for input_data in read_chunks(input_fd, buffer_size, use_mmap, reuse_buffer, compression):
+        for item in process(input_data):
             yield item
-        input_data = input_fd.read(buffer_size)
 
-    for item in all_strategy.terminate():
+    for item in terminate():
         yield item
 
 
 async def all_async(
-    input_gen: typing.AsyncGenerator[bytes, None],
+    input_gen: AsyncInput,
     handlers: typing.List[BaseHandler],
     convert: bool = True,
+    buffer_size: int = 1024 * 1024,
+    read_ahead: int = 4,
+    executor: typing.Optional["Executor"] = None,
 ):
     """Applies handler to all json parts from async generator
-    :param: input_gen: input generator
+    :param: input_gen: async input generator or asyncio.StreamReader
     :param: handlers: functions used to convert/process raw data
     :param: convert: should handler be used to convert the output
+    :param: buffer_size: how many bytes can be read from a stream reader at once
+    :param: read_ahead: how many chunks can be read ahead while the parsing is in progress
+    :param: executor: executor where the parsing runs (default executor of the loop if not set)
 
     :yields: filtered data
     """
-    all_strategy = All(convert)
+    all_strategy = All(convert, True)
     for handler in handlers:
         all_strategy.add_handler(handler)
 
-    async for input_data in input_gen:
-        for item in all_strategy.process(input_data):
-            yield item
-
-    for item in all_strategy.terminate():
+    async for item in process_async(
+        all_strategy.process, all_strategy.terminate, input_gen, buffer_size, read_ahead, executor
+    ):
         yield item
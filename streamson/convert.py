@@ -1,31 +1,42 @@
 import typing
 
-from streamson.output import PythonOutput
+from streamson.output import DocumentOutput, PythonOutput
 from streamson.streamson import Convert
 
 from .handler import BaseHandler
+from .input import AsyncInput, process_async, read_chunks
 from .matcher import Matcher
 
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from concurrent.futures import Executor
+
 
 def convert_iter(
     input_gen: typing.Generator[bytes, None, None],
     matchers_and_handlers: typing.List[typing.Tuple[Matcher, BaseHandler]],
-) -> typing.Generator[PythonOutput, None, None]:
+    release_gil: bool = False,
+    documents: bool = False,
+) -> typing.Generator[typing.Union[PythonOutput, DocumentOutput], None, None]:
     """Converts handlers on matched data from a file description
     :param input_gen: input generator
     :param matchers_and_handlers: handler and matchers combination
+    :param: release_gil: parse without holding the GIL (allows running in threads)
+    :param: documents: input contains several json documents (concatenated json / NDJSON)
 
-    :yields: converted data
+    :yields: converted data (with document index in documents mode)
     """
-    convert = Convert()
+    convert = Convert(release_gil)
     for matcher, handler in matchers_and_handlers:
         convert.add_matcher(matcher.inner, handler)
+    process, terminate = (
+        (convert.process_documents, convert.terminate_documents) if documents else (convert.process, convert.terminate)
+    )
 
     for item in input_gen:
-        for output in convert.process(item):
+        for output in process(item):
             yield output
 
-    for output in convert.terminate():
+    for output in terminate():
         yield output
 
 
@@ -33,46 +44,58 @@ def convert_fd(
     input_fd: typing.IO[bytes],
     matchers_and_handlers: typing.List[typing.Tuple[Matcher, BaseHandler]],
     buffer_size: int = 1024 * 1024,
-) -> typing.Generator[PythonOutput, None, None]:
+    release_gil: bool = False,
+    use_mmap: bool = False,
+    reuse_buffer: bool = False,
+    compression: typing.Optional[str] = None,
+    documents: bool = False,
+) -> typing.Generator[typing.Union[PythonOutput, DocumentOutput], None, None]:
     """Converts handlers on matched data from a file description
     :param input_fd: input generator
     :param matchers_and_handlers: handler and matchers combination
     :param: buffer_size: how many bytes can be read from a file at once
+    :param: release_gil: parse without holding the GIL (allows running in threads)
+    :param: use_mmap: map the file into memory instead of reading it (regular files only)
+    :param: reuse_buffer: read into a single preallocated buffer (chunks are overwritten)
+    :param: compression: decompress the input in a separate thread ("gzip", "zstd" or "auto")
+    :param: documents: input contains several json documents (concatenated json / NDJSON)
 
-    :yields: converted data
+    :yields: converted data (with document index in documents mode)
     """
-    convert = Convert()
+    convert = Convert(release_gil)
     for matcher, handler in matchers_and_handlers:
         convert.add_matcher(matcher.inner, handler)
+    process, terminate = (
+        (convert.process_documents, convert.terminate_documents) if documents else (convert.process, convert.terminate)
+    )
 
-    input_data = input_fd.read(buffer_size)
-
-    while input_data:
-        for item in convert.process(input_data):
+    for input_data in read_chunks(input_fd, buffer_size, use_mmap, reuse_buffer, compression):
+        for item in process(input_data):
             yield item
-        input_data = input_fd.read(buffer_size)
 
-    for output in convert.terminate():
+    for output in terminate():
         yield output
 
 
 async def convert_async(
-    input_gen: typing.AsyncGenerator[bytes, None],
+    input_gen: AsyncInput,
     matchers_and_handlers: typing.List[typing.Tuple[Matcher, BaseHandler]],
+    buffer_size: int = 1024 * 1024,
+    read_ahead: int = 4,
+    executor: typing.Optional["Executor"] = None,
 ) -> typing.AsyncGenerator[PythonOutput, None]:
     """Convert handlers on matched data from async generator
-    :param: input_gen: input generator
+    :param: input_gen: async input generator or asyncio.StreamReader
     :param matchers_and_handlers: handler and matchers combination
+    :param: buffer_size: how many bytes can be read from a stream reader at once
+    :param: read_ahead: how many chunks can be read ahead while the parsing is in progress
+    :param: executor: executor where the parsing runs (default executor of the loop if not set)
 
     :yields: input data
     """
-    convert = Convert()
+    convert = Convert(True)
     for matcher, handler in matchers_and_handlers:
         convert.add_matcher(matcher.inner, handler)
 
-    async for input_data in input_gen:
-        for item in convert.process(input_data):
-            yield item
-
-    for output in convert.terminate():
-        yield output
+    async for item in process_async(convert.process, convert.terminate, input_gen, buffer_size, read_ahead, executor):
+        yield item
@@ -1,32 +1,73 @@
 import typing
+import warnings
 
-from streamson.output import PythonOutput
+from streamson.output import DocumentOutput, PythonOutput
 from streamson.streamson import Extract
 
 from .handler import BaseHandler
+from .input import AsyncInput, process_async, read_chunks
 from .matcher import Matcher
 
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from concurrent.futures import Executor
+
+
+def _enable_fast_skip(
+    extract: Extract,
+    matchers_and_handlers: typing.List[typing.Tuple[Matcher, typing.Optional[BaseHandler]]],
+) -> bool:
+    """Enables skipping of unmatchable subtrees when only simple matchers are used
+    Warns when the skipping can't be enabled.
+
+    :param: extract: extract strategy
+    :param matchers_and_handlers: handler and matchers combination
+
+    :returns: whether skipping was enabled
+    """
+    paths: typing.List[str] = []
+    for matcher, _ in matchers_and_handlers:
+        if matcher.simple_paths is None:
+            break
+        paths.extend(matcher.simple_paths)
+    else:
+        if extract.enable_fast_skip(paths):
+            return True
+
+    warnings.warn("fast_skip is disabled (supported only for simple matchers)", RuntimeWarning, stacklevel=3)
+    return False
+
 
 def extract_iter(
     input_gen: typing.Generator[bytes, None, None],
     matchers_and_handlers: typing.List[typing.Tuple[Matcher, typing.Optional[BaseHandler]]],
     require_path: bool = True,
-) -> typing.Generator[PythonOutput, None, None]:
+    release_gil: bool = False,
+    fast_skip: bool = False,
+    documents: bool = False,
+) -> typing.Generator[typing.Union[PythonOutput, DocumentOutput], None, None]:
     """Extracts json from generator specified by given matcher
     :param: input_gen: input generator
     :param matchers_and_handlers: handler and matchers combination
     :param: require_path: is path required in output stream
+    :param: release_gil: parse without holding the GIL (allows running in threads)
+    :param: fast_skip: skip unmatchable subtrees before parsing (simple matchers only)
+    :param: documents: input contains several json documents (concatenated json / NDJSON)
 
-    :yields: path and converted data
+    :yields: path and converted data (with document index in documents mode)
     """
-    extract = Extract(require_path)
+    extract = Extract(require_path, release_gil)
     for matcher, handler in matchers_and_handlers:
         extract.add_matcher(matcher.inner, handler)
+    if fast_skip:
+        _enable_fast_skip(extract, matchers_and_handlers)
+    process, terminate = (
+        (extract.process_documents, extract.terminate_documents) if documents else (extract.process, extract.terminate)
+    )
     for item in input_gen:
-        for output in extract.process(item):
+        for output in process(item):
             yield output
 
-    for output in extract.terminate():
+    for output in terminate():
         yield output
 
 
@@ -35,49 +76,207 @@ def extract_fd(
     matchers_and_handlers: typing.List[typing.Tuple[Matcher, typing.Optional[BaseHandler]]],
     buffer_size: int = 1024 * 1024,
     require_path: bool = True,
-) -> typing.Generator[PythonOutput, None, None]:
+    release_gil: bool = False,
+    use_mmap: bool = False,
+    reuse_buffer: bool = False,
+    compression: typing.Optional[str] = None,
+    fast_skip: bool = False,
+    documents: bool = False,
+) -> typing.Generator[typing.Union[PythonOutput, DocumentOutput], None, None]:
     """Extracts json from input file specified by given matcher
     :param: input_fd: input fd
     :param matchers_and_handlers: handler and matchers combination
     :param: buffer_size: how many bytes can be read from a file at once
     :param: require_path: is path required in output stream
+    :param: release_gil: parse without holding the GIL (allows running in threads)
+    :param: use_mmap: map the file into memory instead of reading it (regular files only)
+    :param: reuse_buffer: read into a single preallocated buffer (chunks are overwritten)
+    :param: compression: decompress the input in a separate thread ("gzip", "zstd" or "auto")
+    :param: fast_skip: skip unmatchable subtrees before parsing (simple matchers only)
+    :param: documents: input contains several json documents (concatenated json / NDJSON)
 
-    :yields: path and converted data
+    :yields: path and converted data (with document index in documents mode)
     """
-    extract = Extract(require_path)
+    extract = Extract(require_path, release_gil)
     for matcher, handler in matchers_and_handlers:
         extract.add_matcher(matcher.inner, handler)
+    if fast_skip:
+        _enable_fast_skip(extract, matchers_and_handlers)
+    process, terminate = (
+        (extract.process_documents, extract.terminate_documents) if documents else (extract.process, extract.terminate)
+    )
 
-    input_data = input_fd.read(buffer_size)
-
-    while input_data:
-        for output in extract.process(input_data):
+    for input_data in read_chunks(input_fd, buffer_size, use_mmap, reuse_buffer, compression):
+        for output in process(input_data):
             yield output
-        input_data = input_fd.read(buffer_size)
 
-    for output in extract.terminate():
+    for output in terminate():
         yield output
 
 
+def extract_records_iter(
+    input_gen: typing.Generator[bytes, None, None],
+    matchers_and_handlers: typing.List[typing.Tuple[Matcher, typing.Optional[BaseHandler]]],
+    require_path: bool = True,
+    release_gil: bool = False,
+    max_record_size: typing.Optional[int] = None,
+    fast_skip: bool = False,
+) -> typing.Generator[typing.Tuple[typing.Optional[str], bytes], None, None]:
+    """Extracts complete records from generator specified by given matcher
+    :param: input_gen: input generator
+    :param matchers_and_handlers: handler and matchers combination
+    :param: require_path: is path required in output stream
+    :param: release_gil: parse without holding the GIL (allows running in threads)
+    :param: max_record_size: max size of a single record (StreamsonError is raised when exceeded)
+    :param: fast_skip: skip unmatchable subtrees before parsing (simple matchers only)
+
+    :yields: path and data of the record
+    """
+    extract = Extract(require_path, release_gil, max_record_size)
+    for matcher, handler in matchers_and_handlers:
+        extract.add_matcher(matcher.inner, handler)
+    if fast_skip:
+        _enable_fast_skip(extract, matchers_and_handlers)
+    for item in input_gen:
+        for record in extract.process_records(item):
+            yield record
+
+    for record in extract.terminate_records():
+        yield record
+
+
+def extract_records_fd(
+    input_fd: typing.IO[bytes],
+    matchers_and_handlers: typing.List[typing.Tuple[Matcher, typing.Optional[BaseHandler]]],
+    buffer_size: int = 1024 * 1024,
+    require_path: bool = True,
+    release_gil: bool = False,
+    use_mmap: bool = False,
+    reuse_buffer: bool = False,
+    compression: typing.Optional[str] = None,
+    max_record_size: typing.Optional[int] = None,
+    fast_skip: bool = False,
+) -> typing.Generator[typing.Tuple[typing.Optional[str], bytes], None, None]:
+    """Extracts complete records from input file specified by given matcher
+    :param: input_fd: input fd
+    :param matchers_and_handlers: handler and matchers combination
+    :param: buffer_size: how many bytes can be read from a file at once
+    :param: require_path: is path required in output stream
+    :param: release_gil: parse without holding the GIL (allows running in threads)
+    :param: use_mmap: map the file into memory instead of reading it (regular files only)
+    :param: reuse_buffer: read into a single preallocated buffer (chunks are overwritten)
+    :param: compression: decompress the input in a separate thread ("gzip", "zstd" or "auto")
+    :param: max_record_size: max size of a single record (StreamsonError is raised when exceeded)
+    :param: fast_skip: skip unmatchable subtrees before parsing (simple matchers only)
+
+    :yields: path and data of the record
+    """
+    extract = Extract(require_path, release_gil, max_record_size)
+    for matcher, handler in matchers_and_handlers:
+        extract.add_matcher(matcher.inner, handler)
+    if fast_skip:
+        _enable_fast_skip(extract, matchers_and_handlers)
+
+    for input_data in read_chunks(input_fd, buffer_size, use_mmap, reuse_buffer, compression):
+        for record in extract.process_records(input_data):
+            yield record
+
+    for record in extract.terminate_records():
+        yield record
+
+
+def extract_objects_iter(
+    input_gen: typing.Generator[bytes, None, None],
+    matchers_and_handlers: typing.List[typing.Tuple[Matcher, typing.Optional[BaseHandler]]],
+    require_path: bool = True,
+    release_gil: bool = False,
+    max_record_size: typing.Optional[int] = None,
+    fast_skip: bool = False,
+) -> typing.Generator[typing.Tuple[typing.Optional[str], typing.Any], None, None]:
+    """Extracts records from generator specified by given matcher and decodes them to python objects
+    :param: input_gen: input generator
+    :param matchers_and_handlers: handler and matchers combination
+    :param: require_path: is path required in output stream
+    :param: release_gil: parse without holding the GIL (allows running in threads)
+    :param: max_record_size: max size of a single record (StreamsonError is raised when exceeded)
+    :param: fast_skip: skip unmatchable subtrees before parsing (simple matchers only)
+
+    :yields: path and decoded record
+    """
+    extract = Extract(require_path, release_gil, max_record_size)
+    for matcher, handler in matchers_and_handlers:
+        extract.add_matcher(matcher.inner, handler)
+    if fast_skip:
+        _enable_fast_skip(extract, matchers_and_handlers)
+    for item in input_gen:
+        for record in extract.process_objects(item):
+            yield record
+
+    for record in extract.terminate_objects():
+        yield record
+
+
+def extract_objects_fd(
+    input_fd: typing.IO[bytes],
+    matchers_and_handlers: typing.List[typing.Tuple[Matcher, typing.Optional[BaseHandler]]],
+    buffer_size: int = 1024 * 1024,
+    require_path: bool = True,
+    release_gil: bool = False,
+    use_mmap: bool = False,
+    reuse_buffer: bool = False,
+    compression: typing.Optional[str] = None,
+    max_record_size: typing.Optional[int] = None,
+    fast_skip: bool = False,
+) -> typing.Generator[typing.Tuple[typing.Optional[str], typing.Any], None, None]:
+    """Extracts records from input file specified by given matcher and decodes them to python objects
+    :param: input_fd: input fd
+    :param matchers_and_handlers: handler and matchers combination
+    :param: buffer_size: how many bytes can be read from a file at once
+    :param: require_path: is path required in output stream
+    :param: release_gil: parse without holding the GIL (allows running in threads)
+    :param: use_mmap: map the file into memory instead of reading it (regular files only)
+    :param: reuse_buffer: read into a single preallocated buffer (chunks are overwritten)
+    :param: compression: decompress the input in a separate thread ("gzip", "zstd" or "auto")
+    :param: max_record_size: max size of a single record (StreamsonError is raised when exceeded)
+    :param: fast_skip: skip unmatchable subtrees before parsing (simple matchers only)
+
+    :yields: path and decoded record
+    """
+    extract = Extract(require_path, release_gil, max_record_size)
+    for matcher, handler in matchers_and_handlers:
+        extract.add_matcher(matcher.inner, handler)
+    if fast_skip:
+        _enable_fast_skip(extract, matchers_and_handlers)
+
+    for input_data in read_chunks(input_fd, buffer_size, use_mmap, reuse_buffer, compression):
+        for record in extract.process_objects(input_data):
+            yield record
+
+    for record in extract.terminate_objects():
+        yield record
+
+
 async def extract_async(
-    input_gen: typing.AsyncGenerator[bytes, None],
+    input_gen: AsyncInput,
     matchers_and_handlers: typing.List[typing.Tuple[Matcher, typing.Optional[BaseHandler]]],
     require_path: bool = True,
-):
+    buffer_size: int = 1024 * 1024,
+    read_ahead: int = 4,
+    executor: typing.Optional["Executor"] = None,
+) -> typing.AsyncGenerator[PythonOutput, None]:
     """Extracts json from given async generator specified by given matcher
-    :param: input_gen: input generator
+    :param: input_gen: async input generator or asyncio.StreamReader
     :param matchers_and_handlers: handler and matchers combination
     :param: require_path: is path required in output stream
+    :param: buffer_size: how many bytes can be read from a stream reader at once
+    :param: read_ahead: how many chunks can be read ahead while the parsing is in progress
+    :param: executor: executor where the parsing runs (default executor of the loop if not set)
 
     :yields: path and converted data
     """
-    extract = Extract(require_path)
+    extract = Extract(require_path, True)
     for matcher, handler in matchers_and_handlers:
         extract.add_matcher(matcher.inner, handler)
 
-    async for input_data in input_gen:
-        for output in extract.process(input_data):
-            yield output
-
-    for output in extract.terminate():
+    async for output in process_async(extract.process, extract.terminate, input_gen, buffer_size, read_ahead, executor):
         yield output
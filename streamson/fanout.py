@@ -0,0 +1,89 @@
+import typing
+
+from streamson.streamson import BufferHandler, Trigger
+
+from .handler import BaseHandler
+from .input import InputData, read_chunks
+from .matcher import Matcher
+
+FanoutRecord = typing.Tuple[str, typing.Optional[str], bytes]
+Targets = typing.Mapping[str, typing.List[typing.Tuple[Matcher, typing.Optional[BaseHandler]]]]
+
+
+def _pop_records(buffers: typing.Dict[str, BufferHandler]) -> typing.Generator[FanoutRecord, None, None]:
+    for name, buffer in buffers.items():
+        record = buffer.pop_front()
+        while record is not None:
+            yield name, record[0], record[1]
+            record = buffer.pop_front()
+
+
+def fanout_iter(
+    input_gen: typing.Iterable[InputData],
+    targets: Targets,
+    require_path: bool = True,
+    release_gil: bool = False,
+) -> typing.Generator[FanoutRecord, None, None]:
+    """Dispatches a single pass over the input to several targets
+    The input is tokenized only once, matchers of all targets are checked
+    on the same events.
+
+    e.g.
+    {
+        "users": [(SimpleMatcher('{"users"}[]'), None)],
+        "stats": [(DepthMatcher("1-"), AnalyserHandler())],
+    }
+    yields users and runs the analyser during the same pass.
+
+    Data matched by a matcher without a handler are yielded as records of the target,
+    handlers are triggered as in `trigger_iter`. Filtering and converting are not supported.
+
+    :param: input_gen: input generator
+    :param: targets: matchers and handlers identified by names of the targets
+    :param: require_path: is path required in output stream
+    :param: release_gil: parse without holding the GIL (allows running in threads)
+
+    :yields: name of the target, path and data of the record
+    """
+    trigger = Trigger(release_gil)
+    buffers: typing.Dict[str, BufferHandler] = {}
+    for name, matchers_and_handlers in targets.items():
+        for matcher, handler in matchers_and_handlers:
+            if handler is None:
+                handler = buffers.setdefault(name, BufferHandler(use_path=require_path))
+            trigger.add_matcher(matcher.inner, handler)
+
+    for input_item in input_gen:
+        trigger.process(input_item)
+        yield from _pop_records(buffers)
+
+    trigger.terminate()
+    yield from _pop_records(buffers)
+
+
+def fanout_fd(
+    input_fd: typing.IO[bytes],
+    targets: Targets,
+    buffer_size: int = 1024 * 1024,
+    require_path: bool = True,
+    release_gil: bool = False,
+    use_mmap: bool = False,
+    reuse_buffer: bool = False,
+    compression: typing.Optional[str] = None,
+) -> typing.Generator[FanoutRecord, None, None]:
+    """Dispatches a single pass over the input file to several targets (see `fanout_iter`)
+
+    :param: input_fd: input fd
+    :param: targets: matchers and handlers identified by names of the targets
+    :param: buffer_size: how many bytes can be read from a file at once
+    :param: require_path: is path required in output stream
+    :param: release_gil: parse without holding the GIL (allows running in threads)
+    :param: use_mmap: map the file into memory instead of reading it (regular files only)
+    :param: reuse_buffer: read into a single preallocated buffer (chunks are overwritten)
+    :param: compression: decompress the input in a separate thread ("gzip", "zstd" or "auto")
+
+    :yields: name of the target, path and data of the record
+    """
+    yield from fanout_iter(
+        read_chunks(input_fd, buffer_size, use_mmap, reuse_buffer, compression), targets, require_path, release_gil
+    )
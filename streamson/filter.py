@@ -1,30 +1,43 @@
 import typing
 
-from streamson.output import PythonOutput
+from streamson.output import DocumentOutput, PythonOutput
 from streamson.streamson import Filter
 
 from .handler import BaseHandler
+from .input import AsyncInput, process_async, read_chunks
 from .matcher import Matcher
 
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from concurrent.futures import Executor
+
 
 def filter_iter(
     input_gen: typing.Generator[bytes, None, None],
     matchers_and_handlers: typing.List[typing.Tuple[Matcher, typing.Optional[BaseHandler]]],
-) -> typing.Generator[PythonOutput, None, None]:
+    release_gil: bool = False,
+    documents: bool = False,
+) -> typing.Generator[typing.Union[PythonOutput, DocumentOutput], None, None]:
     """Filters json parts from generator specified by given matcher
     :param: input_gen: input generator
     :param matchers_and_handlers: handler and matchers combination
+    :param: release_gil: parse without holding the GIL (allows running in threads)
+    :param: documents: input contains several json documents (concatenated json / NDJSON)
 
-    :yields: filtered data
+    :yields: filtered data (with document index in documents mode)
     """
-    filter_strategy = Filter()
+    filter_strategy = Filter(release_gil)
     for matcher, handler in matchers_and_handlers:
         filter_strategy.add_matcher(matcher.inner, handler)
+    process, terminate = (
+        (filter_strategy.process_documents, filter_strategy.terminate_documents)
+        if documents
+        else (filter_strategy.process, filter_strategy.terminate)
+    )
     for item in input_gen:
-        for filter_item in filter_strategy.process(item):
+        for filter_item in process(item):
             yield filter_item
 
-    for output in filter_strategy.terminate():
+    for output in terminate():
         yield output
 
 
@@ -32,46 +45,62 @@ def filter_fd(
     input_fd: typing.IO[bytes],
     matchers_and_handlers: typing.List[typing.Tuple[Matcher, typing.Optional[BaseHandler]]],
     buffer_size: int = 1024 * 1024,
-) -> typing.Generator[PythonOutput, None, None]:
+    release_gil: bool = False,
+    use_mmap: bool = False,
+    reuse_buffer: bool = False,
+    compression: typing.Optional[str] = None,
+    documents: bool = False,
+) -> typing.Generator[typing.Union[PythonOutput, DocumentOutput], None, None]:
     """Filters json parts from input file specified by given matcher
     :param: input_fd: input fd
     :param matchers_and_handlers: handler and matchers combination
     :param: buffer_size: how many bytes can be read from a file at once
+    :param: release_gil: parse without holding the GIL (allows running in threads)
+    :param: use_mmap: map the file into memory instead of reading it (regular files only)
+    :param: reuse_buffer: read into a single preallocated buffer (chunks are overwritten)
+    :param: compression: decompress the input in a separate thread ("gzip", "zstd" or "auto")
+    :param: documents: input contains several json documents (concatenated json / NDJSON)
 
-    :yields: filtered data
+    :yields: filtered data (with document index in documents mode)
     """
-    filter_strategy = Filter()
+    filter_strategy = Filter(release_gil)
     for matcher, handler in matchers_and_handlers:
         filter_strategy.add_matcher(matcher.inner, handler)
-
-    input_data = input_fd.read(buffer_size)
-
-    while input_data:
-        for item in filter_strategy.process(input_data):
+    process, terminate = (
+        (filter_strategy.process_documents, filter_strategy.terminate_documents)
+        if documents
+        else (filter_strategy.process, filter_strategy.terminate)
+    )
+
+    for input_data in read_chunks(input_fd, buffer_size, use_mmap, reuse_buffer, compression):
+        for item in process(input_data):
             yield item
-        input_data = input_fd.read(buffer_size)
 
-    for output in filter_strategy.terminate():
+    for output in terminate():
         yield output
 
 
 async def filter_async(
-    input_gen: typing.AsyncGenerator[bytes, None],
+    input_gen: AsyncInput,
     matchers_and_handlers: typing.List[typing.Tuple[Matcher, typing.Optional[BaseHandler]]],
+    buffer_size: int = 1024 * 1024,
+    read_ahead: int = 4,
+    executor: typing.Optional["Executor"] = None,
 ):
     """Filters json parts from given async generator specified by given matcher
-    :param: input_gen: input generator
+    :param: input_gen: async input generator or asyncio.StreamReader
     :param matchers_and_handlers: handler and matchers combination
+    :param: buffer_size: how many bytes can be read from a stream reader at once
+    :param: read_ahead: how many chunks can be read ahead while the parsing is in progress
+    :param: executor: executor where the parsing runs (default executor of the loop if not set)
 
     :yields: filtered data
     """
-    filter_strategy = Filter()
+    filter_strategy = Filter(True)
     for matcher, handler in matchers_and_handlers:
         filter_strategy.add_matcher(matcher.inner, handler)
 
-    async for input_data in input_gen:
-        for item in filter_strategy.process(input_data):
-            yield item
-
-    for output in filter_strategy.terminate():
-        yield output
+    async for item in process_async(
+        filter_strategy.process, filter_strategy.terminate, input_gen, buffer_size, read_ahead, executor
+    ):
+        yield item
@@ -0,0 +1,133 @@
+import mmap
+import os
+import typing
+
+from streamson.streamson import Decompressor
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    # asyncio is imported lazily to keep the startup of the CLI fast
+    import asyncio
+    from concurrent.futures import Executor
+
+InputData = typing.Union[bytes, memoryview]
+AsyncInput = typing.Union[typing.AsyncIterator[bytes], "asyncio.StreamReader"]
+
+T = typing.TypeVar("T")
+
+
+def read_chunks(
+    input_fd: typing.IO[bytes],
+    buffer_size: int = 1024 * 1024,
+    use_mmap: bool = False,
+    reuse_buffer: bool = False,
+    compression: typing.Optional[str] = None,
+) -> typing.Generator[InputData, None, None]:
+    """Reads input file in chunks
+    :param: input_fd: input fd
+    :param: buffer_size: how many bytes can be read from a file at once
+    :param: use_mmap: map the file into memory and yield memoryviews instead of reading it
+                      (only works for regular files)
+    :param: reuse_buffer: read into a single preallocated buffer using `readinto`
+                          (yielded memoryview is overwritten by the next chunk)
+    :param: compression: decompress the input in a separate thread ("gzip", "zstd", "none" or "auto"
+                         which detects the compression from the first bytes of the input)
+                         `use_mmap` and `reuse_buffer` are ignored in that case
+
+    :yields: chunks of input data
+    """
+    if compression:
+        yield from Decompressor(input_fd, compression, buffer_size)
+    elif use_mmap:
+        size = os.fstat(input_fd.fileno()).st_size
+        position = input_fd.tell()
+        if size <= position:
+            return
+
+        # the mapping is closed once all chunks are released
+        view = memoryview(mmap.mmap(input_fd.fileno(), 0, access=mmap.ACCESS_READ))
+        for start in range(position, size, buffer_size):
+            yield view[start : start + buffer_size]
+        input_fd.seek(size)
+    elif reuse_buffer:
+        buffer = bytearray(buffer_size)
+        view = memoryview(buffer)
+        size = input_fd.readinto(buffer)  # type: ignore
+        while size:
+            yield view[:size]
+            size = input_fd.readinto(buffer)  # type: ignore
+    else:
+        input_data = input_fd.read(buffer_size)
+        while input_data:
+            yield input_data
+            input_data = input_fd.read(buffer_size)
+
+
+async def read_chunks_async(
+    input_gen: AsyncInput, buffer_size: int = 1024 * 1024
+) -> typing.AsyncGenerator[bytes, None]:
+    """Reads async input in chunks
+    :param: input_gen: async generator or `asyncio.StreamReader`
+    :param: buffer_size: how many bytes can be read from a stream reader at once
+
+    :yields: chunks of input data
+    """
+    import asyncio
+
+    if isinstance(input_gen, asyncio.StreamReader):
+        input_data = await input_gen.read(buffer_size)
+        while input_data:
+            yield input_data
+            input_data = await input_gen.read(buffer_size)
+    else:
+        async for input_data in input_gen:
+            yield input_data
+
+
+async def process_async(
+    process: typing.Callable[[bytes], typing.List[T]],
+    terminate: typing.Callable[[], typing.List[T]],
+    input_gen: AsyncInput,
+    buffer_size: int = 1024 * 1024,
+    read_ahead: int = 4,
+    executor: typing.Optional["Executor"] = None,
+) -> typing.AsyncGenerator[T, None]:
+    """Processes async input in an executor so the event loop is not blocked
+    Input is read ahead into a bounded queue (reading stops when the queue is full).
+
+    :param: process: processes a chunk of input data (runs in the executor)
+    :param: terminate: terminates the processing (runs in the executor)
+    :param: input_gen: async generator or `asyncio.StreamReader`
+    :param: buffer_size: how many bytes can be read from a stream reader at once
+    :param: read_ahead: how many chunks can wait for processing
+    :param: executor: executor to use (default executor of the loop if not set)
+
+    :yields: results of process and terminate functions
+    """
+    import asyncio
+
+    loop = asyncio.get_event_loop()
+    queue: asyncio.Queue = asyncio.Queue(read_ahead)
+
+    async def read():
+        try:
+            async for input_data in read_chunks_async(input_gen, buffer_size):
+                await queue.put(input_data)
+        except Exception as e:
+            await queue.put(e)
+        else:
+            await queue.put(None)
+
+    reader = asyncio.ensure_future(read())
+    try:
+        input_data = await queue.get()
+        while input_data is not None:
+            if isinstance(input_data, Exception):
+                raise input_data
+            for item in await loop.run_in_executor(executor, process, input_data):
+                yield item
+            input_data = await queue.get()
+
+        for item in await loop.run_in_executor(executor, terminate):
+            yield item
+    finally:
+        reader.cancel()
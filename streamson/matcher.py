@@ -1,3 +1,5 @@
+import typing
+
 from streamson.streamson import RustMatcher
 
 
@@ -6,14 +8,24 @@ class Matcher:
     Python Matcher wrapper around actual Rust streamson wrappers.
     """
 
-    def __init__(self, rust_matcher: RustMatcher):
+    def __init__(self, rust_matcher: RustMatcher, simple_paths: typing.Optional[typing.List[str]] = None):
+        """
+        :param: rust_matcher: wrapped rust matcher
+        :param: simple_paths: paths of simple matchers which are matched by this matcher
+                              (None if the matcher is not composed only of simple matchers)
+        """
         self.inner = rust_matcher
+        self.simple_paths = simple_paths
 
     def __invert__(self):
         return Matcher(~self.inner)
 
     def __or__(self, other):
-        return Matcher(self.inner | other.inner)
+        if self.simple_paths is not None and other.simple_paths is not None:
+            simple_paths = self.simple_paths + other.simple_paths
+        else:
+            simple_paths = None
+        return Matcher(self.inner | other.inner, simple_paths)
 
     def __and__(self, other):
         return Matcher(self.inner & other.inner)
@@ -36,7 +48,8 @@ class SimpleMatcher(Matcher):
 
         :param: path: which will be used to create a SimpleMatcher
         """
-        super().__init__(RustMatcher.simple(path))
+        super().__init__(RustMatcher.simple(path), [path])
+        self.path = path
 
 
 class RegexMatcher(Matcher):
@@ -48,3 +61,27 @@ class RegexMatcher(Matcher):
         :param: regex: will be used to create a RegexMatcher
         """
         super().__init__(RustMatcher.regex(regex))
+
+
+class MatcherSet(Matcher):
+    def __init__(self, paths: typing.Sequence[typing.Union[str, SimpleMatcher]]):
+        """Several simple matchers compiled into a single prefix tree
+        e.g.
+        MatcherSet(['{"users"}[]', '{}[0]']) will match {"users"}[1], {"groups"}[0], ...
+
+        Matching cost depends on the depth of the path instead of the number of paths.
+        Handlers of the set get the index of the matched path as `matcher_idx`
+        (the lowest one when several paths match), `match_indices` returns all of them.
+
+        :param: paths: paths or simple matchers which will be used to create the set
+        """
+        simple_paths = [e.path if isinstance(e, SimpleMatcher) else e for e in paths]
+        super().__init__(RustMatcher.simple_set(simple_paths), simple_paths)
+
+    def match_indices(self, path: str) -> typing.List[int]:
+        """Returns which of the original paths match given path
+        :param: path: concrete path (e.g. {"users"}[0])
+
+        :returns: indexes of matching paths
+        """
+        return self.inner.match_indices(path)
@@ -1,6 +1,9 @@
 import typing
 
+from streamson.streamson import Batch, Sink  # noqa
+
 PythonOutput = typing.Optional[typing.Tuple[typing.Optional[str], typing.Optional[bytes]]]
+DocumentOutput = typing.Tuple[int, PythonOutput]
 
 
 class Output:
@@ -9,15 +12,15 @@ class Output:
     def __init__(self, output_generator: typing.Generator[PythonOutput, None, None]):
         self.output_generator = output_generator
         self.path: typing.Optional[str] = None
-        self.data = bytes()
+        self.data = bytearray()
 
     def generator(self) -> typing.Generator[typing.Tuple[typing.Optional[str], bytes], None, None]:
 
         for e in self.output_generator:
             if e is None:
                 # End was reached
-                yield self.path, self.data
-                self.data = bytes()
+                yield self.path, bytes(self.data)
+                self.data = bytearray()
                 self.path = None
             else:
                 path, data = e
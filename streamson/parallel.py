@@ -0,0 +1,255 @@
+import collections
+import functools
+import mmap
+import os
+import re
+import typing
+
+from streamson.streamson import Decompressor, Extract, split_array
+
+from .matcher import Matcher, MatcherSet
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from concurrent.futures import Executor
+
+Record = typing.Tuple[typing.Optional[str], bytes]
+T = typing.TypeVar("T")
+R = typing.TypeVar("R")
+
+INDEX_RE = re.compile(r"^\[(\d+)\]")
+
+
+def _renumber(path: typing.Optional[str], first_index: int) -> typing.Optional[str]:
+    if not path or not first_index:
+        return path
+    found = INDEX_RE.match(path)
+    if not found:
+        return path
+    return f"[{int(found.group(1)) + first_index}]{path[found.end():]}"
+
+
+def _schedule(
+    executor: "Executor",
+    task: typing.Callable[[T], R],
+    items: typing.Iterable[T],
+    in_flight: int,
+    ordered: bool,
+) -> typing.Generator[R, None, None]:
+    """Runs the task for each item in the executor
+    Only a limited number of items is submitted at once.
+
+    :param: executor: executor which runs the tasks
+    :param: task: function called for each item
+    :param: items: items to be processed
+    :param: in_flight: max number of items which are submitted at once
+    :param: ordered: yield results in the same order as the items
+
+    :yields: results of the task
+    """
+    from concurrent.futures import FIRST_COMPLETED, Future, as_completed, wait
+
+    if ordered:
+        queue: typing.Deque[Future] = collections.deque()
+        for item in items:
+            queue.append(executor.submit(task, item))
+            if len(queue) >= in_flight:
+                yield queue.popleft().result()
+        while queue:
+            yield queue.popleft().result()
+    else:
+        pending: typing.Set[Future] = set()
+        for item in items:
+            pending.add(executor.submit(task, item))
+            if len(pending) >= in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in as_completed(pending):
+            yield future.result()
+
+
+def _split_top_index(matcher: Matcher) -> typing.List[typing.Tuple[typing.Optional[int], str]]:
+    """Splits paths of the matcher to the index within the top-level array and the rest of the path
+    :param: matcher: matcher composed of simple matchers
+
+    :returns: index (None for `[]` or other paths) and the rest of the path
+    """
+    if matcher.simple_paths is None:
+        raise ValueError("Only simple matchers (SimpleMatcher, MatcherSet and their unions) are supported")
+    res: typing.List[typing.Tuple[typing.Optional[int], str]] = []
+    for path in matcher.simple_paths:
+        found = INDEX_RE.match(path)
+        if found:
+            res.append((int(found.group(1)), path[found.end() :]))
+        else:
+            res.append((None, path))
+    return res
+
+
+def _shard_paths(paths: typing.List[typing.Tuple[typing.Optional[int], str]], first_index: int) -> typing.List[str]:
+    """Converts indexes of the top-level array to indexes within the shard
+    :param: paths: indexes and the rest of the paths
+    :param: first_index: index of the first element of the shard
+
+    :returns: paths which can match elements of the shard
+    """
+    res = []
+    for index, rest in paths:
+        if index is None:
+            res.append(rest)
+        elif index >= first_index:
+            res.append(f"[{index - first_index}]{rest}")
+    return res
+
+
+def _extract_shard(
+    data: memoryview,
+    paths: typing.List[typing.Tuple[typing.Optional[int], str]],
+    require_path: bool,
+    max_record_size: typing.Optional[int],
+    shard: typing.Tuple[int, int, int],
+) -> typing.List[Record]:
+    start, end, first_index = shard
+    shard_paths = _shard_paths(paths, first_index)
+    if not shard_paths:
+        return []
+    extract = Extract(require_path, True, max_record_size)
+    extract.add_matcher(MatcherSet(shard_paths).inner, None)
+
+    # shard contains only array elements
+    records = extract.process_records(b"[")
+    records.extend(extract.process_records(data[start:end]))
+    records.extend(extract.process_records(b"]"))
+    records.extend(extract.terminate_records())
+
+    return [(_renumber(path, first_index), record) for path, record in records]
+
+
+def extract_parallel(
+    path: typing.Union[str, os.PathLike],
+    matcher: Matcher,
+    workers: typing.Optional[int] = None,
+    require_path: bool = True,
+    ordered: bool = True,
+    shard_size: int = 64 * 1024 * 1024,
+    max_record_size: typing.Optional[int] = None,
+) -> typing.Generator[Record, None, None]:
+    """Extracts records from a file containing a huge top-level array using several threads
+
+    The file is split into shards at element boundaries and each shard
+    is processed by its own Extract strategy which doesn't hold the GIL.
+    Only simple matchers are supported (paths are needed to match
+    a specific index of the top-level array, e.g. `[1]`, within a shard).
+
+    :param: path: path to the input file
+    :param: matcher: simple matcher which selects records
+    :param: workers: number of threads (default is number of cpus)
+    :param: require_path: is path required in output stream
+    :param: ordered: yield records in the same order as they appear in the input
+    :param: shard_size: approximate size of input processed by a single task
+    :param: max_record_size: max size of a single record
+
+    :yields: path and data of the record
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    workers = workers or os.cpu_count() or 1
+    paths = _split_top_index(matcher)
+
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    shards = split_array(data, shard_size)
+    task = functools.partial(_extract_shard, data, paths, require_path, max_record_size)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # limit the number of shards which are processed at once
+        for records in _schedule(executor, task, shards, workers * 2, ordered):
+            yield from records
+
+
+DocumentRecord = typing.Tuple[int, typing.Optional[str], bytes]
+
+
+def _ndjson_blocks(
+    input_fd: typing.IO[bytes], block_size: int, compression: typing.Optional[str]
+) -> typing.Generator[bytes, None, None]:
+    """Reads input in blocks which end with a newline
+    :param: input_fd: input fd
+    :param: block_size: approximate size of a block
+    :param: compression: compression of the input
+
+    :yields: blocks containing only whole lines (except the last one)
+    """
+    chunks: typing.Iterable[bytes] = (
+        Decompressor(input_fd, compression, block_size) if compression else iter(lambda: input_fd.read(block_size), b"")
+    )
+    parts: typing.List[bytes] = []
+    for data in chunks:
+        end = data.rfind(b"\n")
+        if end == -1:
+            parts.append(data)
+            continue
+        parts.append(data[: end + 1])
+        yield b"".join(parts)
+        parts = [data[end + 1 :]]
+    if any(parts):
+        yield b"".join(parts)
+
+
+def _extract_block(
+    matcher: Matcher,
+    require_path: bool,
+    max_record_size: typing.Optional[int],
+    block: bytes,
+) -> typing.Tuple[int, typing.List[DocumentRecord]]:
+    extract = Extract(require_path, True, max_record_size)
+    extract.add_matcher(matcher.inner, None)
+
+    records = extract.process_document_records(block)
+    records.extend(extract.terminate_document_records())
+
+    return extract.document_count, records
+
+
+def extract_ndjson_parallel(
+    input_fd: typing.IO[bytes],
+    matcher: Matcher,
+    workers: typing.Optional[int] = None,
+    require_path: bool = True,
+    block_size: int = 16 * 1024 * 1024,
+    max_record_size: typing.Optional[int] = None,
+    compression: typing.Optional[str] = None,
+) -> typing.Generator[DocumentRecord, None, None]:
+    """Extracts records from newline delimited json (NDJSON) using several threads
+
+    The input is read in newline-aligned blocks and each block
+    is processed by its own Extract strategy which doesn't hold the GIL.
+    Records are yielded in the same order as they appear in the input,
+    because the index of a document is known only when all preceding blocks are processed.
+
+    :param: input_fd: input fd
+    :param: matcher: matcher which selects records
+    :param: workers: number of threads (default is number of cpus)
+    :param: require_path: is path required in output stream
+    :param: block_size: approximate size of input processed by a single task
+    :param: max_record_size: max size of a single record
+    :param: compression: decompress the input in a separate thread ("gzip", "zstd" or "auto")
+
+    :yields: index of the document, path and data of the record
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    workers = workers or os.cpu_count() or 1
+    blocks = _ndjson_blocks(input_fd, block_size, compression)
+    task = functools.partial(_extract_block, matcher, require_path, max_record_size)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        first_index = 0
+        # limit the number of blocks which are processed at once
+        for count, records in _schedule(executor, task, blocks, workers * 2, True):
+            for index, path, record in records:
+                yield index + first_index, path, record
+            first_index += count
@@ -0,0 +1,195 @@
+import contextlib
+import typing
+
+from streamson.output import PythonOutput
+from streamson.streamson import All, Convert, Extract, Filter, Trigger
+
+from .handler import BaseHandler
+from .input import InputData, read_chunks
+from .matcher import Matcher
+
+Strategy = typing.Union[All, Convert, Extract, Filter, Trigger]
+K = typing.TypeVar("K", bound=typing.Hashable)
+
+
+class Pipeline:
+    """Strategy with compiled matchers and handlers which can be reused for several inputs
+
+    The strategy is reset before each input so the setup cost is paid only once.
+    Handlers keep their state between the inputs (e.g. data buffered by `BufferHandler`).
+    Pipeline can't be used by several threads at once (see `PipelinePool`).
+    """
+
+    def __init__(self, strategy: Strategy):
+        """
+        :param: strategy: strategy with matchers and handlers already added
+        """
+        self.strategy = strategy
+
+    @classmethod
+    def extract(
+        cls,
+        matchers_and_handlers: typing.List[typing.Tuple[Matcher, typing.Optional[BaseHandler]]],
+        require_path: bool = True,
+        release_gil: bool = False,
+        max_record_size: typing.Optional[int] = None,
+    ) -> "Pipeline":
+        """Creates pipeline which extracts matched parts
+        :param matchers_and_handlers: handler and matchers combination
+        :param: require_path: is path required in output stream
+        :param: release_gil: parse without holding the GIL (allows running in threads)
+        :param: max_record_size: max size of a single record returned by `records_iter`
+        """
+        extract = Extract(require_path, release_gil, max_record_size)
+        for matcher, handler in matchers_and_handlers:
+            extract.add_matcher(matcher.inner, handler)
+        return cls(extract)
+
+    @classmethod
+    def filter(
+        cls,
+        matchers_and_handlers: typing.List[typing.Tuple[Matcher, typing.Optional[BaseHandler]]],
+        release_gil: bool = False,
+    ) -> "Pipeline":
+        """Creates pipeline which removes matched parts
+        :param matchers_and_handlers: handler and matchers combination
+        :param: release_gil: parse without holding the GIL (allows running in threads)
+        """
+        filter_strategy = Filter(release_gil)
+        for matcher, handler in matchers_and_handlers:
+            filter_strategy.add_matcher(matcher.inner, handler)
+        return cls(filter_strategy)
+
+    @classmethod
+    def convert(
+        cls,
+        matchers_and_handlers: typing.List[typing.Tuple[Matcher, BaseHandler]],
+        release_gil: bool = False,
+    ) -> "Pipeline":
+        """Creates pipeline which converts matched parts
+        :param matchers_and_handlers: handler and matchers combination
+        :param: release_gil: parse without holding the GIL (allows running in threads)
+        """
+        convert = Convert(release_gil)
+        for matcher, handler in matchers_and_handlers:
+            convert.add_matcher(matcher.inner, handler)
+        return cls(convert)
+
+    @classmethod
+    def trigger(
+        cls,
+        matchers_and_handlers: typing.List[typing.Tuple[Matcher, BaseHandler]],
+        release_gil: bool = False,
+    ) -> "Pipeline":
+        """Creates pipeline which triggers handlers on matched parts
+        :param matchers_and_handlers: handler and matchers combination
+        :param: release_gil: parse without holding the GIL (allows running in threads)
+        """
+        trigger = Trigger(release_gil)
+        for matcher, handler in matchers_and_handlers:
+            trigger.add_matcher(matcher.inner, handler)
+        return cls(trigger)
+
+    @classmethod
+    def all(cls, handlers: typing.List[BaseHandler], convert: bool = True, release_gil: bool = False) -> "Pipeline":
+        """Creates pipeline which applies handlers to all parts
+        :param: handlers: functions used to convert/process raw data
+        :param: convert: should handler be used to convert the output
+        :param: release_gil: parse without holding the GIL (allows running in threads)
+        """
+        all_strategy = All(convert, release_gil)
+        for handler in handlers:
+            all_strategy.add_handler(handler)
+        return cls(all_strategy)
+
+    def reset(self):
+        """Drops the state of previous input"""
+        self.strategy.reset()
+
+    def iter(self, input_gen: typing.Iterable[InputData]) -> typing.Generator[PythonOutput, None, None]:
+        """Processes input from generator
+        :param: input_gen: input generator
+
+        :yields: output of the strategy
+        """
+        self.reset()
+        for item in input_gen:
+            yield from self.strategy.process(item)
+        yield from self.strategy.terminate()
+
+    def fd(
+        self,
+        input_fd: typing.IO[bytes],
+        buffer_size: int = 1024 * 1024,
+        use_mmap: bool = False,
+        reuse_buffer: bool = False,
+        compression: typing.Optional[str] = None,
+    ) -> typing.Generator[PythonOutput, None, None]:
+        """Processes input from a file
+        :param: input_fd: input fd
+        :param: buffer_size: how many bytes can be read from a file at once
+        :param: use_mmap: map the file into memory instead of reading it (regular files only)
+        :param: reuse_buffer: read into a single preallocated buffer (chunks are overwritten)
+        :param: compression: decompress the input in a separate thread ("gzip", "zstd" or "auto")
+
+        :yields: output of the strategy
+        """
+        yield from self.iter(read_chunks(input_fd, buffer_size, use_mmap, reuse_buffer, compression))
+
+    def records_iter(
+        self, input_gen: typing.Iterable[InputData]
+    ) -> typing.Generator[typing.Tuple[typing.Optional[str], bytes], None, None]:
+        """Processes input from generator and returns complete records (extract pipelines only)
+        :param: input_gen: input generator
+
+        :yields: path and data of the record
+        """
+        self.reset()
+        for item in input_gen:
+            yield from self.strategy.process_records(item)
+        yield from self.strategy.terminate_records()
+
+
+class PipelinePool(typing.Generic[K]):
+    """Keyed cache of pipelines
+
+    Each pipeline is lent to a single user at a time, so the pool can be used from several threads.
+    """
+
+    def __init__(self, factory: typing.Callable[[K], Pipeline], max_idle: int = 8):
+        """
+        :param: factory: creates a pipeline for given key
+        :param: max_idle: max number of unused pipelines kept for a single key
+        """
+        # imported here to keep the import of streamson fast
+        import threading
+
+        self.factory = factory
+        self.max_idle = max_idle
+        self.idle: typing.Dict[K, typing.List[Pipeline]] = {}
+        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def acquire(self, key: K) -> typing.Iterator[Pipeline]:
+        """Lends a pipeline for given key (a new one is created when there is no idle one)
+        :param: key: key of the pipeline configuration
+
+        :yields: pipeline
+        """
+        with self.lock:
+            idle = self.idle.get(key)
+            pipeline = idle.pop() if idle else None
+        if pipeline is None:
+            pipeline = self.factory(key)
+
+        # pipeline is not returned when an exception is raised (its state may be inconsistent)
+        yield pipeline
+        with self.lock:
+            idle = self.idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(pipeline)
+
+    def clear(self):
+        """Drops all idle pipelines"""
+        with self.lock:
+            self.idle.clear()
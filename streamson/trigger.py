@@ -2,71 +2,103 @@ import typing
 
 from streamson.streamson import BaseHandler, Trigger
 
+from .input import AsyncInput, InputData, process_async, read_chunks
 from .matcher import Matcher
 
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from concurrent.futures import Executor
+
 
 def trigger_iter(
     input_gen: typing.Generator[bytes, None, None],
     matchers_and_handlers: typing.List[typing.Tuple[Matcher, BaseHandler]],
+    release_gil: bool = False,
+    documents: bool = False,
 ) -> typing.Generator[bytes, None, None]:
     """Triggers handlers on matched input
     :param input_gen: input generator
     :param matchers_and_handlers: handler and matchers combination
+    :param: release_gil: parse without holding the GIL (allows running in threads)
+    :param: documents: input contains several json documents (concatenated json / NDJSON)
 
     :yields: input data
     """
-    trigger = Trigger()
+    trigger = Trigger(release_gil)
     for matcher, handler in matchers_and_handlers:
         trigger.add_matcher(matcher.inner, handler)
+    process, terminate = (
+        (trigger.process_documents, trigger.terminate_documents) if documents else (trigger.process, trigger.terminate)
+    )
     for item in input_gen:
-        trigger.process(item)
+        process(item)
         yield item
 
-    trigger.terminate()
+    terminate()
 
 
 def trigger_fd(
     input_fd: typing.IO[bytes],
     matchers_and_handlers: typing.List[typing.Tuple[Matcher, BaseHandler]],
     buffer_size: int = 1024 * 1024,
-) -> typing.Generator[bytes, None, None]:
+    release_gil: bool = False,
+    use_mmap: bool = False,
+    reuse_buffer: bool = False,
+    compression: typing.Optional[str] = None,
+    documents: bool = False,
+) -> typing.Generator[InputData, None, None]:
     """Triggers handlers on matched data from a file description
     :param input_fd: input generator
     :param matchers_and_handlers: handler and matchers combination
     :param: buffer_size: how many bytes can be read from a file at once
+    :param: release_gil: parse without holding the GIL (allows running in threads)
+    :param: use_mmap: map the file into memory instead of reading it (regular files only)
+    :param: reuse_buffer: read into a single preallocated buffer (chunks are overwritten)
+    :param: compression: decompress the input in a separate thread ("gzip", "zstd" or "auto")
+    :param: documents: input contains several json documents (concatenated json / NDJSON)
 
-    :yields: input data
+    :yields: input data (memoryviews when use_mmap or reuse_buffer is set)
     """
-    trigger = Trigger()
+    trigger = Trigger(release_gil)
     for matcher, handler in matchers_and_handlers:
         trigger.add_matcher(matcher.inner, handler)
+    process, terminate = (
+        (trigger.process_documents, trigger.terminate_documents) if documents else (trigger.process, trigger.terminate)
+    )
 
-    input_data = input_fd.read(buffer_size)
-
-    while input_data:
-        trigger.process(input_data)
+    for input_data in read_chunks(input_fd, buffer_size, use_mmap, reuse_buffer, compression):
+        process(input_data)
         yield input_data
-        input_data = input_fd.read(buffer_size)
 
-    trigger.terminate()
+    terminate()
 
 
 async def trigger_async(
-    input_gen: typing.AsyncGenerator[bytes, None],
+    input_gen: AsyncInput,
     matchers_and_handlers: typing.List[typing.Tuple[Matcher, BaseHandler]],
+    buffer_size: int = 1024 * 1024,
+    read_ahead: int = 4,
+    executor: typing.Optional["Executor"] = None,
 ):
     """Triggers handlers on matched data from async generator
-    :param: input_gen: input generator
+    :param: input_gen: async input generator or asyncio.StreamReader
     :param matchers_and_handlers: handler and matchers combination
+    :param: buffer_size: how many bytes can be read from a stream reader at once
+    :param: read_ahead: how many chunks can be read ahead while the parsing is in progress
+    :param: executor: executor where the parsing runs (default executor of the loop if not set)
 
     :yields: input data
     """
-    trigger = Trigger()
+    trigger = Trigger(True)
     for matcher, handler in matchers_and_handlers:
         trigger.add_matcher(matcher.inner, handler)
 
-    async for input_data in input_gen:
+    def process(input_data: bytes) -> typing.List[bytes]:
         trigger.process(input_data)
-        yield input_data
+        return [input_data]
 
-    trigger.terminate()
+    def terminate() -> typing.List[bytes]:
+        trigger.terminate()
+        return []
+
+    async for input_data in process_async(process, terminate, input_gen, buffer_size, read_ahead, executor):
+        yield input_data
@@ -36,6 +36,14 @@ def io_reader() -> io.BytesIO:
     return io.BytesIO(json.dumps(DATA_JSON).encode())
 
 
+@pytest.fixture
+def file_reader(tmp_path) -> typing.Generator[typing.IO[bytes], None, None]:
+    path = tmp_path / "data.json"
+    path.write_bytes(json.dumps(DATA_JSON).encode())
+    with path.open("rb") as f:
+        yield f
+
+
 @pytest.fixture(scope="function")
 def buffer_handler():
     return BufferHandler(use_path=True)
@@ -0,0 +1,9 @@
+import subprocess
+import sys
+
+
+def test_extract_separator():
+    args = [sys.executable, "-m", "streamson", "extract", "-m", 's:{"users"}[]', "-S", ",", "-b", "[", "-a", "]"]
+    output = subprocess.run(args, input=b'{"users": ["john", "carl", "bob"]}', stdout=subprocess.PIPE, check=True)
+
+    assert output.stdout == b'["john","carl","bob"]'
@@ -34,3 +34,26 @@ def test_simple(io_reader, data, replace_handler, kind):
             if e is not None and e[1] is not None:
                 output_data += e[1]
     assert output_data == b'{"users": ["john", "***", "bob"], "groups": ["admins", "users"]}'
+
+
+def test_python_converter_large():
+    blob = b'"' + b"x" * (4 * 1024 * 1024) + b'"'
+    input_data = b'{"blob": ' + blob + b', "other": 1}'
+    converted = []
+
+    def convert(data):
+        converted.append(data)
+        return b"1"
+
+    handler = streamson.handler.PythonConverterHandler(convert)
+    matcher = streamson.SimpleMatcher('{"blob"}')
+    chunks = (input_data[i : i + 4096] for i in range(0, len(input_data), 4096))
+    output = b"".join(
+        e[1] for e in streamson.convert_iter(chunks, [(matcher, handler)]) if e is not None and e[1] is not None
+    )
+
+    assert output == b'{"blob": 1, "other": 1}'
+    assert converted == [blob]
+    assert handler.converter_function is convert
+    assert isinstance(handler, streamson.handler.PythonHandler)
+    assert handler.buffer == [b""]
@@ -1,3 +1,6 @@
+import gzip
+import io
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum, auto
 
 import pytest
@@ -5,6 +8,7 @@ import pytest
 import streamson
 from streamson.handler import BufferHandler, PythonConverterHandler
 from streamson.output import Output
+from streamson.streamson import Extract
 
 
 class Kind(Enum):
@@ -62,9 +66,9 @@ def test_simple(io_reader, data, kind, convert, extract_path):
         next(output)
 
     convert = convert if convert else (lambda x: x)
-    assert buff_handler.pop_front() == ('{"users"}[0]' if extract_path else None, [e for e in convert(b'"john"')])
-    assert buff_handler.pop_front() == ('{"users"}[1]' if extract_path else None, [e for e in convert(b'"carl"')])
-    assert buff_handler.pop_front() == ('{"users"}[2]' if extract_path else None, [e for e in convert(b'"bob"')])
+    assert buff_handler.pop_front() == ('{"users"}[0]' if extract_path else None, convert(b'"john"'))
+    assert buff_handler.pop_front() == ('{"users"}[1]' if extract_path else None, convert(b'"carl"'))
+    assert buff_handler.pop_front() == ('{"users"}[2]' if extract_path else None, convert(b'"bob"'))
     assert buff_handler.pop_front() is None
 
 
@@ -124,11 +128,11 @@ def test_depth(io_reader, data, kind, convert, extract_path):
     convert = convert if convert else (lambda x: x)
     assert buff_handler.pop_front() == (
         '{"users"}' if extract_path else None,
-        [e for e in convert(b'["john", "carl", "bob"]')],
+        convert(b'["john", "carl", "bob"]'),
     )
     assert buff_handler.pop_front() == (
         '{"groups"}' if extract_path else None,
-        [e for e in convert(b'["admins", "users"]')],
+        convert(b'["admins", "users"]'),
     )
     assert buff_handler.pop_front() is None
 
@@ -152,7 +156,7 @@ def test_depth(io_reader, data, kind, convert, extract_path):
 
     assert buff_handler.pop_front() == (
         "" if extract_path else None,
-        [e for e in convert(b'{"users": ["john", "carl", "bob"], "groups": ["admins", "users"]}')],
+        convert(b'{"users": ["john", "carl", "bob"], "groups": ["admins", "users"]}'),
     )
     assert buff_handler.pop_front() is None
 
@@ -209,7 +213,7 @@ def test_invert(io_reader, data, kind, convert, extract_path):
     convert = convert if convert else (lambda x: x)
     assert buff_handler.pop_front() == (
         "" if extract_path else None,
-        [e for e in convert(b'{"users": ["john", "carl", "bob"], "groups": ["admins", "users"]}')],
+        convert(b'{"users": ["john", "carl", "bob"], "groups": ["admins", "users"]}'),
     )
     assert buff_handler.pop_front() is None
 
@@ -264,7 +268,7 @@ def test_all(io_reader, data, kind, convert, extract_path):
     convert = convert if convert else (lambda x: x)
     assert buff_handler.pop_front() == (
         '{"users"}[1]' if extract_path else None,
-        [e for e in convert(b'"carl"')],
+        convert(b'"carl"'),
     )
     assert buff_handler.pop_front() is None
 
@@ -331,15 +335,15 @@ def test_any(io_reader, data, kind, convert, extract_path):
     convert = convert if convert else (lambda x: x)
     assert buff_handler.pop_front() == (
         '{"users"}' if extract_path else None,
-        [e for e in convert(b'["john", "carl", "bob"]')],
+        convert(b'["john", "carl", "bob"]'),
     )
     assert buff_handler.pop_front() == (
         '{"groups"}[0]' if extract_path else None,
-        [e for e in convert(b'"admins"')],
+        convert(b'"admins"'),
     )
     assert buff_handler.pop_front() == (
         '{"groups"}[1]' if extract_path else None,
-        [e for e in convert(b'"users"')],
+        convert(b'"users"'),
     )
     assert buff_handler.pop_front() is None
 
@@ -404,10 +408,327 @@ def test_complex(io_reader, data, kind, convert, extract_path):
     convert = convert if convert else (lambda x: x)
     assert buff_handler.pop_front() == (
         '{"users"}' if extract_path else None,
-        [e for e in convert(b'["john", "carl", "bob"]')],
+        convert(b'["john", "carl", "bob"]'),
     )
     assert buff_handler.pop_front() == (
         '{"groups"}[1]' if extract_path else None,
-        [e for e in convert(b'"users"')],
+        convert(b'"users"'),
     )
     assert buff_handler.pop_front() is None
+
+
+def test_release_gil(data):
+    matcher = streamson.SimpleMatcher('{"users"}[]')
+
+    def extract(idx: int):
+        extracted = streamson.extract_fd(io.BytesIO(data[0]), [(matcher, None)], 5, True, release_gil=True)
+        return list(Output(extracted).generator())
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(extract, range(8)))
+
+    for result in results:
+        assert result == [
+            ('{"users"}[0]', b'"john"'),
+            ('{"users"}[1]', b'"carl"'),
+            ('{"users"}[2]', b'"bob"'),
+        ]
+
+
+@pytest.mark.parametrize("extract_path", [True, False], ids=["path", "nopath"])
+def test_batch(data, extract_path):
+    extract = Extract(extract_path)
+    extract.add_matcher(streamson.SimpleMatcher('{"users"}[]').inner, None)
+
+    # first chunk ends in the middle of "john"
+    batches = [extract.process_batch(data[0][:14]), extract.process_batch(data[0][14:]), extract.terminate_batch()]
+    assert [len(e) for e in batches] == [0, 3, 0]
+
+    batch = batches[1]
+    assert batch.offsets == [0, 6, 12, 17]
+    assert batch.data == b'"john""carl""bob"'
+    if extract_path:
+        assert batch.paths == ['{"users"}[0]', '{"users"}[1]', '{"users"}[2]']
+    else:
+        assert batch.paths == [None, None, None]
+
+
+def test_stats(data):
+    extract = Extract(True)
+    assert extract.stats() is None
+
+    extract.add_matcher(streamson.SimpleMatcher('{"users"}[]').inner, None)
+    extract.enable_stats()
+    extract.add_matcher(streamson.SimpleMatcher('{"groups"}[]').inner, BufferHandler())
+
+    records = extract.process_records(data[0][:14]) + extract.process_records(data[0][14:])
+    records += extract.terminate_records()
+    assert len(records) == 5
+
+    stats = extract.stats()
+    assert stats["bytes"] == len(data[0])
+    assert stats["events"] >= 3 * len(records)
+    assert stats["peak_buffered"] >= len(b'"john""carl""bob"')
+    assert stats["convert_time"] == 0.0
+    users, groups = stats["matchers"]
+    assert (users["matches"], users["handler_calls"], users["handler_time"]) == (3, 0, 0.0)
+    assert groups["matches"] == 2
+    assert groups["handler_calls"] >= 4
+    assert groups["handler_time"] > 0.0
+
+
+@pytest.mark.parametrize("kind", [Kind.FD, Kind.ITER], ids=["fd", "iter"])
+def test_records(io_reader, data, kind):
+    matcher = streamson.SimpleMatcher('{"users"}[]') | streamson.SimpleMatcher('{"groups"}')
+
+    if kind == Kind.ITER:
+        extracted = streamson.extract_records_iter((e for e in data), [(matcher, None)])
+    elif kind == Kind.FD:
+        extracted = streamson.extract_records_fd(io_reader, [(matcher, None)], 5)
+
+    assert list(extracted) == [
+        ('{"users"}[0]', b'"john"'),
+        ('{"users"}[1]', b'"carl"'),
+        ('{"users"}[2]', b'"bob"'),
+        ('{"groups"}', b'["admins", "users"]'),
+    ]
+
+
+def test_records_unfinished():
+    extract = Extract(True)
+    extract.add_matcher(streamson.SimpleMatcher('{"users"}[]').inner, None)
+
+    assert extract.process_records(b'{"users": ["john", "ca') == [('{"users"}[0]', b'"john"')]
+    with pytest.raises(ValueError):
+        extract.terminate_records()
+
+
+def test_records_max_size(io_reader):
+    matcher = streamson.SimpleMatcher('{"groups"}')
+    extracted = streamson.extract_records_fd(io_reader, [(matcher, None)], 5, max_record_size=10)
+
+    with pytest.raises(ValueError):
+        list(extracted)
+
+
+def test_mmap(file_reader):
+    matcher = streamson.SimpleMatcher('{"users"}[]')
+    extracted = streamson.extract_fd(file_reader, [(matcher, None)], 5, use_mmap=True)
+
+    assert list(Output(extracted).generator()) == [
+        ('{"users"}[0]', b'"john"'),
+        ('{"users"}[1]', b'"carl"'),
+        ('{"users"}[2]', b'"bob"'),
+    ]
+
+
+@pytest.mark.parametrize("wrapper", [bytes, bytearray, memoryview], ids=["bytes", "bytearray", "memoryview"])
+def test_buffer_input(data, wrapper):
+    extract = Extract(True)
+    extract.add_matcher(streamson.SimpleMatcher('{"users"}[1]').inner, None)
+
+    records = extract.process_records(wrapper(data[0])) + extract.terminate_records()
+    assert records == [('{"users"}[1]', b'"carl"')]
+
+
+def test_reuse_buffer(io_reader):
+    matcher = streamson.SimpleMatcher('{"users"}[]')
+    extracted = streamson.extract_fd(io_reader, [(matcher, None)], 5, reuse_buffer=True)
+
+    assert list(Output(extracted).generator()) == [
+        ('{"users"}[0]', b'"john"'),
+        ('{"users"}[1]', b'"carl"'),
+        ('{"users"}[2]', b'"bob"'),
+    ]
+
+
+@pytest.mark.parametrize("kind", [Kind.FD, Kind.ITER], ids=["fd", "iter"])
+def test_fast_skip(kind):
+    input_data = (
+        b'{"skipped": {"users": ["x\\"]}", {"a": [1, 2]}], "n": -1.5e3, "t": true},'
+        b' "users": [{"name": "john", "tags": ["a"]}, {"name": "carl\\"s", "tags": []}], "z": "}"}'
+    )
+    matcher = streamson.SimpleMatcher('{"users"}[]{"name"}') | streamson.SimpleMatcher('{"z"}')
+
+    if kind == Kind.ITER:
+        chunks = [input_data[i : i + 7] for i in range(0, len(input_data), 7)]
+        extracted = streamson.extract_records_iter((e for e in chunks), [(matcher, None)], fast_skip=True)
+    elif kind == Kind.FD:
+        extracted = streamson.extract_records_fd(io.BytesIO(input_data), [(matcher, None)], 7, fast_skip=True)
+
+    assert list(extracted) == [
+        ('{"users"}[0]{"name"}', b'"john"'),
+        ('{"users"}[1]{"name"}', b'"carl\\"s"'),
+        ('{"z"}', b'"}"'),
+    ]
+
+    # skipped parts are counted as processed input
+    extract = Extract(True)
+    extract.add_matcher(matcher.inner, None)
+    extract.enable_fast_skip(matcher.simple_paths)
+    extract.enable_stats()
+    extract.process(input_data)
+    extract.terminate()
+    stats = extract.stats()
+    assert stats["bytes"] == len(input_data)
+    assert [e["matches"] for e in stats["matchers"]] == [3]
+
+
+def test_fast_skip_unsupported():
+    extract = Extract(True)
+    assert extract.enable_fast_skip(['{"users"}[]']) is True
+    assert extract.enable_fast_skip(['{"users"}[1-2]']) is False
+
+    matcher = streamson.SimpleMatcher('{"users"}[]') | streamson.DepthMatcher("2")
+    assert matcher.simple_paths is None
+    extracted = streamson.extract_iter(
+        (e for e in [b'{"users": [1], "groups": [2]}']), [(matcher, None)], fast_skip=True
+    )
+    with pytest.warns(RuntimeWarning):
+        assert [path for path, _ in Output(extracted).generator()] == ['{"users"}[0]', '{"groups"}[0]']
+
+
+@pytest.mark.parametrize("kind", [Kind.FD, Kind.ITER], ids=["fd", "iter"])
+def test_matcher_set(io_reader, data, kind):
+    matcher = streamson.MatcherSet(['{"users"}[0]', streamson.SimpleMatcher("{}[1]"), '{"groups"}[]'])
+
+    if kind == Kind.ITER:
+        extracted = streamson.extract_records_iter((e for e in data), [(matcher, None)])
+    elif kind == Kind.FD:
+        extracted = streamson.extract_records_fd(io_reader, [(matcher, None)], 5)
+
+    assert list(extracted) == [
+        ('{"users"}[0]', b'"john"'),
+        ('{"users"}[1]', b'"carl"'),
+        ('{"groups"}[0]', b'"admins"'),
+        ('{"groups"}[1]', b'"users"'),
+    ]
+    assert matcher.match_indices('{"users"}[0]') == [0]
+    assert matcher.match_indices('{"groups"}[1]') == [1, 2]
+    assert matcher.match_indices('{"groups"}') == []
+
+    with pytest.raises(ValueError):
+        streamson.MatcherSet(['{"users"}[1-2]'])
+
+
+@pytest.mark.parametrize("kind", [Kind.FD, Kind.ITER], ids=["fd", "iter"])
+def test_objects(kind):
+    input_data = (
+        b'{"users": [{"name": "john", "age": 30, "tags": ["a\\"\\u00e9\\ud83d\\ude00"]},'
+        b' {"name": null, "score": -1.5e2, "big": 123456789012345678901234567890, "ok": true, "no": false}]}'
+    )
+    matcher = streamson.SimpleMatcher('{"users"}[]')
+
+    if kind == Kind.ITER:
+        chunks = [input_data[i : i + 5] for i in range(0, len(input_data), 5)]
+        extracted = streamson.extract_objects_iter((e for e in chunks), [(matcher, None)])
+    elif kind == Kind.FD:
+        extracted = streamson.extract_objects_fd(io.BytesIO(input_data), [(matcher, None)], 5)
+
+    assert list(extracted) == [
+        ('{"users"}[0]', {"name": "john", "age": 30, "tags": ['a"é\U0001f600']}),
+        (
+            '{"users"}[1]',
+            {"name": None, "score": -150.0, "big": 123456789012345678901234567890, "ok": True, "no": False},
+        ),
+    ]
+
+
+def test_objects_invalid():
+    extract = Extract(True)
+    extract.add_matcher(streamson.SimpleMatcher('{"users"}').inner, PythonConverterHandler(lambda x: b"{" + x, True))
+
+    with pytest.raises(ValueError):
+        extract.process_objects(b'{"users": [1]}')
+
+
+@pytest.mark.parametrize("kind", [Kind.FD, Kind.ITER], ids=["fd", "iter"])
+def test_documents(kind):
+    input_data = b'{"a": 1}\n{"a": [2, "}"]}\n"a"\n4\n{"b": 5}{"a": 6} {"a": 7}'
+    matcher = streamson.SimpleMatcher('{"a"}')
+
+    if kind == Kind.ITER:
+        chunks = [input_data[i : i + 3] for i in range(0, len(input_data), 3)]
+        extracted = streamson.extract_iter((e for e in chunks), [(matcher, None)], documents=True)
+    elif kind == Kind.FD:
+        extracted = streamson.extract_fd(io.BytesIO(input_data), [(matcher, None)], 3, documents=True)
+
+    documents: dict = {}
+    for index, output in extracted:
+        if output and output[1]:
+            documents[index] = documents.get(index, b"") + output[1]
+
+    assert documents == {0: b"1", 1: b'[2, "}"]', 5: b"6", 6: b"7"}
+
+
+def zstd_compress(data: bytes) -> bytes:
+    """Zstandard frame which stores the data in a single raw (uncompressed) block"""
+    assert len(data) < 256
+    header = b"\x28\xb5\x2f\xfd" + bytes([0x20, len(data)])  # single segment, 1B content size
+    block = (1 | len(data) << 3).to_bytes(3, "little")  # last raw block
+    return header + block + data
+
+
+class BufferReader(io.BytesIO):
+    def read(self, size=-1):
+        return memoryview(bytearray(super().read(size)))
+
+
+@pytest.mark.parametrize(
+    "compress,compression",
+    [
+        (gzip.compress, "gzip"),
+        (gzip.compress, "auto"),
+        (lambda x: gzip.compress(x[:10]) + gzip.compress(x[10:]), "gzip"),
+        (zstd_compress, "zstd"),
+        (zstd_compress, "auto"),
+        (lambda x: zstd_compress(x[:10]) + zstd_compress(x[10:]), "zstd"),
+        (lambda x: x, "auto"),
+    ],
+    ids=["gzip", "gzip-auto", "gzip-multi", "zstd", "zstd-auto", "zstd-multi", "plain-auto"],
+)
+def test_compression(compress, compression):
+    input_data = b'{"users": ["john", "carl", "bob"]}'
+    matcher = streamson.SimpleMatcher('{"users"}[]')
+    extracted = streamson.extract_records_fd(
+        io.BytesIO(compress(input_data)), [(matcher, None)], 5, compression=compression
+    )
+
+    assert list(extracted) == [
+        ('{"users"}[0]', b'"john"'),
+        ('{"users"}[1]', b'"carl"'),
+        ('{"users"}[2]', b'"bob"'),
+    ]
+
+
+def test_compression_buffer():
+    matcher = streamson.SimpleMatcher('{"users"}[]')
+    input_fd = BufferReader(gzip.compress(b'{"users": ["john", "carl"]}'))
+    extracted = streamson.extract_records_fd(input_fd, [(matcher, None)], 5, compression="gzip")
+
+    assert list(extracted) == [('{"users"}[0]', b'"john"'), ('{"users"}[1]', b'"carl"')]
+
+
+def test_compression_invalid():
+    with pytest.raises(ValueError):
+        list(streamson.extract_records_fd(io.BytesIO(b"\x1f\x8bxxxx"), [], compression="auto"))
+
+    with pytest.raises(ValueError):
+        list(streamson.extract_records_fd(io.BytesIO(b"{}"), [], compression="lzma"))
+
+
+def test_sink(tmp_path, data):
+    path = tmp_path / "output.json"
+    extract = Extract(True)
+    extract.add_matcher(streamson.SimpleMatcher('{"users"}[]').inner, None)
+
+    sink = streamson.Sink(str(path), separator=",", before="[", after="]", buffer_size=2)
+    for item in data:
+        extract.process_into(item, sink)
+    extract.terminate_into(sink)
+    sink.close()
+
+    assert path.read_bytes() == b'["john","carl","bob"]'
+
+    with pytest.raises(ValueError):
+        sink.write(b"{}")
@@ -1,3 +1,6 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 
 import streamson
@@ -47,15 +50,15 @@ async def test_simple(make_async_gen, convert, extract_path):
     convert = convert if convert else (lambda x: x)
     assert buff_handler.pop_front() == (
         '{"users"}[0]' if extract_path else None,
-        [e for e in convert(b'"john"')],
+        convert(b'"john"'),
     )
     assert buff_handler.pop_front() == (
         '{"users"}[1]' if extract_path else None,
-        [e for e in convert(b'"carl"')],
+        convert(b'"carl"'),
     )
     assert buff_handler.pop_front() == (
         '{"users"}[2]' if extract_path else None,
-        [e for e in convert(b'"bob"')],
+        convert(b'"bob"'),
     )
     assert buff_handler.pop_front() is None
 
@@ -103,7 +106,7 @@ async def test_depth(make_async_gen, convert, extract_path):
     convert = convert if convert else (lambda x: x)
     assert buff_handler.pop_front() == (
         '{"users"}' if extract_path else None,
-        [e for e in convert(b'["john", "carl", "bob"]')],
+        convert(b'["john", "carl", "bob"]'),
     )
     assert buff_handler.pop_front() is None
 
@@ -150,7 +153,7 @@ async def test_invert(make_async_gen, convert, extract_path):
     convert = convert if convert else (lambda x: x)
     assert buff_handler.pop_front() == (
         "" if extract_path else None,
-        [e for e in convert(b'{"users": ["john", "carl", "bob"]}')],
+        convert(b'{"users": ["john", "carl", "bob"]}'),
     )
     assert buff_handler.pop_front() is None
 
@@ -195,7 +198,7 @@ async def test_all(make_async_gen, convert, extract_path):
     convert = convert if convert else (lambda x: x)
     assert buff_handler.pop_front() == (
         '{"users"}[1]' if extract_path else None,
-        [e for e in convert(b'"carl"')],
+        convert(b'"carl"'),
     )
     assert buff_handler.pop_front() is None
 
@@ -242,7 +245,7 @@ async def test_any(make_async_gen, convert, extract_path):
     convert = convert if convert else (lambda x: x)
     assert buff_handler.pop_front() == (
         '{"users"}' if extract_path else None,
-        [e for e in convert(b'["john", "carl", "bob"]')],
+        convert(b'["john", "carl", "bob"]'),
     )
     assert buff_handler.pop_front() is None
 
@@ -292,6 +295,36 @@ async def test_complex(make_async_gen, convert, extract_path):
     convert = convert if convert else (lambda x: x)
     assert buff_handler.pop_front() == (
         '{"users"}' if extract_path else None,
-        [e for e in convert(b'["john", "carl", "bob"]')],
+        convert(b'["john", "carl", "bob"]'),
     )
     assert buff_handler.pop_front() is None
+
+
+@pytest.mark.asyncio
+async def test_stream_reader():
+    reader = asyncio.StreamReader()
+    reader.feed_data(b'{"users": ["john", "carl", "bob"], "groups": ["admins", "users"]}')
+    reader.feed_eof()
+
+    matcher = streamson.SimpleMatcher('{"users"}[]')
+    with ThreadPoolExecutor(1) as executor:
+        async_out = streamson.extract_async(reader, [(matcher, None)], buffer_size=5, read_ahead=1, executor=executor)
+        res = [rec async for rec in async_out]
+
+    assert list(Output(e for e in res).generator()) == [
+        ('{"users"}[0]', b'"john"'),
+        ('{"users"}[1]', b'"carl"'),
+        ('{"users"}[2]', b'"bob"'),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_input_error():
+    async def failing_input():
+        yield b'{"users": ['
+        raise RuntimeError("connection lost")
+
+    async_out = streamson.extract_async(failing_input(), [(streamson.SimpleMatcher('{"users"}[]'), None)])
+    with pytest.raises(RuntimeError):
+        async for _ in async_out:
+            pass
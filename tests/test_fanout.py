@@ -0,0 +1,47 @@
+import gzip
+import io
+
+import streamson
+from streamson.handler import PythonHandler
+
+
+def test_fanout(io_reader):
+    paths = []
+
+    def store_path(path, matcher_idx, token):
+        paths.append(path)
+
+    handler = PythonHandler(store_path, lambda *args: None, lambda *args: None, True, False)
+    targets = {
+        "users": [(streamson.SimpleMatcher('{"users"}[]'), None)],
+        "groups": [(streamson.SimpleMatcher('{"groups"}[0]'), None), (streamson.SimpleMatcher('{"groups"}[1]'), None)],
+        "paths": [(streamson.DepthMatcher("1-1"), handler)],
+    }
+    output = list(streamson.fanout_fd(io_reader, targets, 5))
+
+    assert [e for e in output if e[0] == "users"] == [
+        ("users", '{"users"}[0]', b'"john"'),
+        ("users", '{"users"}[1]', b'"carl"'),
+        ("users", '{"users"}[2]', b'"bob"'),
+    ]
+    assert [e for e in output if e[0] == "groups"] == [
+        ("groups", '{"groups"}[0]', b'"admins"'),
+        ("groups", '{"groups"}[1]', b'"users"'),
+    ]
+    assert not [e for e in output if e[0] == "paths"]
+    # handlers are triggered during the same pass
+    assert paths == ['{"users"}', '{"groups"}']
+
+
+def test_fanout_reuse():
+    data = b'{"a": 1, "b": 2}'
+    targets = {
+        "a": [(streamson.SimpleMatcher('{"a"}'), None)],
+        "b": [(streamson.SimpleMatcher('{"b"}'), None)],
+    }
+
+    for _ in range(2):
+        output = streamson.fanout_fd(
+            io.BytesIO(gzip.compress(data)), targets, 4, require_path=False, compression="auto"
+        )
+        assert sorted(output) == [("a", None, b"1"), ("b", None, b"2")]
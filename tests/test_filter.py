@@ -47,7 +47,7 @@ def test_simple(io_reader, data, kind, convert):
         next(output)
 
     convert = convert if convert else (lambda x: x)
-    assert buff_handler.pop_front() == ('{"users"}[0]', [e for e in convert(b'"john"')])
-    assert buff_handler.pop_front() == ('{"users"}[1]', [e for e in convert(b'"carl"')])
-    assert buff_handler.pop_front() == ('{"users"}[2]', [e for e in convert(b'"bob"')])
+    assert buff_handler.pop_front() == ('{"users"}[0]', convert(b'"john"'))
+    assert buff_handler.pop_front() == ('{"users"}[1]', convert(b'"carl"'))
+    assert buff_handler.pop_front() == ('{"users"}[2]', convert(b'"bob"'))
     assert buff_handler.pop_front() is None
@@ -0,0 +1,76 @@
+import io
+import json
+
+import pytest
+
+import streamson
+
+RECORDS = [{"name": f"user{i}", "tags": ["a,b", "]", '"{'], "id": i} for i in range(100)]
+
+
+@pytest.fixture
+def array_path(tmp_path):
+    path = tmp_path / "array.json"
+    path.write_text(json.dumps(RECORDS))
+    return path
+
+
+@pytest.mark.parametrize("ordered", [True, False], ids=["ordered", "unordered"])
+def test_names(array_path, ordered):
+    matcher = streamson.SimpleMatcher('[]{"name"}')
+    extracted = list(streamson.extract_parallel(array_path, matcher, workers=4, ordered=ordered, shard_size=100))
+
+    expected = [(f'[{i}]{{"name"}}', f'"user{i}"'.encode()) for i in range(100)]
+    if ordered:
+        assert extracted == expected
+    else:
+        assert sorted(extracted) == sorted(expected)
+
+
+def test_nopath(array_path):
+    matcher = streamson.SimpleMatcher("[]")
+    extracted = list(streamson.extract_parallel(array_path, matcher, workers=3, require_path=False, shard_size=1))
+
+    assert [json.loads(e[1]) for e in extracted] == RECORDS
+    assert all(e[0] is None for e in extracted)
+
+
+def test_index(array_path):
+    matcher = streamson.SimpleMatcher('[5]{"name"}') | streamson.MatcherSet(['[0]{"id"}', "[97]"])
+    extracted = list(streamson.extract_parallel(array_path, matcher, workers=3, shard_size=100))
+
+    assert extracted == [
+        ('[0]{"id"}', b"0"),
+        ('[5]{"name"}', b'"user5"'),
+        ("[97]", json.dumps(RECORDS[97]).encode()),
+    ]
+
+
+def test_unsupported_matcher(array_path):
+    with pytest.raises(ValueError):
+        list(streamson.extract_parallel(array_path, streamson.RegexMatcher(r"^\[1\]$")))
+
+
+def test_not_array(tmp_path):
+    path = tmp_path / "object.json"
+    path.write_text(json.dumps({"users": RECORDS}))
+
+    with pytest.raises(ValueError):
+        list(streamson.extract_parallel(path, streamson.SimpleMatcher('{"users"}')))
+
+
+def test_ndjson():
+    input_data = "\n".join(json.dumps(record) for record in RECORDS).encode() + b"\n\n"
+    matcher = streamson.SimpleMatcher('{"name"}')
+    extracted = list(streamson.extract_ndjson_parallel(io.BytesIO(input_data), matcher, workers=4, block_size=100))
+
+    assert extracted == [(i, '{"name"}', f'"user{i}"'.encode()) for i in range(100)]
+
+
+def test_ndjson_documents():
+    # several documents on a line and empty lines
+    input_data = b'{"a": 0} 1 {"a": 2}\n\n3\n{"a": 4}\n\n\n{"b": 5} {"a": 6}\n'
+    matcher = streamson.SimpleMatcher('{"a"}')
+    extracted = streamson.extract_ndjson_parallel(io.BytesIO(input_data), matcher, workers=2, block_size=1)
+
+    assert list(extracted) == [(0, '{"a"}', b"0"), (2, '{"a"}', b"2"), (4, '{"a"}', b"4"), (6, '{"a"}', b"6")]
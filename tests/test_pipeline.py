@@ -0,0 +1,59 @@
+import io
+
+import pytest
+
+import streamson
+
+
+def test_extract_reuse(data):
+    pipeline = streamson.Pipeline.extract([(streamson.SimpleMatcher('{"users"}[]'), None)])
+
+    first = [e for e in pipeline.iter(iter(data)) if e[1]]
+    # unfinished input is dropped by the next run
+    list(pipeline.iter([b'{"users": ["unfinished']))
+    second = [e for e in pipeline.fd(io.BytesIO(b"".join(data)), 5) if e[1]]
+
+    assert first == second
+    assert [e[0] for e in first] == ['{"users"}[0]', '{"users"}[1]', '{"users"}[2]']
+
+
+def test_records_reuse(data):
+    pipeline = streamson.Pipeline.extract([(streamson.SimpleMatcher('{"users"}[]'), None)])
+
+    for _ in range(3):
+        records = list(pipeline.records_iter(iter(data)))
+        assert records == [('{"users"}[0]', b'"john"'), ('{"users"}[1]', b'"carl"'), ('{"users"}[2]', b'"bob"')]
+
+
+def test_convert_reuse(replace_handler):
+    pipeline = streamson.Pipeline.convert([(streamson.SimpleMatcher('{"users"}[0]'), replace_handler)])
+
+    for _ in range(2):
+        output = b"".join(e[1] for e in pipeline.iter([b'{"users": ["jo', b'hn", "carl"]}']) if e[1])
+        assert output == b'{"users": ["***", "carl"]}'
+
+
+def test_pool():
+    created = []
+
+    def factory(path: str) -> streamson.Pipeline:
+        created.append(path)
+        return streamson.Pipeline.extract([(streamson.SimpleMatcher(path), None)], require_path=False)
+
+    pool = streamson.PipelinePool(factory, max_idle=1)
+
+    with pool.acquire('{"a"}') as first:
+        with pool.acquire('{"a"}') as second:
+            assert first is not second
+            assert [e[1] for e in second.iter([b'{"a": 1}']) if e[1]] == [b"1"]
+    with pool.acquire('{"a"}') as third:
+        assert third in (first, second)
+    with pool.acquire('{"b"}') as other:
+        assert [e[1] for e in other.iter([b'{"b": 2}']) if e[1]] == [b"2"]
+    assert created == ['{"a"}', '{"a"}', '{"b"}']
+
+    with pytest.raises(ValueError):
+        with pool.acquire('{"b"}') as failed:
+            raise ValueError()
+    with pool.acquire('{"b"}') as pipeline:
+        assert pipeline is not failed
@@ -3,7 +3,7 @@ from enum import Enum, auto
 import pytest
 
 import streamson
-from streamson.handler import BufferHandler
+from streamson.handler import BaseHandler, BufferHandler, PythonBatchHandler, PythonHandler
 
 
 class Kind(Enum):
@@ -39,9 +39,9 @@ def test_simple(io_reader, data, kind, extract_path):
 
     assert output_data == b'{"users": ["john", "carl", "bob"], "groups": ["admins", "users"]}'
 
-    assert handler.pop_front() == ('{"users"}[0]' if extract_path else None, [e for e in b'"john"'])
-    assert handler.pop_front() == ('{"users"}[1]' if extract_path else None, [e for e in b'"carl"'])
-    assert handler.pop_front() == ('{"users"}[2]' if extract_path else None, [e for e in b'"bob"'])
+    assert handler.pop_front() == ('{"users"}[0]' if extract_path else None, b'"john"')
+    assert handler.pop_front() == ('{"users"}[1]' if extract_path else None, b'"carl"')
+    assert handler.pop_front() == ('{"users"}[2]' if extract_path else None, b'"bob"')
     assert handler.pop_front() is None
 
 
@@ -73,6 +73,175 @@ def test_nested(io_reader, data, kind, extract_path):
             output_data += e
     assert output_data == b'{"users": ["john", "carl", "bob"], "groups": ["admins", "users"]}'
 
-    assert handler.pop_front() == ('{"users"}[0]' if extract_path else None, [e for e in b'"john"'])
-    assert handler.pop_front() == ('{"users"}' if extract_path else None, [e for e in b'["john", "carl", "bob"]'])
+    assert handler.pop_front() == ('{"users"}[0]' if extract_path else None, b'"john"')
+    assert handler.pop_front() == ('{"users"}' if extract_path else None, b'["john", "carl", "bob"]')
     assert handler.pop_front() is None
+
+
+def test_buffer_as_list(data):
+    matcher = streamson.SimpleMatcher('{"users"}[0]')
+    handler = BufferHandler(use_path=True, as_list=True)
+    for _ in streamson.trigger_iter((e for e in data), [(matcher, handler)]):
+        pass
+
+    assert handler.pop_front() == ('{"users"}[0]', [e for e in b'"john"'])
+    assert handler.pop_front() is None
+
+
+def test_buffer_is_full(data):
+    matcher = streamson.SimpleMatcher('{"users"}[]')
+    handler = BufferHandler(use_path=True, max_buffered=10)
+    trigger = streamson.trigger.Trigger()
+    trigger.add_matcher(matcher.inner, handler)
+
+    _, processed = trigger.process_until_full(data[0])
+    assert processed < len(data[0])
+    assert handler.is_full()
+    # exceeded only by the last finished record
+    assert 10 <= handler.buffered_size <= 10 + len(b'"carl"')
+
+    # nothing is processed until records are removed
+    assert trigger.process_until_full(data[0][processed:]) == ([], 0)
+
+    assert handler.pop_front() == ('{"users"}[0]', b'"john"')
+    assert handler.pop_front() == ('{"users"}[1]', b'"carl"')
+    assert handler.pop_front() is None
+    assert not handler.is_full()
+
+    _, rest = trigger.process_until_full(data[0][processed:])
+    assert processed + rest == len(data[0])
+    assert handler.pop_front() == ('{"users"}[2]', b'"bob"')
+
+
+def test_buffer_spill(tmp_path):
+    input_data = b"[" + b",".join(b'"%d"' % i for i in range(100)) + b"]"
+    matcher = streamson.SimpleMatcher("[]")
+    handler = BufferHandler(use_path=True, max_buffered=20, spill=True, spill_dir=str(tmp_path))
+
+    for _ in streamson.trigger_iter(
+        (input_data[i : i + 7] for i in range(0, len(input_data), 7)), [(matcher, handler)]
+    ):
+        assert handler.buffered_size <= 20
+        assert not handler.is_full()
+
+    assert list(tmp_path.iterdir())
+    for i in range(50):
+        assert handler.pop_front() == (f"[{i}]", b'"%d"' % i)
+
+    for _ in streamson.trigger_iter((e for e in [b'["x"]']), [(matcher, handler)]):
+        pass
+
+    assert [handler.pop_front() for _ in range(51)] == [(f"[{i}]", b'"%d"' % i) for i in range(50, 100)] + [
+        ("[0]", b'"x"')
+    ]
+    assert handler.pop_front() is None
+
+
+@pytest.mark.parametrize("as_list", [True, False], ids=["list", "bytes"])
+def test_python_handler_feed(data, as_list):
+    fed = []
+
+    def feed(data, matcher_idx):
+        fed.append(data)
+
+    handler = PythonHandler(lambda *args: None, feed, lambda *args: None, True, False, as_list=as_list)
+    matcher = streamson.SimpleMatcher('{"users"}[0]')
+    for _ in streamson.trigger_iter((e for e in data), [(matcher, handler)]):
+        pass
+
+    expected = b"".join(bytes(e) for e in fed)
+    assert expected == b'"john"'
+    assert all(isinstance(e, list if as_list else bytes) for e in fed)
+
+
+def test_python_handler_paths(data):
+    paths = []
+
+    def store_path(path, matcher_idx, token):
+        paths.append(path)
+
+    handler = PythonHandler(store_path, lambda *args: None, store_path, True, False)
+    matcher = streamson.SimpleMatcher('{"users"}[]')
+    for _ in streamson.trigger_iter((e for e in data), [(matcher, handler)]):
+        pass
+
+    assert paths == ['{"users"}[0]', '{"users"}[0]', '{"users"}[1]', '{"users"}[1]', '{"users"}[2]', '{"users"}[2]']
+    # the same path is passed to start and end
+    assert paths[0] is paths[1]
+
+
+def test_matcher_set_indices(data):
+    matched = []
+
+    def store(path, matcher_idx, token):
+        matched.append((path, matcher_idx))
+
+    handler = PythonHandler(store, lambda *args: None, lambda *args: None, True, False)
+    matcher = streamson.MatcherSet(['{"users"}[0]', "{}[1]", '{"groups"}[]'])
+    for _ in streamson.trigger_iter((e for e in data), [(matcher, handler)]):
+        pass
+
+    assert matched == [('{"users"}[0]', 0), ('{"users"}[1]', 1), ('{"groups"}[0]', 2), ('{"groups"}[1]', 1)]
+
+
+def test_single_handler_without_group(data):
+    merged = []
+
+    def start(path, matcher_idx, token):
+        # merging locks the group, which is not locked while its only handler runs
+        merged.append(handler + BaseHandler())
+
+    handler = PythonHandler(start, lambda *args: None, lambda *args: None, True, False)
+    matcher = streamson.SimpleMatcher('{"users"}[0]')
+    for _ in streamson.trigger_iter((e for e in data), [(matcher, handler)]):
+        pass
+
+    assert len(merged) == 1
+
+
+def test_python_batch_handler(data):
+    batches = []
+
+    def store(batch):
+        batches.append(
+            [
+                (kind, path, idx, batch.data[start:end])
+                for kind, path, idx, start, end in zip(
+                    batch.kinds, batch.paths, batch.matcher_indices, batch.offsets, batch.offsets[1:]
+                )
+            ]
+        )
+
+    handler = PythonBatchHandler(store)
+    matcher = streamson.SimpleMatcher('{"users"}[]')
+    chunks = [data[0][:22], data[0][22:]]
+    for _ in streamson.trigger_iter((e for e in chunks), [(matcher, handler)]):
+        pass
+
+    # single call per processed chunk
+    assert len(batches) == 2
+    events = batches[0] + batches[1]
+    assert [(kind, path, idx) for kind, path, idx, _ in events if kind != "feed"] == [
+        ("start", '{"users"}[0]', 0),
+        ("end", '{"users"}[0]', 0),
+        ("start", '{"users"}[1]', 0),
+        ("end", '{"users"}[1]', 0),
+        ("start", '{"users"}[2]', 0),
+        ("end", '{"users"}[2]', 0),
+    ]
+    assert b"".join(data for kind, _, _, data in events) == b'"john""carl""bob"'
+    assert batches[1][0][0] == "feed"
+    # the start and the end share the path
+    start, end = [path for kind, path, _, _ in batches[0] if kind != "feed"][:2]
+    assert start is end
+
+
+def test_mmap(file_reader):
+    matcher = streamson.SimpleMatcher('{"users"}[]')
+    handler = BufferHandler(use_path=True)
+    output_data = b""
+    for e in streamson.trigger_fd(file_reader, [(matcher, handler)], 5, use_mmap=True):
+        output_data += e
+
+    assert output_data == b'{"users": ["john", "carl", "bob"], "groups": ["admins", "users"]}'
+    assert handler.pop_front() == ('{"users"}[0]', b'"john"')
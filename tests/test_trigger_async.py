@@ -23,6 +23,6 @@ async def test_simple(make_async_gen, extract_path):
         output_data += rec
     assert output_data == b'{"users": ["john", "carl", "bob"]}'
 
-    assert handler.pop_front() == ('{"users"}[0]' if extract_path else None, [e for e in b'"john"'])
-    assert handler.pop_front() == ('{"users"}[1]' if extract_path else None, [e for e in b'"carl"'])
-    assert handler.pop_front() == ('{"users"}[2]' if extract_path else None, [e for e in b'"bob"'])
+    assert handler.pop_front() == ('{"users"}[0]' if extract_path else None, b'"john"')
+    assert handler.pop_front() == ('{"users"}[1]' if extract_path else None, b'"carl"')
+    assert handler.pop_front() == ('{"users"}[2]' if extract_path else None, b'"bob"')